@@ -0,0 +1,674 @@
+# api.py
+"""
+JSON HTTP API for mobile clients and integrations.
+
+A plain ASGI app (no web framework) over the same data layer as the
+Streamlit portals: reads go through shared.fetch() (pooled connections,
+query cache, read replicas), writes through run_query() and the diet log
+write-behind queue. Serve it with any ASGI server:
+
+    pip install uvicorn
+    python api.py --port 8000 --workers 4        # or: uvicorn api:app
+
+Log in with POST /api/login and send the token back as
+"Authorization: Bearer <token>". With several workers set
+NUTRITION_SECRET_KEY so every worker accepts every token. POST
+/api/logout records the token in Revoked_Tokens (migration 0006), so
+every worker refuses it after at most NUTRITION_REVOCATION_SYNC seconds
+(default 1; set 0 to check the table on every request).
+
+Every GET response carries an ETag; repeat the request with
+If-None-Match and an unchanged resource comes back as 304 with no body.
+Serialized GET responses are cached per user until a write to the tables
+behind them, so repeat and conditional GETs skip the database entirely.
+
+    POST   /api/login                  {"email", "password"}
+    POST   /api/logout
+    GET    /api/profile
+    PATCH  /api/profile                {"Name", "Height_cm", "Weight_kg"}
+    POST   /api/weight                 {"weight"}
+    GET    /api/weight?bucket=Daily    chart series (Raw / Daily / Weekly / Monthly)
+    GET    /api/weight/history?after=  newest-first records, keyset paged
+    GET    /api/diet-log?after=&limit=
+    POST   /api/diet-log               {"Recipe_ID", "Date", "Time", "Portion_Size", "Notes"}
+    PATCH  /api/diet-log/{id}          {"is_finished", "Portion_Size", "Notes"}
+    DELETE /api/diet-log/{id}
+    GET    /api/diet-log/daily?start=&end=
+    GET    /api/meal-plan
+    POST   /api/meal-plan              create the user's plan
+    POST   /api/meal-plan/items        {"Recipe_ID", "Meal_Type", "Day_Of_Week"}
+    DELETE /api/meal-plan/items/{id}
+    GET    /api/recipes?q=&cuisine=&after=&limit=
+    GET    /api/recipes/{id}           recipe, nutrition, rating, ingredients
+    GET    /api/recipes/{id}/similar
+    GET    /api/recommendations
+    POST   /api/feedback               {"Recipe_ID", "Rating", "Comments"}
+
+Load-test with api_loadtest.py.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from urllib.parse import parse_qs
+import numpy as np
+import pandas as pd
+from sqlalchemy import exc
+import metrics
+import diet_ingest
+import recommend
+import search
+from async_db import fetch_all
+from auth import authenticate, revoke_token, validate_token
+from daily_nutrition import daily_totals
+from database import load_db_config
+from pagination import keyset_page
+from shared import CACHE_TTL_SECONDS, data_version, fetch, run_query
+from weight_history import BUCKETS, chart_series, history_page
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# Handlers block on the database; one thread per pooled connection
+_config = load_db_config()
+THREADS = int(_config["pool_size"]) + int(_config["max_overflow"])
+
+MAX_BODY_BYTES = 1024 * 1024
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner", "Snack"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query          # name -> first value
+        self.headers = headers      # lower-cased name -> value
+        self.body = body            # parsed JSON object ({} when empty)
+        self.params = {}            # path parameters
+        self.user = None            # auth.validate_token() user
+
+    @property
+    def user_id(self):
+        return int(self.user["User_ID"])
+
+    def arg(self, name, cast=str, default=None):
+        value = self.query.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            raise HTTPError(400, f"Invalid value for {name}")
+
+    def field(self, name, cast=str, required=True):
+        if name not in self.body or self.body[name] in (None, ""):
+            if required:
+                raise HTTPError(400, f"{name} is required")
+            return None
+        try:
+            return cast(self.body[name])
+        except (TypeError, ValueError):
+            raise HTTPError(400, f"Invalid value for {name}")
+
+    def limit(self):
+        return max(1, min(self.arg("limit", int, DEFAULT_LIMIT), MAX_LIMIT))
+
+
+# -----------------------------
+# JSON
+# -----------------------------
+def _json_default(value):
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # MySQL TIME columns come back as timedelta
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def records(df):
+    """DataFrame -> list of dicts with NULL/NaN as None."""
+    rows = df.to_dict("records")
+    # Only float / datetime / timedelta columns can hold NaN or NaT
+    nullable = [c for c, dtype in df.dtypes.items() if dtype.kind in "fmM"]
+    if nullable:
+        for row in rows:
+            for c in nullable:
+                if pd.isna(row[c]):
+                    row[c] = None
+    return rows
+
+
+def _one(df, what):
+    if df.empty:
+        raise HTTPError(404, f"{what} not found")
+    return records(df)[0]
+
+
+# -----------------------------
+# HANDLERS: AUTH + PROFILE
+# -----------------------------
+def login(req):
+    token, user = authenticate(req.field("email"), req.field("password"))
+    if token is None:
+        raise HTTPError(401, "Invalid email or password")
+    return 200, {"token": token, "user": {k: user[k] for k in ("User_ID", "Name", "Email", "role")}}
+
+
+def logout(req):
+    """
+    Revoke the token in every worker and app process (Revoked_Tokens);
+    other processes refuse it within auth.REVOCATION_SYNC_SECONDS.
+    """
+    token = req.headers["authorization"].split(" ", 1)[1]
+    revoke_token(token)
+    if validate_token(token) is not None:
+        raise HTTPError(500, "Token could not be revoked")
+    return 200, {"ok": True}
+
+
+_PROFILE_SQL = """
+    SELECT User_ID, Name, Email, Gender, Date_Of_Birth, Height_cm, Weight_kg, Activity_Level,
+           Dietary_Preferences, Allergies, BMI, role
+    FROM User WHERE User_ID = :u
+"""
+
+
+def get_profile(req):
+    return 200, _one(fetch(_PROFILE_SQL, {"u": req.user_id}), "User")
+
+
+def update_profile(req):
+    """Same fields and ranges as the profile page; BMI follows height and weight."""
+    current = _one(fetch(_PROFILE_SQL, {"u": req.user_id}), "User")
+    name = req.field("Name", str, required=False) or current["Name"]
+    height = req.field("Height_cm", float, required=False) or float(current["Height_cm"] or 0)
+    weight = req.field("Weight_kg", float, required=False) or float(current["Weight_kg"] or 0)
+    if not (50 <= height <= 250 and 20 <= weight <= 300):
+        raise HTTPError(400, "Height_cm must be 50-250 and Weight_kg 20-300")
+
+    run_query("""
+        UPDATE User
+        SET Name = :n, Height_cm = :h, Weight_kg = :w, BMI = :b
+        WHERE User_ID = :uid
+    """, {"n": name, "h": height, "w": weight, "b": round(weight / ((height / 100) ** 2), 2),
+          "uid": req.user_id})
+    return get_profile(req)
+
+
+def update_weight(req):
+    weight = req.field("weight", float)
+    if not 20 <= weight <= 300:
+        raise HTTPError(400, "weight must be 20-300 kg")
+    run_query("CALL UpdateUserWeight(:uid, :nw)", {"uid": req.user_id, "nw": weight})
+    return 200, {"ok": True}
+
+
+def weight_chart(req):
+    bucket = req.arg("bucket", default="Daily")
+    if bucket not in BUCKETS:
+        raise HTTPError(400, f"bucket must be one of {', '.join(BUCKETS)}")
+    series, total = chart_series(req.user_id, bucket)
+    return 200, {"bucket": bucket, "total": total, "points": records(series.reset_index())}
+
+
+def weight_records(req):
+    after = req.arg("after", int)
+    df, cursor = history_page(req.user_id, (after, after) if after else None, req.limit())
+    return 200, {"items": records(df), "next": cursor[1] if cursor else None}
+
+
+# -----------------------------
+# HANDLERS: DIET LOG
+# -----------------------------
+def list_diet_log(req):
+    after = req.arg("after", int)
+    df, cursor = keyset_page("User_Diet_Log", descending=True, after=(after, after) if after else None,
+                             filters={"User_ID": req.user_id}, limit=req.limit())
+    return 200, {"items": records(df), "next": cursor[1] if cursor else None}
+
+
+def add_diet_log(req):
+    """
+    Queued on the write-behind writer (diet_ingest.py) and flushed at once:
+    201 once written, 409 if the database rejected it, 202 if it is still
+    queued or was spilled to disk for a later retry. No Log_ID is returned.
+    """
+    writer = diet_ingest.get_writer()
+    try:
+        seq = writer.submit(dict(req.body, User_ID=req.user_id, Recipe_ID=req.field("Recipe_ID", int)))
+    except diet_ingest.QueueFull as e:
+        raise HTTPError(503, str(e))
+    except ValueError as e:
+        # diet_ingest.validate() refused the entry
+        raise HTTPError(400, str(e))
+    outcome, reason = writer.wait(seq, timeout=5, flush=True) or ("queued", None)
+    if outcome == "written":
+        return 201, {"status": "written"}
+    if outcome == "rejected":
+        raise HTTPError(409, f"Diet log entry rejected: {reason}")
+    if outcome == "lost":
+        raise HTTPError(500, f"Diet log entry not saved: {reason}")
+    return 202, {"status": outcome}
+
+
+def update_diet_log(req):
+    sets, params = [], {"id": req.params["id"], "u": req.user_id}
+    if "is_finished" in req.body:
+        sets.append("is_finished = :f")
+        params["f"] = bool(req.body["is_finished"])
+    portion = req.field("Portion_Size", float, required=False)
+    if portion is not None:
+        if not 0 < portion < 1000:
+            raise HTTPError(400, "Portion_Size must be between 0 and 1000")
+        sets.append("Portion_Size = :p")
+        params["p"] = portion
+    if "Notes" in req.body:
+        sets.append("Notes = :n")
+        params["n"] = req.body["Notes"]
+    if not sets:
+        raise HTTPError(400, "Nothing to update (is_finished, Portion_Size, Notes)")
+
+    if not run_query(f"UPDATE User_Diet_Log SET {', '.join(sets)} WHERE Log_ID = :id AND User_ID = :u", params):
+        # MySQL reports 0 rows for an unchanged row too; tell the cases apart
+        if fetch("SELECT 1 FROM User_Diet_Log WHERE Log_ID = :id AND User_ID = :u", params).empty:
+            raise HTTPError(404, "Diet log entry not found")
+    return 200, {"ok": True}
+
+
+def delete_diet_log(req):
+    if not run_query("DELETE FROM User_Diet_Log WHERE Log_ID = :id AND User_ID = :u",
+                     {"id": req.params["id"], "u": req.user_id}):
+        raise HTTPError(404, "Diet log entry not found")
+    return 200, {"ok": True}
+
+
+def diet_log_daily(req):
+    end = req.arg("end", date.fromisoformat, date.today())
+    start = req.arg("start", date.fromisoformat, end - timedelta(days=29))
+    return 200, {"items": records(daily_totals(req.user_id, start, end))}
+
+
+# -----------------------------
+# HANDLERS: MEAL PLAN
+# -----------------------------
+def get_meal_plan(req):
+    data = fetch_all({
+        "plan": ("SELECT * FROM Meal_Plan WHERE User_ID = :u ORDER BY MealPlan_ID LIMIT 1",
+                 {"u": req.user_id}),
+        "items": ("""
+            SELECT mpr.MPR_ID, mpr.Recipe_ID, mpr.Meal_Type, mpr.Day_Of_Week,
+                   r.Recipe_Name, r.Cuisine_Type, ROUND(IFNULL(s.Calories, 0), 2) AS Calories
+            FROM MealPlan_Recipes mpr
+            JOIN Recipe r ON r.Recipe_ID = mpr.Recipe_ID
+            LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+            WHERE mpr.MealPlan_ID = (SELECT MIN(MealPlan_ID) FROM Meal_Plan WHERE User_ID = :u)
+            ORDER BY FIELD(mpr.Day_Of_Week, 'Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'),
+                     mpr.MPR_ID
+        """, {"u": req.user_id}),
+    })
+    return 200, {"plan": _one(data["plan"], "Meal plan"), "items": records(data["items"])}
+
+
+def create_meal_plan(req):
+    if not fetch("SELECT MealPlan_ID FROM Meal_Plan WHERE User_ID = :u", {"u": req.user_id}).empty:
+        raise HTTPError(409, "Meal plan already exists")
+    run_query("""
+        INSERT INTO Meal_Plan (User_ID, Plan_Name, Start_Date, End_Date, Notes)
+        VALUES (:u, 'My Meal Plan', CURDATE(), DATE_ADD(CURDATE(), INTERVAL 7 DAY), 'Auto-created')
+    """, {"u": req.user_id})
+    return 201, get_meal_plan(req)[1]
+
+
+def add_meal_plan_item(req):
+    meal_type, day = req.field("Meal_Type"), req.field("Day_Of_Week")
+    if meal_type not in MEAL_TYPES or day not in DAYS:
+        raise HTTPError(400, f"Meal_Type must be one of {MEAL_TYPES} and Day_Of_Week one of {DAYS}")
+    plan = fetch("SELECT MIN(MealPlan_ID) AS id FROM Meal_Plan WHERE User_ID = :u", {"u": req.user_id})
+    if pd.isna(plan.iloc[0]["id"]):
+        raise HTTPError(404, "Meal plan not found; POST /api/meal-plan first")
+
+    run_query("""
+        INSERT INTO MealPlan_Recipes (MealPlan_ID, Recipe_ID, Meal_Type, Day_Of_Week)
+        VALUES (:mp, :rid, :mt, :d)
+    """, {"mp": int(plan.iloc[0]["id"]), "rid": req.field("Recipe_ID", int), "mt": meal_type, "d": day})
+    return 201, {"ok": True}
+
+
+def delete_meal_plan_item(req):
+    if not run_query("""
+        DELETE mpr FROM MealPlan_Recipes mpr
+        JOIN Meal_Plan mp ON mp.MealPlan_ID = mpr.MealPlan_ID
+        WHERE mpr.MPR_ID = :id AND mp.User_ID = :u
+    """, {"id": req.params["id"], "u": req.user_id}):
+        raise HTTPError(404, "Meal plan item not found")
+    return 200, {"ok": True}
+
+
+# -----------------------------
+# HANDLERS: RECIPES + FEEDBACK
+# -----------------------------
+_NUTRITION_COLUMNS = """
+    ROUND(IFNULL(s.Calories, 0), 2) AS Calories,
+    ROUND(IFNULL(s.Carbohydrates_g, 0), 2) AS Carbohydrates_g,
+    ROUND(IFNULL(s.Protein_g, 0), 2) AS Protein_g,
+    ROUND(IFNULL(s.Fat_g, 0), 2) AS Fat_g,
+    ROUND(IFNULL(s.Fiber_g, 0), 2) AS Fiber_g,
+    IFNULL(rs.Rating_Count, 0) AS Ratings, ROUND(rs.Avg_Rating, 2) AS Avg_Rating
+"""
+
+
+def list_recipes(req):
+    """Full-text search with ?q=, otherwise Recipe_ID order, keyset paged with ?after=."""
+    q = req.arg("q")
+    if q:
+        return 200, {"items": records(search.search(q, req.limit())), "next": None}
+
+    where, params = ["r.Recipe_ID > :after"], {"after": req.arg("after", int, 0), "lim": req.limit() + 1}
+    cuisine = req.arg("cuisine")
+    if cuisine:
+        where.append("r.Cuisine_Type = :c")
+        params["c"] = cuisine
+
+    df = fetch(f"""
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, r.Difficulty_Level,
+               r.Preparation_Time_minutes, r.Cooking_Time_minutes, r.Serving_Size,
+               {_NUTRITION_COLUMNS}
+        FROM Recipe r
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        LEFT JOIN Recipe_Rating_Summary rs ON rs.Recipe_ID = r.Recipe_ID
+        WHERE {" AND ".join(where)}
+        ORDER BY r.Recipe_ID
+        LIMIT :lim
+    """, params)
+    more = len(df) >= params["lim"]
+    df = df.iloc[:params["lim"] - 1]
+    return 200, {"items": records(df), "next": int(df.iloc[-1]["Recipe_ID"]) if more else None}
+
+
+def get_recipe(req):
+    data = fetch_all({
+        "recipe": (f"""
+            SELECT r.*, {_NUTRITION_COLUMNS}
+            FROM Recipe r
+            LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+            LEFT JOIN Recipe_Rating_Summary rs ON rs.Recipe_ID = r.Recipe_ID
+            WHERE r.Recipe_ID = :rid
+        """, {"rid": req.params["id"]}),
+        "ingredients": ("""
+            SELECT i.Ingredient_ID, i.Ingredient_Name, ri.Quantity, ri.Unit
+            FROM Recipe_Ingredient ri
+            JOIN Ingredient i ON i.Ingredient_ID = ri.Ingredient_ID
+            WHERE ri.Recipe_ID = :rid
+            ORDER BY ri.RecipeIngredient_ID
+        """, {"rid": req.params["id"]}),
+    })
+    recipe = _one(data["recipe"], "Recipe")
+    recipe["Ingredients"] = records(data["ingredients"])
+    return 200, recipe
+
+
+def similar_recipes(req):
+    return 200, {"items": records(recommend.similar(req.params["id"], req.limit()))}
+
+
+def recommendations(req):
+    return 200, {"items": records(recommend.for_user(req.user_id, req.limit()))}
+
+
+def add_feedback(req):
+    rating = req.field("Rating", int)
+    if not 1 <= rating <= 5:
+        raise HTTPError(400, "Rating must be 1-5")
+    run_query("""
+        INSERT INTO Feedback (User_ID, Recipe_ID, Rating, Comments)
+        VALUES (:u, :r, :rat, :c)
+    """, {"u": req.user_id, "r": req.field("Recipe_ID", int), "rat": rating,
+          "c": req.field("Comments", str, required=False)})
+    return 201, {"ok": True}
+
+
+# -----------------------------
+# ROUTES
+# -----------------------------
+_RECIPE_TABLES = ("Recipe", "Recipe_Nutrition_Summary", "Recipe_Rating_Summary")
+
+# (method, path pattern, handler, needs a token, tables a GET reads);
+# {id} matches an integer. GETs with tables are served from the response
+# cache until one of those tables is written; None means never cached.
+ROUTES = [
+    ("POST", "/api/login", login, False, None),
+    ("POST", "/api/logout", logout, True, None),
+    ("GET", "/api/profile", get_profile, True, ("User",)),
+    ("PATCH", "/api/profile", update_profile, True, None),
+    ("POST", "/api/weight", update_weight, True, None),
+    ("GET", "/api/weight", weight_chart, True, ("User_Weight_History",)),
+    ("GET", "/api/weight/history", weight_records, True, ("User_Weight_History",)),
+    ("GET", "/api/diet-log", list_diet_log, True, ("User_Diet_Log",)),
+    ("POST", "/api/diet-log", add_diet_log, True, None),
+    ("GET", "/api/diet-log/daily", diet_log_daily, True, ("User_Daily_Nutrition",)),
+    ("PATCH", "/api/diet-log/{id}", update_diet_log, True, None),
+    ("DELETE", "/api/diet-log/{id}", delete_diet_log, True, None),
+    ("GET", "/api/meal-plan", get_meal_plan, True, ("Meal_Plan", "MealPlan_Recipes") + _RECIPE_TABLES),
+    ("POST", "/api/meal-plan", create_meal_plan, True, None),
+    ("POST", "/api/meal-plan/items", add_meal_plan_item, True, None),
+    ("DELETE", "/api/meal-plan/items/{id}", delete_meal_plan_item, True, None),
+    ("GET", "/api/recipes", list_recipes, True, _RECIPE_TABLES + ("Recipe_Ingredient", "Ingredient")),
+    ("GET", "/api/recipes/{id}", get_recipe, True, _RECIPE_TABLES + ("Recipe_Ingredient", "Ingredient")),
+    ("GET", "/api/recipes/{id}/similar", similar_recipes, True, None),
+    ("GET", "/api/recommendations", recommendations, True, None),
+    ("POST", "/api/feedback", add_feedback, True, None),
+]
+
+_ROUTES = [
+    (method, re.compile("^" + pattern.replace("{id}", r"(?P<id>\d+)") + "$"), pattern, handler, auth, tables)
+    for method, pattern, handler, auth, tables in ROUTES
+]
+
+
+def match(method, path):
+    """(handler, pattern, path params, needs auth, tables) or raise 404 / 405."""
+    allowed = []
+    for m, regex, pattern, handler, auth, tables in _ROUTES:
+        found = regex.match(path)
+        if found:
+            if m == method:
+                return handler, pattern, {k: int(v) for k, v in found.groupdict().items()}, auth, tables
+            allowed.append(m)
+    if allowed:
+        raise HTTPError(405, f"Use {', '.join(allowed)}")
+    raise HTTPError(404, "Not found")
+
+
+# -----------------------------
+# RESPONSE CACHE
+# -----------------------------
+# Serialized GET responses, so a repeat or conditional GET skips the
+# database, pandas and JSON encoding. An entry is valid while the
+# shared.data_version() of its tables is unchanged; writes from other
+# processes are picked up after the query cache TTL, as for fetch().
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("API_RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# (pattern, user, path params, query) -> (versions, expires_at, body, etag)
+_responses = OrderedDict()
+_responses_bytes = 0
+_responses_lock = threading.Lock()
+
+
+def _cached(key, versions):
+    with _responses_lock:
+        entry = _responses.get(key)
+        if entry and entry[0] == versions and entry[1] > time.monotonic():
+            _responses.move_to_end(key)
+            return entry[2], entry[3]
+    return None
+
+
+def _store(key, versions, body, tag):
+    global _responses_bytes
+    with _responses_lock:
+        old = _responses.pop(key, None)
+        if old:
+            _responses_bytes -= len(old[2])
+        _responses[key] = (versions, time.monotonic() + CACHE_TTL_SECONDS, body, tag)
+        _responses_bytes += len(body)
+        while _responses_bytes > RESPONSE_CACHE_MAX_BYTES:
+            _, (_, _, dropped, _) = _responses.popitem(last=False)
+            _responses_bytes -= len(dropped)
+
+
+# -----------------------------
+# ASGI APP
+# -----------------------------
+def etag(body):
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _run(handler, pattern, req):
+    """Runs on a worker thread; returns (status, JSON body). Queries are grouped per route in metrics."""
+    metrics.set_section(f"API {req.method} {pattern}")
+    try:
+        status, payload = handler(req)
+    except HTTPError as e:
+        # Handlers raise HTTPError(400) for bad input; any other ValueError is a bug (500)
+        status, payload = e.status, {"error": str(e)}
+    except exc.IntegrityError:
+        status, payload = 409, {"error": "Conflicts with existing data (unknown recipe or user?)"}
+    except Exception:
+        traceback.print_exc()
+        status, payload = 500, {"error": "Internal server error"}
+    return status, json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+
+
+async def _read_body(receive):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _respond(send, status, body=b"", headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())] + list(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(THREADS, thread_name_prefix="api"))
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            # Queued diet log entries are written (or spilled) by diet_ingest's atexit hook
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _error(status, message):
+    return status, json.dumps({"error": message}, separators=(",", ":")).encode()
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    method = scope["method"]
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+    try:
+        handler, pattern, params, needs_auth, tables = match(method, scope["path"])
+
+        raw = await _read_body(receive)
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+
+        query = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+        req = Request(method, scope["path"], query, headers, body)
+        req.params = params
+
+        if needs_auth:
+            scheme, _, token = headers.get("authorization", "").partition(" ")
+            req.user = validate_token(token) if scheme.lower() == "bearer" else None
+            if req.user is None:
+                raise HTTPError(401, "Missing or expired token")
+    except HTTPError as e:
+        return await _respond(send, *_error(e.status, str(e)))
+
+    cacheable = method == "GET" and tables is not None
+    if cacheable:
+        key = (pattern, req.user_id, tuple(params.items()), tuple(sorted(query.items())))
+        # Read the versions before the handler runs: a write during it leaves the entry stale
+        versions = tuple(data_version(t) for t in tables)
+        hit = _cached(key, versions)
+
+    if cacheable and hit:
+        status, (out, tag) = 200, hit
+    else:
+        status, out = await asyncio.to_thread(_run, handler, pattern, req)
+        tag = etag(out) if method == "GET" and status == 200 else None
+        if cacheable and tag:
+            _store(key, versions, out, tag)
+
+    extra = [(b"retry-after", b"1")] if status == 503 else []
+    if tag:
+        extra += [(b"etag", tag.encode()), (b"cache-control", b"private, no-cache")]
+        if tag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return await _respond(send, 304, headers=extra)
+    await _respond(send, status, out, extra)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="server processes")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError("Serving the API needs an ASGI server (pip install uvicorn).")
+
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers,
+                log_level="warning", access_log=False)
@@ -0,0 +1,140 @@
+# api_loadtest.py
+"""
+Load-test a running api.py with keep-alive HTTP/1.1 connections (stdlib only).
+
+    python api.py --workers 4 &
+    python api_loadtest.py --email a@b.com --password secret \\
+        --path /api/profile --path /api/recipes --concurrency 64 --seconds 10
+
+Each connection logs in once (or uses --token), then sends GETs to the
+given paths round-robin. With --etag it repeats each path with the last
+ETag in If-None-Match, like a caching client; 304s are counted apart.
+Prints requests/s, latency percentiles and status counts.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(data)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + data)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        payload = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, response_headers, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def _worker(args, token, deadline, latencies, statuses):
+    host, port = urlsplit(args.url).hostname, urlsplit(args.url).port or 80
+    conn = Connection(host, port)
+    etags = {}
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = args.path[i % len(args.path)]
+            i += 1
+            headers = {"Authorization": f"Bearer {token}"}
+            if args.etag and path in etags:
+                headers["If-None-Match"] = etags[path]
+
+            start = time.perf_counter()
+            try:
+                status, response_headers, _ = await conn.request("GET", path, headers)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                conn.close()
+                statuses["error"] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if "etag" in response_headers:
+                etags[path] = response_headers["etag"]
+    finally:
+        conn.close()
+
+
+async def login(args):
+    if args.token:
+        return args.token
+    split = urlsplit(args.url)
+    conn = Connection(split.hostname, split.port or 80)
+    status, _, payload = await conn.request("POST", "/api/login", body={"email": args.email,
+                                                                        "password": args.password})
+    conn.close()
+    if status != 200:
+        raise SystemExit(f"❌ Login failed ({status}): {payload.decode()}")
+    return json.loads(payload)["token"]
+
+
+async def run(args):
+    token = await login(args)
+    latencies, statuses = [], Counter()
+
+    # Warm caches / indexes once so the run measures steady state
+    await _worker(args, token, time.perf_counter() + args.warmup, [], Counter())
+
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(_worker(args, token, deadline, latencies, statuses)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))] * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the JSON API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--token", help="use this token instead of logging in")
+    parser.add_argument("--path", action="append", help="GET path (repeatable); default /api/profile")
+    parser.add_argument("--concurrency", type=int, default=32, help="open connections")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=1)
+    parser.add_argument("--etag", action="store_true", help="send If-None-Match with the last ETag")
+    args = parser.parse_args()
+    args.path = args.path or ["/api/profile"]
+    if not args.token and not (args.email and args.password):
+        parser.error("give --token or --email and --password")
+
+    latencies, statuses, elapsed = asyncio.run(run(args))
+    latencies.sort()
+    print(f"📈 {len(latencies):,} requests in {elapsed:.1f}s = {len(latencies) / elapsed:,.0f} req/s "
+          f"over {args.concurrency} connections")
+    if latencies:
+        print(f"⏱ p50 {percentile(latencies, 50):.1f} ms, p95 {percentile(latencies, 95):.1f} ms, "
+              f"p99 {percentile(latencies, 99):.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    print("Status counts:", dict(statuses))
@@ -0,0 +1,197 @@
+# async_db.py
+"""
+Run a page's independent reads at the same time.
+
+    data = fetch_all({
+        "plans": ("SELECT * FROM Meal_Plan WHERE User_ID = :u", {"u": user_id}),
+        "recipes": ("SELECT Recipe_ID, Recipe_Name FROM Recipe", None),
+    })
+    data["plans"], data["recipes"]
+
+The queries run on an asyncio event loop in a background thread, over
+aiomysql with its own connection pools (one per database, mirroring
+shared.engine and the replicas), so a page waits for the slowest query
+instead of the sum of all of them. Reads go through the shared query
+cache and the same replica routing as fetch(). Each query has its own
+timeout; a query that runs over is cancelled and its connection dropped.
+
+Without aiomysql installed, the queries run on a thread pool through
+fetch() instead (timeouts then stop the wait but not the query).
+"""
+import asyncio
+import contextvars
+import importlib.util
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import pandas as pd
+from sqlalchemy import exc, text
+import metrics
+from database import load_db_config
+from shared import cache_lookup, cache_store, engine, fetch, read_engine, replicas
+
+# Seconds a single query may take
+DEFAULT_TIMEOUT = 10.0
+
+# Worker threads for the fallback without aiomysql
+THREADS = 8
+
+HAS_AIOMYSQL = importlib.util.find_spec("aiomysql") is not None
+
+_READ_RE = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+
+_loop = None
+_engines = {}       # id(sync engine) -> AsyncEngine, used on the loop thread only
+_lock = threading.Lock()
+_executor = None
+
+
+# -----------------------------
+# EVENT LOOP + ENGINES
+# -----------------------------
+def _get_loop():
+    """The process-wide event loop, started on first use in a daemon thread."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-db", daemon=True).start()
+    return _loop
+
+
+def _async_engine(sync_engine):
+    """aiomysql engine for the same database as `sync_engine`, with the configured pool size."""
+    eng = _engines.get(id(sync_engine))
+    if eng is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        config = load_db_config()
+        eng = create_async_engine(
+            sync_engine.url.set(drivername="mysql+aiomysql"),
+            pool_size=int(config["pool_size"]),
+            max_overflow=int(config["max_overflow"]),
+            pool_recycle=int(config["pool_recycle"]),
+            pool_timeout=float(config["pool_timeout"]),
+            pool_pre_ping=str(config["pool_pre_ping"]).lower() in ("1", "true", "yes"),
+        )
+        _engines[id(sync_engine)] = eng
+    return eng
+
+
+# -----------------------------
+# QUERIES (loop thread)
+# -----------------------------
+async def _read(sync_engine, query, params):
+    async with _async_engine(sync_engine).connect() as conn:
+        try:
+            result = await conn.execute(text(query), params or {})
+            # coerce_float turns DECIMAL columns into floats, as pd.read_sql does in fetch()
+            return pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()), coerce_float=True)
+        except asyncio.CancelledError:
+            # The server may still be sending rows; never reuse this connection
+            await conn.invalidate()
+            raise
+
+
+async def _routed(target, query, params, timeout):
+    """(DataFrame, from_replica, seconds); falls back to the primary if a replica is down."""
+    start = time.perf_counter()
+    if target is not engine:
+        try:
+            df = await asyncio.wait_for(_read(target, query, params), timeout)
+            return df, True, time.perf_counter() - start
+        except exc.OperationalError as e:
+            replicas.mark_down(target, e)
+    df = await asyncio.wait_for(_read(engine, query, params), timeout)
+    return df, False, time.perf_counter() - start
+
+
+async def _gather(jobs, timeout, return_exceptions):
+    tasks = [asyncio.ensure_future(_routed(*job, timeout)) for job in jobs]
+    try:
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        raise
+
+
+def _run_async(jobs, timeout, return_exceptions):
+    future = asyncio.run_coroutine_threadsafe(_gather(jobs, timeout, return_exceptions), _get_loop())
+    try:
+        return future.result()
+    except BaseException:
+        # e.g. Streamlit stopping the script for a rerun: cancel what is still running
+        future.cancel()
+        raise
+
+
+# -----------------------------
+# FALLBACK (no aiomysql)
+# -----------------------------
+def _run_threads(queries, timeout, return_exceptions):
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(THREADS, thread_name_prefix="fetch")
+
+    # copy_context keeps the metrics section of the calling script run
+    futures = {name: _executor.submit(contextvars.copy_context().run, fetch, q, p)
+               for name, (q, p) in queries.items()}
+    deadline = time.monotonic() + timeout
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeout:
+            error = TimeoutError(f"{name}: no result after {timeout}s")
+            if not return_exceptions:
+                raise error
+            results[name] = error
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results[name] = e
+    return results
+
+
+# -----------------------------
+# PUBLIC API
+# -----------------------------
+def fetch_all(queries, timeout=DEFAULT_TIMEOUT, return_exceptions=False):
+    """
+    Run {name: (sql, params)} SELECTs concurrently; returns {name: DataFrame}.
+    The first failure (including TimeoutError) cancels the others and is
+    raised, unless return_exceptions=True puts exceptions in the result.
+    """
+    for name, (query, _) in queries.items():
+        if not _READ_RE.match(query):
+            raise ValueError(f"{name}: fetch_all only runs SELECT queries")
+
+    if not HAS_AIOMYSQL:
+        return _run_threads(queries, timeout, return_exceptions)
+
+    results, pending = {}, []
+    for name, (query, params) in queries.items():
+        key, df, generation = cache_lookup(query, params)
+        if df is not None:
+            results[name] = df
+        else:
+            # Routed here, on the script thread, so session stickiness applies
+            pending.append((name, query, params, key, generation, read_engine()))
+
+    outcomes = _run_async([(target, q, p) for _, q, p, _, _, target in pending], timeout, return_exceptions)
+
+    for (name, query, params, key, generation, _), outcome in zip(pending, outcomes):
+        if isinstance(outcome, BaseException):
+            metrics.record("fetch_all", query, timeout if isinstance(outcome, TimeoutError) else 0.0,
+                           error=True)
+            results[name] = outcome
+            continue
+        df, from_replica, seconds = outcome
+        metrics.record("fetch_all", query, seconds, len(df), int(df.memory_usage(deep=True).sum()))
+        cache_store(key, query, df, generation, from_replica)
+        results[name] = df
+
+    return {name: results[name] for name in queries}
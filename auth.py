@@ -0,0 +1,220 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from sqlalchemy import exc, text
+from werkzeug.security import check_password_hash, generate_password_hash
+from shared import engine, run_query
+
+# -------- CONFIG --------
+# Tokens are signed with this key; set NUTRITION_SECRET_KEY so tokens survive
+# restarts and are valid across processes. Otherwise a per-process key is used.
+SECRET_KEY = os.environ.get("NUTRITION_SECRET_KEY", "").encode() or secrets.token_bytes(32)
+SESSION_TTL_SECONDS = int(os.environ.get("NUTRITION_SESSION_TTL", 30 * 60))
+
+# Same prefixes fix_passwords.py uses to detect an already hashed password
+HASH_PREFIXES = ("pbkdf2:", "scrypt:", "argon2")
+
+# werkzeug method for new hashes. Hashes made with other parameters (e.g.
+# fewer pbkdf2 iterations) are re-hashed at the next successful login.
+HASH_METHOD = os.environ.get("NUTRITION_HASH_METHOD", "scrypt:32768:8:1")
+
+# Logouts are shared through Revoked_Tokens; each process picks up other
+# processes' revocations at most this many seconds late (0 = every check)
+REVOCATION_SYNC_SECONDS = float(os.environ.get("NUTRITION_REVOCATION_SYNC", 1.0))
+
+# token -> (expires_at, user dict)
+_sessions = {}
+# nonce -> expires_at of revoked, not yet expired tokens
+_revoked = {}
+_revoked_watermark = 0      # last Revoked_ID seen
+_revoked_synced_at = 0.0
+_lock = threading.Lock()
+
+
+# -------- USER LOOKUP --------
+def find_user_by_email(email):
+    """Single-row lookup on the unique Email index."""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT User_ID, Name, Email, Password, role FROM User WHERE Email = :e"),
+            {"e": email}
+        ).mappings().fetchone()
+    return dict(row) if row else None
+
+
+# -------- PASSWORDS --------
+def is_hashed(password_value):
+    return isinstance(password_value, str) and password_value.startswith(HASH_PREFIXES)
+
+
+def needs_rehash(password_value):
+    """True for plaintext values and hashes not made with HASH_METHOD."""
+    if not is_hashed(password_value):
+        return True
+    method = password_value.split("$", 1)[0]
+    return not (method + ":").startswith(HASH_METHOD + ":")
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=HASH_METHOD)
+
+
+def verify_password(stored, candidate):
+    """Check a candidate against a werkzeug hash (or a legacy plaintext value)."""
+    if not stored or candidate is None:
+        return False
+    if is_hashed(stored):
+        return check_password_hash(stored, candidate)
+    # Legacy rows not yet migrated by fix_passwords.py
+    return hmac.compare_digest(str(stored).encode(), str(candidate).encode())
+
+
+def _upgrade_hash(user_id, password):
+    """Replace a plaintext password or outdated hash after a successful login."""
+    run_query(
+        "UPDATE User SET Password = :p WHERE User_ID = :uid",
+        {"p": hash_password(password), "uid": user_id}
+    )
+
+
+# -------- SESSION TOKENS --------
+def _sign(payload):
+    return hmac.new(SECRET_KEY, payload, hashlib.sha256).digest()
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _unb64(s):
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+
+def issue_token(user):
+    """Create a signed, short-lived session token and cache the user behind it."""
+    expires_at = int(time.time()) + SESSION_TTL_SECONDS
+    payload = json.dumps({
+        "uid": int(user["User_ID"]),
+        "role": user["role"],
+        "exp": expires_at,
+        "n": secrets.token_hex(8),
+    }, separators=(",", ":")).encode()
+
+    token = f"{_b64(payload)}.{_b64(_sign(payload))}"
+    session_user = {"User_ID": int(user["User_ID"]), "Name": user["Name"],
+                    "Email": user["Email"], "role": user["role"]}
+
+    with _lock:
+        _purge_expired()
+        _sessions[token] = (expires_at, session_user)
+    return token
+
+
+def _claims(token):
+    """Verified payload of a token, or None for a malformed or forged one."""
+    try:
+        payload_b64, sig_b64 = token.split(".", 1)
+        payload = _unb64(payload_b64)
+        if not hmac.compare_digest(_sign(payload), _unb64(sig_b64)):
+            return None
+        return json.loads(payload)
+    except (ValueError, TypeError):
+        return None
+
+
+def _sync_revoked():
+    """Pull revocations made by other processes (caller holds _lock)."""
+    global _revoked_watermark, _revoked_synced_at
+    now = time.time()
+    if time.monotonic() - _revoked_synced_at < REVOCATION_SYNC_SECONDS:
+        return
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT Revoked_ID, Nonce, Expires_At FROM Revoked_Tokens
+                WHERE Revoked_ID > :w AND Expires_At > :now
+                ORDER BY Revoked_ID
+            """), {"w": _revoked_watermark, "now": int(now)}).fetchall()
+    except exc.DBAPIError as e:
+        # Keep the revocations we know; try again on the next check
+        print(f"⚠ Could not read Revoked_Tokens: {e}")
+        return
+    for revoked_id, nonce, expires_at in rows:
+        _revoked[nonce] = expires_at
+        _revoked_watermark = max(_revoked_watermark, revoked_id)
+    for n in [n for n, exp in _revoked.items() if exp <= now]:
+        del _revoked[n]
+    _revoked_synced_at = time.monotonic()
+
+
+def validate_token(token):
+    """
+    Return the user for a valid, unexpired, not revoked token, or None.
+    Only reads the database to pick up other processes' logouts
+    (at most every REVOCATION_SYNC_SECONDS).
+    """
+    if not token:
+        return None
+
+    claims = _claims(token)
+    now = time.time()
+    if claims is None or claims.get("exp", 0) <= now:
+        with _lock:
+            _sessions.pop(token, None)
+        return None
+
+    with _lock:
+        _sync_revoked()
+        if claims.get("n") in _revoked:
+            _sessions.pop(token, None)
+            return None
+        cached = _sessions.get(token)
+    if cached:
+        return cached[1]
+    # Issued by another process or before a restart with the same key
+    return {"User_ID": claims["uid"], "role": claims["role"]}
+
+
+def revoke_token(token):
+    """Log a token out in every process (recorded in Revoked_Tokens)."""
+    with _lock:
+        _sessions.pop(token, None)
+    claims = _claims(token) if token else None
+    if claims is None or claims.get("exp", 0) <= time.time():
+        return
+
+    with _lock:
+        _revoked[claims["n"]] = claims["exp"]
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM Revoked_Tokens WHERE Expires_At <= :now"), {"now": int(time.time())})
+        conn.execute(text("INSERT IGNORE INTO Revoked_Tokens (Nonce, Expires_At) VALUES (:n, :exp)"),
+                     {"n": claims["n"], "exp": claims["exp"]})
+
+
+def _purge_expired():
+    now = time.time()
+    for t in [t for t, (exp, _) in _sessions.items() if exp <= now]:
+        del _sessions[t]
+
+
+# -------- LOGIN --------
+def authenticate(email, password, role=None):
+    """
+    Verify credentials with one indexed lookup.
+    Returns (token, user) on success, (None, None) otherwise.
+    """
+    user = find_user_by_email(email)
+    if not user or not verify_password(user["Password"], password):
+        return None, None
+    if role and user["role"] != role:
+        return None, None
+
+    if needs_rehash(user["Password"]):
+        _upgrade_hash(user["User_ID"], password)
+
+    return issue_token(user), user
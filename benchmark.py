@@ -0,0 +1,172 @@
+# benchmark.py
+"""
+Time every query the user and admin portals issue and write the results
+as JSON, so runs on different versions can be compared.
+
+    python benchmark.py --output bench_before.json
+    python benchmark.py --output bench_after.json --compare bench_before.json
+
+Queries run straight against the engine (the shared.py result cache is
+bypassed) with parameters sampled from the current data. Populate the
+database with generate_data.py first.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database import make_engine
+from portal_queries import QUERIES, FULL_SCANS
+
+engine = make_engine()
+
+TABLES = ["User", "Recipe", "Ingredient", "Nutrition", "Recipe_Ingredient", "Meal_Plan",
+          "MealPlan_Recipes", "User_Diet_Log", "Feedback", "User_Weight_History"]
+
+
+# -----------------------------
+# HELPERS
+# -----------------------------
+def sample_params(rng, n):
+    """n parameter sets drawn from real rows so lookups hit data."""
+    with engine.connect() as c:
+        users = c.execute(text(
+            "SELECT User_ID, Email FROM User ORDER BY RAND() LIMIT :n"), {"n": n}).fetchall()
+        plans = [r[0] for r in c.execute(text(
+            "SELECT MealPlan_ID FROM Meal_Plan ORDER BY RAND() LIMIT :n"), {"n": n})]
+        recipes = [r[0] for r in c.execute(text(
+            "SELECT Recipe_ID FROM Recipe ORDER BY RAND() LIMIT :n"), {"n": n})]
+
+    if not users:
+        raise SystemExit("❌ No users found. Run generate_data.py first.")
+
+    params = []
+    for i in range(n):
+        uid, email = users[i % len(users)]
+        params.append({
+            "u": uid, "email": email,
+            "mp": plans[i % len(plans)] if plans else 0,
+            "rid": recipes[i % len(recipes)] if recipes else 0,
+        })
+    rng.shuffle(params)
+    return params
+
+
+def table_sizes():
+    with engine.connect() as c:
+        return {t: int(c.execute(text(f"SELECT COUNT(*) FROM `{t}`")).scalar()) for t in TABLES}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def time_query(sql, params_list, warmup):
+    """Run sql once per params set; returns latencies (s) and rows of the timed runs."""
+    stmt = text(sql)
+    for p in params_list[:warmup]:
+        pd.read_sql(stmt, engine, params=p)
+
+    latencies, rows = [], []
+    for p in params_list[warmup:]:
+        start = time.perf_counter()
+        df = pd.read_sql(stmt, engine, params=p)
+        latencies.append(time.perf_counter() - start)
+        rows.append(len(df))
+    return latencies, rows
+
+
+def summarize(latencies, rows):
+    ms = np.array(latencies) * 1000
+    return {
+        "runs": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "avg_rows": round(float(np.mean(rows)), 1),
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print per-query p50/p95 change vs a previous run; returns regressed query names."""
+    regressed = []
+    print(f"\n📊 Compared with {baseline.get('revision') or 'baseline'} (threshold {threshold:.0%}):")
+    for name, res in current["queries"].items():
+        old = baseline["queries"].get(name)
+        if not old:
+            print(f"  • {name}: new")
+            continue
+        change = (res["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+        flag = "⚠" if change > threshold else "✔"
+        print(f"  {flag} {name}: p95 {old['p95_ms']:.2f} → {res['p95_ms']:.2f} ms ({change:+.0%})")
+        if change > threshold:
+            regressed.append(name)
+    return regressed
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portal queries")
+    parser.add_argument("--runs", type=int, default=30, help="timed runs per query")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs="*", help="query names to run")
+    parser.add_argument("--skip-full-scans", action="store_true")
+    parser.add_argument("--output", default=f"bench_{date.today().isoformat()}.json")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="p95 slowdown that counts as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    params = sample_params(rng, args.runs + args.warmup)
+
+    names = args.only or list(QUERIES)
+    if args.skip_full_scans:
+        names = [n for n in names if n not in FULL_SCANS]
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "table_sizes": table_sizes(),
+        "queries": {},
+    }
+    with engine.connect() as c:
+        results["mysql_version"] = c.execute(text("SELECT VERSION()")).scalar()
+
+    print(f"⏱ Benchmarking {len(names)} queries, {args.runs} runs each...\n")
+    for name in names:
+        section, sql = QUERIES[name]
+        latencies, rows = time_query(sql, params, args.warmup)
+        res = summarize(latencies, rows)
+        res["section"] = section
+        results["queries"][name] = res
+        print(f"  {name:<22} p50 {res['p50_ms']:>9.2f} ms   p95 {res['p95_ms']:>9.2f} ms   "
+              f"rows {res['avg_rows']:>10,.0f}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# change_log.py
+"""
+Cursor over Search_Index_Changes, shared by search.py and recommend.py.
+
+Change_IDs are handed out when a row is inserted, not when its
+transaction commits, so a change with a lower ID can become visible
+after a higher one was read. A cursor therefore only moves its
+watermark up to the first gap in the IDs it has read, and remembers the
+rows above the gap so each is applied once. A gap is given up on (a
+rolled-back insert) once the row after it is older than GAP_SECONDS,
+which must be longer than any write transaction.
+
+    changes = Cursor.start(conn)                # when an index is built
+    if changes.pruned(conn): rebuild
+    recipe_ids, after = changes.read(conn)
+    ... apply recipe_ids ...
+    changes = after                             # only once they are applied
+"""
+import os
+from sqlalchemy import text
+
+GAP_SECONDS = int(os.environ.get("CHANGE_LOG_GAP_SECONDS", 60))
+
+_START = text("""
+    SELECT IFNULL(MAX(CASE WHEN Changed_At < NOW() - INTERVAL :g SECOND THEN Change_ID END),
+                  IFNULL(MIN(Change_ID) - 1, 0))
+    FROM Search_Index_Changes
+""")
+
+_READ = text("""
+    SELECT Change_ID, Recipe_ID, Changed_At < NOW() - INTERVAL :g SECOND AS Settled
+    FROM Search_Index_Changes
+    WHERE Change_ID > :w
+    ORDER BY Change_ID
+""")
+
+
+class Cursor:
+    """Watermark (every change up to it is applied) + Change_IDs above it already applied."""
+
+    def __init__(self, watermark=0, seen=frozenset()):
+        self.watermark = watermark
+        self.seen = seen
+
+    @classmethod
+    def start(cls, conn):
+        """
+        Cursor for an index built from the tables now: past the settled
+        changes only, so recent ones (possibly not committed yet) are
+        replayed by the next read(). Replaying is idempotent.
+        """
+        return cls(int(conn.execute(_START, {"g": GAP_SECONDS}).scalar()))
+
+    def pruned(self, conn):
+        """True if changes after the watermark were deleted (search.py prunes on rebuild)."""
+        first = conn.execute(text("SELECT MIN(Change_ID) FROM Search_Index_Changes")).scalar()
+        return first is not None and first > self.watermark + 1
+
+    def read(self, conn):
+        """([Recipe_ID] changed and not applied yet, cursor to keep once they are applied)."""
+        rows = conn.execute(_READ, {"w": self.watermark, "g": GAP_SECONDS}).fetchall()
+        changed, watermark = {}, self.watermark
+        for change_id, recipe_id, settled in rows:
+            if change_id not in self.seen:
+                changed[recipe_id] = None
+            # Next without a gap, or settled: everything below it has committed or never will
+            if change_id == watermark + 1 or settled:
+                watermark = change_id
+        seen = frozenset(r[0] for r in rows if r[0] > watermark)
+        return list(changed), Cursor(watermark, seen)
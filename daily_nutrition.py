@@ -0,0 +1,179 @@
+# daily_nutrition.py
+"""
+Per-user daily nutrition rollups (User_Daily_Nutrition).
+
+Diet log triggers keep each day current. When recipe nutrition changes,
+the recipe is queued in Daily_Nutrition_Stale and the days that use it
+are refreshed here in batch:
+
+    python daily_nutrition.py              # refresh days of stale recipes
+    python daily_nutrition.py --rebuild    # recompute every day
+    python daily_nutrition.py --verify-only
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from shared import engine, fetch, invalidate
+from nutrition import NUTRIENTS
+
+# Stale recipes handled per transaction
+CHUNK = 500
+
+# Rollup values are kept unrounded (DECIMAL(14,4)); compare at display precision
+TOLERANCE = 0.01
+
+ROLLUP_COLUMNS = ["Entries", "Finished_Entries"] + NUTRIENTS + ["Finished_Calories"]
+
+# Same aggregate as RefreshUserDailyNutrition / RebuildUserDailyNutrition
+_DAY_TOTALS = f"""
+    SELECT
+      l.User_ID, l.Date, COUNT(*) AS Entries, SUM(l.is_finished) AS Finished_Entries,
+      {', '.join(f'IFNULL(SUM(l.Portion_Size * s.{c}), 0) AS {c}' for c in NUTRIENTS)},
+      IFNULL(SUM(IF(l.is_finished, l.Portion_Size * s.Calories, 0)), 0) AS Finished_Calories
+    FROM User_Diet_Log l
+    LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = l.Recipe_ID
+"""
+
+
+# -----------------------------
+# READ (portal)
+# -----------------------------
+def daily_totals(user_id, start, end):
+    """Rollup rows for one user between two dates (inclusive); one row per logged day."""
+    return fetch(f"""
+        SELECT Date, {', '.join(ROLLUP_COLUMNS)}
+        FROM User_Daily_Nutrition
+        WHERE User_ID = :u AND Date BETWEEN :start AND :end
+        ORDER BY Date
+    """, {"u": user_id, "start": start, "end": end})
+
+
+def weekly_totals(daily):
+    """Daily rollup rows -> per-week totals (weeks start on Monday) plus daily averages."""
+    if daily.empty:
+        return pd.DataFrame(columns=["Week"] + ROLLUP_COLUMNS + ["Days_Logged", "Avg_Calories"])
+
+    df = daily.copy()
+    df["Date"] = pd.to_datetime(df["Date"])
+    df[ROLLUP_COLUMNS] = df[ROLLUP_COLUMNS].astype(float)
+    df["Week"] = df["Date"].dt.to_period("W-SUN").dt.start_time.dt.date
+
+    weekly = df.groupby("Week")[ROLLUP_COLUMNS].sum()
+    weekly["Days_Logged"] = df.groupby("Week")["Date"].nunique()
+    weekly["Avg_Calories"] = weekly["Calories"] / weekly["Days_Logged"]
+    return weekly.reset_index()
+
+
+# -----------------------------
+# BATCH REFRESH
+# -----------------------------
+def refresh_stale(chunk=CHUNK):
+    """
+    Recompute the rollup days that contain stale recipes, then clear them
+    from the queue. Recipes marked again while a chunk runs stay queued.
+    Returns the number of recipes refreshed.
+    """
+    recipes = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT Recipe_ID, Marked_At FROM Daily_Nutrition_Stale ORDER BY Recipe_ID LIMIT :n"
+            ), {"n": chunk}).fetchall()
+            if not rows:
+                break
+            ids = [r[0] for r in rows]
+            marked = max(r[1] for r in rows)
+
+            # Days are recomputed from all of their entries, so entries of
+            # other recipes on the same day are correct as well
+            stmt = text(f"""
+                REPLACE INTO User_Daily_Nutrition
+                  (User_ID, Date, {', '.join(ROLLUP_COLUMNS)})
+                {_DAY_TOTALS}
+                JOIN (
+                    SELECT DISTINCT User_ID, Date FROM User_Diet_Log
+                    WHERE Recipe_ID IN :ids AND User_ID IS NOT NULL
+                ) d ON d.User_ID = l.User_ID AND d.Date = l.Date
+                GROUP BY l.User_ID, l.Date
+            """).bindparams(bindparam("ids", expanding=True))
+            conn.execute(stmt, {"ids": ids})
+
+            conn.execute(text(
+                "DELETE FROM Daily_Nutrition_Stale WHERE Recipe_ID IN :ids AND Marked_At <= :m"
+            ).bindparams(bindparam("ids", expanding=True)), {"ids": ids, "m": marked})
+            recipes += len(ids)
+
+    if recipes:
+        invalidate(["User_Daily_Nutrition"])
+    return recipes
+
+
+def stale_count():
+    with engine.connect() as conn:
+        return int(conn.execute(text("SELECT COUNT(*) FROM Daily_Nutrition_Stale")).scalar())
+
+
+def rebuild_all():
+    """Recompute every rollup row in one transaction."""
+    with engine.begin() as conn:
+        conn.execute(text("CALL RebuildUserDailyNutrition()"))
+    invalidate(["User_Daily_Nutrition"])
+
+
+# -----------------------------
+# VERIFY
+# -----------------------------
+def verify_rollup(user_ids=None):
+    """
+    Compare the rollup against a recomputation from User_Diet_Log.
+    Returns a DataFrame of drifted (User_ID, Date) rows.
+    """
+    where, params = "WHERE l.User_ID IS NOT NULL", {}
+    rollup_where = ""
+    if user_ids:
+        where += " AND l.User_ID IN :ids"
+        rollup_where = "WHERE User_ID IN :ids"
+        params["ids"] = list(user_ids)
+
+    def read(sql):
+        stmt = text(sql)
+        if user_ids:
+            stmt = stmt.bindparams(bindparam("ids", expanding=True))
+        return pd.read_sql(stmt, engine, params=params)
+
+    expected = read(f"{_DAY_TOTALS} {where} GROUP BY l.User_ID, l.Date")
+    stored = read(f"SELECT User_ID, Date, {', '.join(ROLLUP_COLUMNS)} FROM User_Daily_Nutrition {rollup_where}")
+
+    merged = expected.merge(stored, on=["User_ID", "Date"], how="outer",
+                            suffixes=("_expected", "_stored"), indicator=True)
+    drift = merged["_merge"] != "both"
+    for col in ROLLUP_COLUMNS:
+        diff = (merged[f"{col}_expected"].astype(float) - merged[f"{col}_stored"].astype(float)).abs()
+        drift |= diff.fillna(np.inf) > TOLERANCE
+    return merged[drift]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh / rebuild User_Daily_Nutrition")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every day")
+    parser.add_argument("--verify-only", action="store_true", help="report drift and exit")
+    args = parser.parse_args()
+
+    if args.verify_only:
+        drifted = verify_rollup()
+        if drifted.empty:
+            print("✔ Daily rollup matches recomputation.")
+        else:
+            print(f"⚠ {len(drifted)} day(s) drifted:")
+            print(drifted.drop(columns=["_merge"]).head(50).to_string(index=False))
+        raise SystemExit(0 if drifted.empty else 1)
+
+    if args.rebuild:
+        print("🔧 Rebuilding User_Daily_Nutrition...")
+        rebuild_all()
+        print("✅ Rebuild complete.")
+    else:
+        print(f"🔄 {stale_count():,} stale recipe(s) queued...")
+        recipes = refresh_stale()
+        print(f"✅ Refreshed the diet log days of {recipes:,} recipe(s).")
@@ -0,0 +1,310 @@
+import configparser
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import quote_plus
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+# -------- DEFAULT CONFIG --------
+# Values from the config file override these, and NUTRITION_DB_* environment
+# variables override both.
+DEFAULTS = {
+    "user": "root",
+    "password": "oppoa12@bharath",
+    "host": "localhost",
+    "port": "3306",
+    "name": "NutritionDB",
+    "pool_size": "5",
+    "max_overflow": "10",
+    "pool_recycle": "1800",
+    "pool_timeout": "30",
+    "pool_pre_ping": "true",
+    "isolation_level": "",
+    # Read replicas (see load_replica_configs) and routing
+    "replicas": "",
+    "max_replica_lag": "5",
+    "replica_check_interval": "5",
+    "replica_connect_timeout": "2",
+    "sticky_seconds": "5",
+}
+
+CONFIG_FILE = os.environ.get(
+    "NUTRITION_DB_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "db_config.ini")
+)
+
+
+def load_db_config(path=CONFIG_FILE, section="database"):
+    """Merge defaults, the [database] section of the config file and env vars."""
+    config = dict(DEFAULTS)
+
+    parser = configparser.ConfigParser()
+    if path and parser.read(path) and parser.has_section(section):
+        config.update({k: v for k, v in parser.items(section) if k in DEFAULTS})
+
+    for key in DEFAULTS:
+        env = os.environ.get(f"NUTRITION_DB_{key.upper()}")
+        if env is not None:
+            config[key] = env
+
+    return config
+
+
+def database_url(config):
+    return (
+        f"mysql+pymysql://{config['user']}:{quote_plus(config['password'])}"
+        f"@{config['host']}:{config['port']}/{config['name']}"
+    )
+
+
+# -------- POOL TELEMETRY --------
+class PoolTelemetry:
+    """Checkout wait times, connections in use and overflow/timeout counts."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.overflow_events = 0
+        self.connects = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_in_use = 0
+        self.recent_waits = deque(maxlen=window)
+
+    def record_checkout(self, wait, in_use, overflowed):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            self.recent_waits.append(wait)
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            waits = sorted(self.recent_waits)
+            p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "overflow_events": self.overflow_events,
+                "new_connections": self.connects,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "p95_wait_ms": round(p95 * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "peak_in_use": self.peak_in_use,
+            }
+        if pool is not None:
+            stats.update({
+                "pool_size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout; `telemetry` is set per engine."""
+
+    telemetry = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.telemetry.record_timeout()
+            raise
+        self.telemetry.record_checkout(
+            time.perf_counter() - start, self.checkedout(), self.overflow() > 0
+        )
+        return conn
+
+    def _create_connection(self):
+        self.telemetry.record_connect()
+        return super()._create_connection()
+
+
+# -------- ENGINE FACTORY --------
+def make_engine(config=None, **overrides):
+    """
+    Build the SQLAlchemy engine used by the app and the maintenance scripts.
+    Extra keyword arguments are passed straight to create_engine().
+    """
+    config = config or load_db_config()
+
+    # A subclass per engine so pool.recreate() (e.g. on dispose) keeps its telemetry
+    pool_class = type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"telemetry": PoolTelemetry()})
+
+    kwargs = {
+        "poolclass": pool_class,
+        "pool_size": int(config["pool_size"]),
+        "max_overflow": int(config["max_overflow"]),
+        "pool_recycle": int(config["pool_recycle"]),
+        "pool_timeout": float(config["pool_timeout"]),
+        "pool_pre_ping": str(config["pool_pre_ping"]).lower() in ("1", "true", "yes"),
+    }
+    if config["isolation_level"]:
+        kwargs["isolation_level"] = config["isolation_level"]
+    kwargs.update(overrides)
+
+    return create_engine(database_url(config), **kwargs)
+
+
+def pool_stats(engine):
+    """Current pool telemetry for an engine built by make_engine()."""
+    telemetry = getattr(engine.pool, "telemetry", None)
+    if telemetry is None:
+        return {"status": engine.pool.status()}
+    return telemetry.snapshot(engine.pool)
+
+
+# -------- READ REPLICAS --------
+def load_replica_configs(path=CONFIG_FILE):
+    """
+    [(name, config)] for every read replica: one per [replica*] section of
+    the config file (its keys override the primary's, so usually only
+    host/port), plus one per host[:port] in the `replicas` setting, which
+    share the primary's credentials.
+    """
+    primary = load_db_config(path)
+    configs = []
+
+    parser = configparser.ConfigParser()
+    if path and parser.read(path):
+        for section in parser.sections():
+            if section.lower().startswith("replica"):
+                config = dict(primary)
+                config.update({k: v for k, v in parser.items(section) if k in DEFAULTS})
+                configs.append((section, config))
+
+    for hostport in filter(None, (h.strip() for h in primary["replicas"].split(","))):
+        host, _, port = hostport.partition(":")
+        configs.append((hostport, dict(primary, host=host, port=port or primary["port"])))
+    return configs
+
+
+class ReplicaSet:
+    """
+    Read replicas with background health checks. Every `interval` seconds
+    each replica is pinged and its replication lag read; pick() returns the
+    healthy replica with the fewest connections in use, or None.
+    """
+
+    def __init__(self, configs, max_lag=5.0, interval=5.0, connect_timeout=2):
+        self.max_lag = max_lag
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._turn = 0
+        self.replicas = [
+            {"name": name, "host": f"{c['host']}:{c['port']}",
+             "engine": make_engine(c, connect_args={"connect_timeout": connect_timeout}),
+             "healthy": False, "lag": None, "error": "not checked yet", "checked_at": None}
+            for name, c in configs
+        ]
+
+    @classmethod
+    def from_config(cls, path=CONFIG_FILE):
+        config = load_db_config(path)
+        return cls(load_replica_configs(path), float(config["max_replica_lag"]),
+                   float(config["replica_check_interval"]), int(config["replica_connect_timeout"]))
+
+    # -------- health --------
+    @staticmethod
+    def _lag(conn):
+        """
+        Seconds behind the source; 0.0 for a server that is not replicating
+        (e.g. a second local instance) and None if replication is stopped.
+        """
+        for stmt in ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS"):   # MySQL >= 8.0.22 / older
+            try:
+                row = conn.exec_driver_sql(stmt).mappings().fetchone()
+            except exc.DBAPIError:
+                continue
+            if row is None:
+                return 0.0
+            lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+            return None if lag is None else float(lag)
+        # No REPLICATION CLIENT privilege: rely on the ping
+        return 0.0
+
+    def check(self, replica):
+        try:
+            with replica["engine"].connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+                lag = self._lag(conn)
+            if lag is None:
+                error = "replication stopped"
+            elif lag > self.max_lag:
+                error = f"lag {lag:.0f}s > {self.max_lag:.0f}s"
+            else:
+                error = None
+        except exc.DBAPIError as e:
+            lag, error = None, str(e.orig or e).splitlines()[0]
+        except Exception as e:
+            # e.g. pool TimeoutError or a socket error outside the driver
+            lag, error = None, f"{type(e).__name__}: {e}".splitlines()[0]
+
+        with self._lock:
+            replica.update(healthy=error is None, lag=lag, error=error, checked_at=time.time())
+
+    def _run(self):
+        while True:
+            for replica in self.replicas:
+                try:
+                    self.check(replica)
+                except Exception as e:
+                    # Never let one replica stop the checks; a replica we cannot check is down
+                    self.mark_down(replica["engine"], f"{type(e).__name__}: {e}")
+            time.sleep(self.interval)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+                self._thread.start()
+
+    def mark_down(self, engine, error):
+        """Take a replica out of rotation until its next successful check."""
+        with self._lock:
+            for replica in self.replicas:
+                if replica["engine"] is engine:
+                    replica.update(healthy=False, error=str(error).splitlines()[0])
+
+    # -------- routing --------
+    def pick(self):
+        if not self.replicas:
+            return None
+        self._start()
+        with self._lock:
+            healthy = [r for r in self.replicas if r["healthy"]]
+            if not healthy:
+                return None
+            least = min(r["engine"].pool.checkedout() for r in healthy)
+            candidates = [r for r in healthy if r["engine"].pool.checkedout() == least]
+            self._turn += 1
+            return candidates[self._turn % len(candidates)]["engine"]
+
+    def status(self):
+        with self._lock:
+            return [
+                {"name": r["name"], "host": r["host"], "healthy": r["healthy"], "lag_s": r["lag"],
+                 "error": r["error"], "in_use": r["engine"].pool.checkedout(),
+                 "checked_at": time.strftime("%H:%M:%S", time.localtime(r["checked_at"]))
+                               if r["checked_at"] else None}
+                for r in self.replicas
+            ]
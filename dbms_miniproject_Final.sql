@@ -5,6 +5,7 @@ USE NutritionDB;
 -- =========================================================
 -- DROP TABLES IN CORRECT ORDER
 -- =========================================================
+DROP TABLE IF EXISTS Recipe_Nutrition_Summary;
 DROP TABLE IF EXISTS MealPlan_Recipes;
 DROP TABLE IF EXISTS MealPlan_Recipe;
 DROP TABLE IF EXISTS Feedback;
@@ -216,6 +217,73 @@ CREATE TABLE User_Weight_History (
     ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB;
 
+-- =========================================================
+-- RECIPE NUTRITION SUMMARY (materialized, maintained by triggers)
+-- =========================================================
+CREATE TABLE Recipe_Nutrition_Summary (
+  Recipe_ID INT PRIMARY KEY,
+  Calories DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Carbohydrates_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Protein_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Fat_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Fiber_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (Recipe_ID) REFERENCES Recipe(Recipe_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- RECIPE NUTRITION SUMMARY HELPERS
+-- =========================================================
+DELIMITER //
+CREATE PROCEDURE ApplyRecipeNutritionDelta(
+  IN p_recipeId INT,
+  IN p_ingredientId INT,
+  IN p_quantity DECIMAL(9,3)
+)
+BEGIN
+  INSERT INTO Recipe_Nutrition_Summary
+    (Recipe_ID, Calories, Carbohydrates_g, Protein_g, Fat_g, Fiber_g)
+  SELECT
+    p_recipeId,
+    p_quantity * IFNULL(n.Calories, 0) / 100,
+    p_quantity * IFNULL(n.Carbohydrates_g, 0) / 100,
+    p_quantity * IFNULL(n.Protein_g, 0) / 100,
+    p_quantity * IFNULL(n.Fat_g, 0) / 100,
+    p_quantity * IFNULL(n.Fiber_g, 0) / 100
+  FROM Nutrition n
+  WHERE n.Ingredient_ID = p_ingredientId
+  ON DUPLICATE KEY UPDATE
+    Calories        = Recipe_Nutrition_Summary.Calories        + VALUES(Calories),
+    Carbohydrates_g = Recipe_Nutrition_Summary.Carbohydrates_g + VALUES(Carbohydrates_g),
+    Protein_g       = Recipe_Nutrition_Summary.Protein_g       + VALUES(Protein_g),
+    Fat_g           = Recipe_Nutrition_Summary.Fat_g           + VALUES(Fat_g),
+    Fiber_g         = Recipe_Nutrition_Summary.Fiber_g         + VALUES(Fiber_g);
+END;
+//
+
+CREATE PROCEDURE RebuildRecipeNutritionSummary()
+BEGIN
+  DELETE FROM Recipe_Nutrition_Summary;
+
+  INSERT INTO Recipe_Nutrition_Summary
+    (Recipe_ID, Calories, Carbohydrates_g, Protein_g, Fat_g, Fiber_g)
+  SELECT
+    r.Recipe_ID,
+    IFNULL(SUM(ri.Quantity * n.Calories / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Carbohydrates_g / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Protein_g / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Fat_g / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Fiber_g / 100), 0)
+  FROM Recipe r
+  LEFT JOIN Recipe_Ingredient ri ON ri.Recipe_ID = r.Recipe_ID
+  LEFT JOIN Nutrition n ON n.Ingredient_ID = ri.Ingredient_ID
+  GROUP BY r.Recipe_ID;
+END;
+//
+DELIMITER ;
+
 -- =========================================================
 -- TRIGGERS
 -- =========================================================
@@ -238,6 +306,98 @@ BEGIN
   END IF;
 END;
 //
+
+-- ---------------------------------------------------------
+-- Recipe_Nutrition_Summary maintenance
+-- (cascaded FK deletes do not fire triggers; the summary row
+--  itself cascades away with its Recipe)
+-- ---------------------------------------------------------
+CREATE TRIGGER trg_recipe_summary_insert
+AFTER INSERT ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT IGNORE INTO Recipe_Nutrition_Summary (Recipe_ID) VALUES (NEW.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_ri_summary_insert
+AFTER INSERT ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  CALL ApplyRecipeNutritionDelta(NEW.Recipe_ID, NEW.Ingredient_ID, NEW.Quantity);
+END;
+//
+
+CREATE TRIGGER trg_ri_summary_update
+AFTER UPDATE ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  CALL ApplyRecipeNutritionDelta(OLD.Recipe_ID, OLD.Ingredient_ID, -OLD.Quantity);
+  CALL ApplyRecipeNutritionDelta(NEW.Recipe_ID, NEW.Ingredient_ID, NEW.Quantity);
+END;
+//
+
+CREATE TRIGGER trg_ri_summary_delete
+AFTER DELETE ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  CALL ApplyRecipeNutritionDelta(OLD.Recipe_ID, OLD.Ingredient_ID, -OLD.Quantity);
+END;
+//
+
+CREATE TRIGGER trg_nutrition_summary_insert
+AFTER INSERT ON Nutrition
+FOR EACH ROW
+BEGIN
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        + ri.Quantity * IFNULL(NEW.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g + ri.Quantity * IFNULL(NEW.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       + ri.Quantity * IFNULL(NEW.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           + ri.Quantity * IFNULL(NEW.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         + ri.Quantity * IFNULL(NEW.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = NEW.Ingredient_ID;
+END;
+//
+
+CREATE TRIGGER trg_nutrition_summary_update
+AFTER UPDATE ON Nutrition
+FOR EACH ROW
+BEGIN
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        - ri.Quantity * IFNULL(OLD.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g - ri.Quantity * IFNULL(OLD.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       - ri.Quantity * IFNULL(OLD.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           - ri.Quantity * IFNULL(OLD.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         - ri.Quantity * IFNULL(OLD.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = OLD.Ingredient_ID;
+
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        + ri.Quantity * IFNULL(NEW.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g + ri.Quantity * IFNULL(NEW.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       + ri.Quantity * IFNULL(NEW.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           + ri.Quantity * IFNULL(NEW.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         + ri.Quantity * IFNULL(NEW.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = NEW.Ingredient_ID;
+END;
+//
+
+CREATE TRIGGER trg_nutrition_summary_delete
+AFTER DELETE ON Nutrition
+FOR EACH ROW
+BEGIN
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        - ri.Quantity * IFNULL(OLD.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g - ri.Quantity * IFNULL(OLD.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       - ri.Quantity * IFNULL(OLD.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           - ri.Quantity * IFNULL(OLD.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         - ri.Quantity * IFNULL(OLD.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = OLD.Ingredient_ID;
+END;
+//
 DELIMITER ;
 
 -- =========================================================
@@ -281,10 +441,11 @@ BEGIN
     mpr.Day_Of_Week,
     mpr.Meal_Type,
     r.Recipe_Name,
-    GetRecipeCalories(r.Recipe_ID) AS Calories
+    ROUND(IFNULL(s.Calories, 0), 2) AS Calories
   FROM Meal_Plan mp
   JOIN MealPlan_Recipes mpr ON mp.MealPlan_ID = mpr.MealPlan_ID
   JOIN Recipe r ON r.Recipe_ID = mpr.Recipe_ID
+  LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
   WHERE mp.User_ID = userId
   ORDER BY mpr.Day_Of_Week, mpr.Meal_Type;
 END;
@@ -0,0 +1,131 @@
+from sqlalchemy import bindparam, text
+from shared import engine, invalidate
+from pagination import TABLES as PAGEABLE, filter_clause
+from daily_nutrition import refresh_stale
+
+# IDs per IN (...) list; all chunks still run in one transaction
+CHUNK = 1_000
+
+# Most IDs one typed ID list may select ("1-999999999" would build the whole range)
+MAX_LISTED_IDS = 100_000
+
+# What the foreign keys already handle (ON DELETE CASCADE / SET NULL):
+#   User   -> User_Diet_Log, Meal_Plan (-> MealPlan_Recipes), Feedback,
+#             User_Weight_History cascade; Recipe.Creator_User_ID set null
+#   Recipe -> Recipe_Ingredient, Feedback, Recipe_Nutrition_Summary,
+#             Recipe_Rating_Summary cascade;
+#             User_Diet_Log.Recipe_ID set null
+#   Ingredient -> Nutrition cascade
+# Everything else below is RESTRICT, has no FK, or is removed on purpose.
+
+
+def _chunks(ids):
+    ids = sorted({int(i) for i in ids})
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+def _exec_in(conn, sql, ids):
+    """Run `sql` (with an :ids IN-list) for every chunk; returns total rowcount."""
+    stmt = text(sql).bindparams(bindparam("ids", expanding=True))
+    return sum(conn.execute(stmt, {"ids": chunk}).rowcount for chunk in _chunks(ids))
+
+
+# -------- RECIPES --------
+def _delete_recipes(conn, recipe_ids):
+    # MealPlan_Recipes is ON DELETE RESTRICT; diet logs would only be set
+    # NULL, but the portal removes them together with the recipe
+    _exec_in(conn, "DELETE FROM MealPlan_Recipes WHERE Recipe_ID IN :ids", recipe_ids)
+    _exec_in(conn, "DELETE FROM User_Diet_Log WHERE Recipe_ID IN :ids", recipe_ids)
+    _exec_in(conn, "DELETE FROM Recipe_Log WHERE Recipe_ID IN :ids", recipe_ids)
+    return _exec_in(conn, "DELETE FROM Recipe WHERE Recipe_ID IN :ids", recipe_ids)
+
+
+def delete_recipes(recipe_ids):
+    """Delete recipes and everything that references them in one transaction."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return 0
+    with engine.begin() as conn:
+        n = _delete_recipes(conn, recipe_ids)
+    invalidate(["Recipe", "MealPlan_Recipes", "User_Diet_Log"])
+    return n
+
+
+# -------- USERS --------
+def delete_users(user_ids):
+    """Delete users, their recipes and all linked rows in one transaction."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    with engine.begin() as conn:
+        # Recipes the users created go too (FK alone would only null the creator)
+        stmt = text("SELECT Recipe_ID FROM Recipe WHERE Creator_User_ID IN :ids").bindparams(
+            bindparam("ids", expanding=True))
+        recipe_ids = [r[0] for chunk in _chunks(user_ids) for r in conn.execute(stmt, {"ids": chunk})]
+        if recipe_ids:
+            _delete_recipes(conn, recipe_ids)
+
+        # Would cascade, but cascades skip the rating triggers on Feedback
+        _exec_in(conn, "DELETE FROM Feedback WHERE User_ID IN :ids", user_ids)
+        _exec_in(conn, "DELETE FROM Recipe_Log WHERE Created_By IN :ids", user_ids)
+        n = _exec_in(conn, "DELETE FROM User WHERE User_ID IN :ids", user_ids)
+    invalidate(["User", "Recipe", "Recipe_Log", "MealPlan_Recipes", "Feedback"])
+    return n
+
+
+# -------- INGREDIENTS --------
+def delete_ingredients(ingredient_ids):
+    """Delete ingredients, their recipe links and nutrition rows in one transaction."""
+    ingredient_ids = list(ingredient_ids)
+    if not ingredient_ids:
+        return 0
+    with engine.begin() as conn:
+        # Recipe_Ingredient is ON DELETE RESTRICT; deleting it explicitly
+        # also fires the summary triggers for the affected recipes
+        _exec_in(conn, "DELETE FROM Recipe_Ingredient WHERE Ingredient_ID IN :ids", ingredient_ids)
+        n = _exec_in(conn, "DELETE FROM Ingredient WHERE Ingredient_ID IN :ids", ingredient_ids)
+    invalidate(["Ingredient"])
+    refresh_stale()
+    return n
+
+
+# -------- SELECTION BY FILTER --------
+def ids_matching(table, filters):
+    """
+    Primary keys of `table` rows matching whitelisted filters, using the
+    same column rules as the paginated admin views.
+    """
+    spec = PAGEABLE[table]
+    where, params = filter_clause(table, filters)
+    if not where:
+        raise ValueError("A filter is required for bulk selection")
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(f"SELECT `{spec['pk']}` FROM `{table}` WHERE {' AND '.join(where)}"), params
+        )
+        return [r[0] for r in rows]
+
+
+def parse_id_list(raw, limit=MAX_LISTED_IDS):
+    """'1, 4, 10-20' -> sorted unique ints. Raises ValueError past `limit` IDs."""
+    ids = set()
+    for part in raw.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = (int(x) for x in part.split("-", 1))
+            # Checked before the range is built, so a huge one costs nothing
+            if hi - lo + 1 > limit:
+                raise ValueError(f"ID list selects more than {limit:,} IDs")
+            ids.update(range(lo, hi + 1))
+        else:
+            ids.add(int(part))
+        if len(ids) > limit:
+            raise ValueError(f"ID list selects more than {limit:,} IDs")
+    return sorted(ids)
+
+
+DELETERS = {"User": delete_users, "Recipe": delete_recipes, "Ingredient": delete_ingredients}
@@ -0,0 +1,502 @@
+# diet_ingest.py
+"""
+Write-behind ingestion for User_Diet_Log.
+
+Entries are validated and put on a bounded in-memory queue; a background
+flusher writes them in multi-row INSERTs once BATCH_SIZE entries are
+waiting or FLUSH_SECONDS have passed since the first one.
+
+- Back-pressure: when the queue is full, submit() waits up to
+  PUT_TIMEOUT seconds for room and then raises QueueFull.
+- Failures: a batch the database refuses (e.g. a deleted recipe) is
+  retried row by row and the bad rows are rejected; a batch that cannot
+  be written at all (database down) is retried MAX_RETRIES times, then
+  appended to SPILL_FILE.
+- Any other failure spills the batch too; the flusher keeps running
+  (stats()["flusher_alive"] says whether it is).
+- Shutdown: close() (registered with atexit) drains the queue; whatever
+  cannot be written is spilled. The next writer to start replays the
+  spill file before taking new entries, saving its offset after each
+  batch, so a crash mid-replay repeats at most the batch in flight.
+  Entries still queued when the process is killed are lost.
+- wait(seq) says what became of one entry: written, rejected or spilled.
+
+    python diet_ingest.py entries.jsonl          # bulk load CSV / JSONL
+    python diet_ingest.py entries.csv --batch-size 2000
+
+Columns (case-insensitive): User_ID, Recipe_ID, and optionally Date
+(default today), Time, Portion_Size (default 1), Notes, is_finished.
+"""
+import argparse
+import atexit
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from datetime import date, datetime
+from sqlalchemy import exc, text
+from shared import engine, invalidate
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+BATCH_SIZE = int(os.environ.get("DIET_INGEST_BATCH_SIZE", 500))
+FLUSH_SECONDS = float(os.environ.get("DIET_INGEST_FLUSH_SECONDS", 0.5))
+MAX_QUEUE = int(os.environ.get("DIET_INGEST_MAX_QUEUE", 50_000))
+
+# Seconds submit() waits for room in a full queue
+PUT_TIMEOUT = 2.0
+
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Entries whose failure (rejected / spilled) wait() can still report
+OUTCOMES_KEPT = 10_000
+
+# Errors worth retrying: the server or the pool, not the rows
+RETRYABLE = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError)
+
+SPILL_FILE = os.environ.get(
+    "DIET_INGEST_SPILL_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "diet_log.spill.jsonl"),
+)
+
+COLUMNS = ["User_ID", "Recipe_ID", "Date", "Time", "Portion_Size", "Notes", "is_finished"]
+
+_INSERT = text(f"""
+    INSERT INTO User_Diet_Log ({', '.join(COLUMNS)})
+    VALUES ({', '.join(':' + c for c in COLUMNS)})
+""")
+
+
+class QueueFull(RuntimeError):
+    """The ingest queue stayed full for PUT_TIMEOUT seconds."""
+
+
+# -----------------------------
+# VALIDATION
+# -----------------------------
+def validate(raw):
+    """One entry -> (row, None) or (None, reason). Keys are case-insensitive."""
+    values = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+
+    def get(col):
+        value = values.get(col.lower())
+        return None if value is None or (isinstance(value, str) and not value.strip()) else value
+
+    row = {}
+    try:
+        if get("User_ID") is None:
+            return None, "User_ID is required"
+        row["User_ID"] = int(get("User_ID"))
+        row["Recipe_ID"] = int(get("Recipe_ID")) if get("Recipe_ID") is not None else None
+
+        d = get("Date")
+        row["Date"] = date.today() if d is None else d if isinstance(d, date) else date.fromisoformat(str(d).strip())
+
+        t = get("Time")
+        if t is None:
+            row["Time"] = datetime.now().time().replace(microsecond=0)
+        elif isinstance(t, str):
+            row["Time"] = datetime.strptime(t.strip(), "%H:%M:%S" if t.count(":") == 2 else "%H:%M").time()
+        else:
+            row["Time"] = t
+
+        p = get("Portion_Size")
+        row["Portion_Size"] = 1.0 if p is None else float(p)
+        if not 0 < row["Portion_Size"] < 1000:
+            return None, "Portion_Size must be between 0 and 1000"
+
+        n = get("Notes")
+        row["Notes"] = None if n is None else str(n)
+
+        f = get("is_finished")
+        row["is_finished"] = bool(f) if not isinstance(f, str) else f.strip().lower() in ("1", "true", "yes")
+    except (TypeError, ValueError) as e:
+        return None, f"invalid value: {e}"
+    return row, None
+
+
+def _to_json(row):
+    return json.dumps({k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in row.items()})
+
+
+# -----------------------------
+# WRITER
+# -----------------------------
+class DietLogWriter:
+    """Bounded queue + background flusher for User_Diet_Log inserts."""
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS,
+                 max_queue=MAX_QUEUE, spill_file=SPILL_FILE):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spill_file = spill_file
+        self._queue = queue.Queue(max_queue)
+        self._submit_lock = threading.Lock()
+        self._done = threading.Condition()
+        self._seq = 0           # last sequence number handed out
+        self._done_seq = 0      # every entry up to here is written, rejected or spilled
+        self._flush_now = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.started_at = None
+        self.counts = {"submitted": 0, "written": 0, "rejected": 0, "spilled": 0, "replayed": 0,
+                       "batches": 0, "backpressure_waits": 0, "refused": 0, "errors": 0, "lost": 0}
+        self.last_error = None
+        self.flush_ms = deque(maxlen=200)
+        self.rejects = deque(maxlen=100)    # (row, reason)
+        self._failed = OrderedDict()        # seq -> (outcome, reason), newest last
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is None or (not self._thread.is_alive() and not self._stop.is_set()):
+            if self._thread is None:
+                self.started_at = time.monotonic()
+                atexit.register(self.close)
+            self._thread = threading.Thread(target=self._run, name="diet-ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=30):
+        """Stop taking entries, write what is queued, spill the rest."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._flush_now.set()
+        self._thread.join(timeout)
+        # Flusher stuck on the database: keep the rest on disk
+        leftover = self._drain(len(self._queue.queue) + 1)
+        if leftover:
+            self._spill(leftover)
+            self._mark_done(leftover[-1][0])
+        self._thread = None
+
+    # ---------- producers ----------
+    def submit(self, entry, timeout=PUT_TIMEOUT):
+        """Queue one entry; returns its sequence number for wait(). Raises ValueError / QueueFull."""
+        row, reason = validate(entry)
+        if row is None:
+            raise ValueError(reason)
+        return self._put(row, timeout)
+
+    def submit_many(self, entries, timeout=PUT_TIMEOUT):
+        """Queue many entries; returns (last sequence number, [(index, reason)] rejected)."""
+        seq, rejected = self._seq, []
+        for i, entry in enumerate(entries):
+            row, reason = validate(entry)
+            if row is None:
+                rejected.append((i, reason))
+            else:
+                seq = self._put(row, timeout)
+        return seq, rejected
+
+    def _put(self, row, timeout):
+        if self._stop.is_set():
+            raise RuntimeError("Diet log writer is shut down.")
+        self.start()
+        # Sequence numbers follow queue order, so wait() can use a watermark.
+        # Producers queue up on the lock while the queue is full.
+        full = QueueFull(f"Diet log queue is full ({self._queue.maxsize:,} entries); try again shortly.")
+        if not self._submit_lock.acquire(timeout=-1 if timeout is None else timeout):
+            self.counts["refused"] += 1
+            raise full
+        try:
+            seq = self._seq + 1
+            try:
+                self._queue.put_nowait((seq, row))
+            except queue.Full:
+                self.counts["backpressure_waits"] += 1
+                self._flush_now.set()
+                try:
+                    self._queue.put((seq, row), timeout=timeout)
+                except queue.Full:
+                    self.counts["refused"] += 1
+                    raise full
+            self._seq = seq
+            self.counts["submitted"] += 1
+        finally:
+            self._submit_lock.release()
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_now.set()
+        return seq
+
+    def wait(self, seq, timeout=None, flush=False):
+        """
+        (outcome, reason) for entry `seq` once the flusher is done with it,
+        outcome being "written", "rejected", "spilled" or "lost"; None if
+        it is still queued after `timeout` seconds. flush=True writes the
+        pending batch now instead of waiting for it to fill.
+        """
+        if flush:
+            self._flush_now.set()
+        with self._done:
+            if not self._done.wait_for(lambda: self._done_seq >= seq, timeout):
+                return None
+            return self._failed.get(seq, ("written", None))
+
+    def flush(self, timeout=None):
+        """Write everything queued so far; True if it finished within `timeout`."""
+        return self.wait(self._seq, timeout, flush=True) is not None
+
+    # ---------- flusher ----------
+    def _drain(self, limit):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        try:
+            self._replay()
+        except Exception as e:
+            # Leave the .replay file for the next start
+            self._error(e)
+        while True:
+            try:
+                first = self._queue.get(timeout=0.1 if self._stop.is_set() else 1.0)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+
+            batch = [first]
+            try:
+                # Collect until the batch is full or FLUSH_SECONDS after the first entry
+                batch += self._drain(self.batch_size - 1)
+                deadline = time.monotonic() + self.flush_seconds
+                while len(batch) < self.batch_size and not self._stop.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._flush_now.is_set():
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=min(remaining, 0.05)))
+                    except queue.Empty:
+                        continue
+                    batch += self._drain(self.batch_size - len(batch))
+                self._flush_now.clear()
+                self._write(batch)
+            except Exception as e:
+                # Never let one batch stop the flusher; keep its rows on disk
+                self._error(e)
+                self._spill(batch)
+            finally:
+                self._mark_done(batch[-1][0])
+
+    def _error(self, e):
+        self.counts["errors"] += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+
+    def _fail(self, seq, outcome, reason):
+        if seq is None:     # replayed from the spill file; nobody is waiting
+            return
+        with self._done:
+            self._failed[seq] = (outcome, reason)
+            while len(self._failed) > OUTCOMES_KEPT:
+                self._failed.popitem(last=False)
+
+    def _mark_done(self, seq):
+        with self._done:
+            self._done_seq = max(self._done_seq, seq)
+            self._done.notify_all()
+
+    def _write(self, items):
+        """Write [(seq, row)]; seq is None for replayed rows."""
+        start = time.perf_counter()
+        for attempt in range(MAX_RETRIES):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(_INSERT, [row for _, row in items])
+                written = len(items)
+                break
+            except (exc.IntegrityError, exc.DataError):
+                written = self._write_rows(items)
+                break
+            except RETRYABLE:
+                if attempt == MAX_RETRIES - 1:
+                    self._spill(items)
+                    return
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+            except Exception as e:
+                # e.g. ProgrammingError: nothing was committed, keep the rows on disk
+                self._error(e)
+                self._spill(items)
+                return
+
+        self.flush_ms.append((time.perf_counter() - start) * 1000)
+        self.counts["written"] += written
+        self.counts["batches"] += 1
+        if written:
+            try:
+                invalidate(["User_Diet_Log"])
+            except Exception as e:
+                # Committed already; spilling would write the rows twice
+                self._error(e)
+
+    def _write_rows(self, items):
+        """One row per statement, so one bad row does not sink the batch."""
+        written = 0
+        for i, (seq, row) in enumerate(items):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(_INSERT, row)
+                written += 1
+            except (exc.IntegrityError, exc.DataError) as e:
+                self.counts["rejected"] += 1
+                self.rejects.append((row, str(e.orig)))
+                self._fail(seq, "rejected", str(e.orig))
+            except Exception as e:
+                # Not the row's fault: keep this and the remaining rows on disk
+                self._error(e)
+                self._spill(items[i:])
+                break
+        return written
+
+    # ---------- spill file ----------
+    def _spill(self, items):
+        try:
+            with open(self.spill_file, "a", encoding="utf-8") as f:
+                for _, row in items:
+                    f.write(_to_json(row) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            self._error(e)
+            self.counts["lost"] += len(items)
+            outcome, reason = "lost", f"{type(e).__name__}: {e}"
+        else:
+            self.counts["spilled"] += len(items)
+            outcome, reason = "spilled", "not written yet; saved to the spill file for the next start"
+        for seq, _ in items:
+            self._fail(seq, outcome, reason)
+
+    def _replay(self):
+        """Write entries spilled by an earlier shutdown (or failed flushes) before new ones."""
+        path = self.spill_file + ".replay"
+        offset_path = path + ".offset"
+        if not os.path.exists(path):
+            if not os.path.exists(self.spill_file):
+                return
+            if os.path.exists(offset_path):
+                os.remove(offset_path)      # left by a replay that finished
+            # Rename first: rows that fail again are spilled to a fresh file
+            os.replace(self.spill_file, path)
+
+        # Resume after the last batch an earlier replay got through
+        offset = 0
+        if os.path.exists(offset_path):
+            with open(offset_path, encoding="utf-8") as f:
+                offset = int(f.read().strip() or 0)
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            batch = []
+            for line in f:
+                offset += len(line)
+                try:
+                    row, _ = validate(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue    # torn last line from a crash mid-spill
+                if row is not None:
+                    batch.append((None, row))
+                if len(batch) >= self.batch_size:
+                    self._replay_batch(batch, offset_path, offset)
+                    batch = []
+            if batch:
+                self._replay_batch(batch, offset_path, offset)
+        os.remove(path)
+        if os.path.exists(offset_path):
+            os.remove(offset_path)
+
+    def _replay_batch(self, batch, offset_path, offset):
+        """Write one replayed batch, then record that the file is done up to `offset`."""
+        self._write(batch)
+        self.counts["replayed"] += len(batch)
+        tmp = offset_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, offset_path)
+
+    # ---------- telemetry ----------
+    def stats(self):
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        latencies = sorted(self.flush_ms)
+        return dict(
+            self.counts,
+            flusher_alive=self._thread is not None and self._thread.is_alive(),
+            last_error=self.last_error,
+            queued=self._queue.qsize(),
+            max_queue=self._queue.maxsize,
+            rows_per_sec=round(self.counts["written"] / elapsed, 1) if elapsed else 0.0,
+            avg_batch_rows=round(self.counts["written"] / self.counts["batches"], 1) if self.counts["batches"] else 0.0,
+            flush_ms_avg=round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            flush_ms_p95=round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else 0.0,
+            flush_ms_max=round(latencies[-1], 2) if latencies else 0.0,
+            spill_file_exists=os.path.exists(self.spill_file),
+        )
+
+
+# One writer per process, shared by all sessions
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DietLogWriter().start()
+    return _writer
+
+
+# -----------------------------
+# BULK FILE LOAD
+# -----------------------------
+def read_records(path):
+    """Yield {column: value} from a .csv or .jsonl file."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load diet log entries through the write-behind queue")
+    parser.add_argument("file", help="CSV or JSONL file of entries")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--flush-seconds", type=float, default=FLUSH_SECONDS)
+    args = parser.parse_args()
+
+    writer = DietLogWriter(args.batch_size, args.flush_seconds).start()
+    start = time.perf_counter()
+    print(f"📥 Loading diet log entries from {args.file}...\n")
+    _, rejected = writer.submit_many(read_records(args.file), timeout=None)
+    writer.close(timeout=None)
+    seconds = time.perf_counter() - start
+
+    s = writer.stats()
+    print(f"✅ Wrote {s['written']:,} entries in {seconds:.1f}s ({s['written'] / seconds:,.0f} rows/s), "
+          f"{s['batches']:,} batches of ~{s['avg_batch_rows']:,.0f}")
+    print(f"⏱ Flush latency avg {s['flush_ms_avg']} ms, p95 {s['flush_ms_p95']} ms, max {s['flush_ms_max']} ms")
+    if rejected:
+        print(f"⚠ {len(rejected):,} invalid entries skipped")
+        for i, reason in rejected[:20]:
+            print(f"  entry {i + 1}: {reason}")
+    if s["rejected"]:
+        print(f"⚠ {s['rejected']:,} entries refused by the database (unknown user / recipe?)")
+    if s["spilled"]:
+        print(f"💾 {s['spilled']:,} entries could not be written; saved to {writer.spill_file}")
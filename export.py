@@ -0,0 +1,184 @@
+import os
+import tempfile
+import pandas as pd
+from sqlalchemy import text
+from shared import fetch, read_engine
+
+# -------- CONFIG --------
+CHUNK_ROWS = 10_000
+PREVIEW_ROWS = 100
+FORMATS = {"CSV": ".csv", "JSON Lines": ".jsonl", "Parquet": ".parquet"}
+EXPORT_DIR = os.environ.get("NUTRITION_EXPORT_DIR", tempfile.gettempdir())
+
+# Streamlit buffers download data in memory; bigger files are left on disk
+MAX_DOWNLOAD_BYTES = int(os.environ.get("NUTRITION_MAX_DOWNLOAD_BYTES", 200 * 1024 * 1024))
+
+
+# -------- TABLE HELPERS --------
+def list_tables():
+    return [t[0] for t in fetch("SHOW TABLES").values.tolist()]
+
+
+def check_table(table):
+    """Only real tables may be interpolated into export SQL."""
+    if table not in list_tables():
+        raise ValueError(f"Unknown table: {table}")
+
+
+def preview(table, limit=PREVIEW_ROWS):
+    """First `limit` rows only; what the viewer shows on screen."""
+    check_table(table)
+    return fetch(f"SELECT * FROM `{table}` LIMIT {int(limit)}")
+
+
+def estimated_rows(table):
+    """InnoDB's row estimate from information_schema (no table scan)."""
+    df = fetch("""
+        SELECT TABLE_ROWS FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t
+    """, {"t": table})
+    return int(df.iloc[0, 0] or 0) if not df.empty else 0
+
+
+# -------- STREAMING READ --------
+def iter_chunks(table, chunk_rows=CHUNK_ROWS):
+    """
+    Yield the table as DataFrames of at most chunk_rows rows using a
+    server-side (unbuffered) cursor, so memory stays bounded.
+    """
+    check_table(table)
+    with read_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows).execute(
+            text(f"SELECT * FROM `{table}`")
+        )
+        columns = list(result.keys())
+        for rows in result.partitions(chunk_rows):
+            yield pd.DataFrame(rows, columns=columns)
+
+
+# -------- WRITERS --------
+def _write_csv(chunks, path, table):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, df in enumerate(chunks):
+            df.to_csv(f, header=(i == 0), index=False)
+            yield len(df)
+
+
+def _write_jsonl(chunks, path, table):
+    with open(path, "w", encoding="utf-8") as f:
+        for df in chunks:
+            if not df.empty:
+                # lines=True already ends every record, the last one included
+                f.write(df.to_json(orient="records", lines=True, date_format="iso"))
+            yield len(df)
+
+
+def _arrow_type(pa, col):
+    """information_schema.COLUMNS row -> pyarrow type of the values pymysql returns."""
+    data_type, unsigned = col["DATA_TYPE"].lower(), "unsigned" in col["COLUMN_TYPE"].lower()
+    ints = {"tinyint": 8, "smallint": 16, "mediumint": 32, "int": 32, "integer": 32, "bigint": 64}
+    if data_type in ints:
+        bits = ints[data_type]
+        return getattr(pa, f"uint{bits}" if unsigned else f"int{bits}")()
+    if data_type == "decimal":
+        precision, scale = int(col["NUMERIC_PRECISION"]), int(col["NUMERIC_SCALE"])
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    if data_type == "float":
+        return pa.float32()
+    if data_type in ("double", "real"):
+        return pa.float64()
+    if data_type == "date":
+        return pa.date32()
+    if data_type in ("datetime", "timestamp"):
+        return pa.timestamp("us")
+    if data_type == "time":
+        return pa.duration("us")        # pymysql returns TIME as timedelta
+    if data_type == "year":
+        return pa.int16()
+    if data_type in ("char", "varchar", "tinytext", "text", "mediumtext", "longtext", "enum", "set", "json"):
+        return pa.string()
+    return pa.binary()                  # BLOB / BINARY / BIT / spatial types
+
+
+def _parquet_schema(pa, table):
+    """
+    Schema from the column definitions, not from the first chunk: a column
+    that is all NULL in one chunk would otherwise be typed `null` and the
+    next chunk holding values would not fit it.
+    """
+    cols = fetch("""
+        SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t
+        ORDER BY ORDINAL_POSITION
+    """, {"t": table})
+    return pa.schema([(c["COLUMN_NAME"], _arrow_type(pa, c)) for _, c in cols.iterrows()])
+
+
+def _write_parquet(chunks, path, table):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).")
+
+    schema = _parquet_schema(pa, table)
+    with pq.ParquetWriter(path, schema) as writer:
+        for df in chunks:
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            yield len(df)
+
+
+# fmt -> writer(chunks, path, table), yielding the row count of each chunk written
+WRITERS = {"CSV": _write_csv, "JSON Lines": _write_jsonl, "Parquet": _write_parquet}
+
+
+def export_table(table, fmt="CSV", path=None, chunk_rows=CHUNK_ROWS, progress=None):
+    """
+    Stream `table` to a file in `fmt`, one chunk at a time.
+    Without `path`, each export gets its own file in EXPORT_DIR, readable
+    by this user only (tables such as User hold password hashes).
+    progress(rows_written) is called after every chunk.
+    Returns (path, total_rows).
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    temporary = path is None
+    if temporary:
+        # mkstemp creates the file with mode 0600; the writers truncate it in place
+        fd, path = tempfile.mkstemp(prefix=f"{table}-", suffix=FORMATS[fmt], dir=EXPORT_DIR)
+        os.close(fd)
+
+    total = 0
+    try:
+        for n in WRITERS[fmt](iter_chunks(table, chunk_rows), path, table):
+            total += n
+            if progress:
+                progress(total)
+    except BaseException:
+        if temporary:
+            os.remove(path)
+        raise
+    return path, total
+
+
+# -------- DOWNLOAD --------
+def offer_download(path, file_name=None, remove=True):
+    """
+    Download button for small exports, server path for large ones.
+    Once the file is handed to the button (Streamlit keeps it in memory)
+    it is deleted, unless remove=False.
+    """
+    import streamlit as st
+
+    size = os.path.getsize(path)
+    if size > MAX_DOWNLOAD_BYTES:
+        st.info(f"Export is {size / 1024 / 1024:,.0f} MB; saved on the server at {path} (delete it when done)")
+        return
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if remove:
+        os.remove(path)
+    st.download_button("⬇ Download", data, file_name=file_name or os.path.basename(path),
+                       key=f"download_{path}")
@@ -1,45 +1,124 @@
 # fix_passwords.py
-from sqlalchemy import create_engine, text
-from urllib.parse import quote_plus
-from werkzeug.security import generate_password_hash
+"""
+Hash every plaintext password in the User table.
 
-# --- DB CONFIG ---
-DB_USER = "root"
-DB_PASS = quote_plus("oppoa12@bharath")
-DB_HOST = "localhost"
-DB_NAME = "NutritionDB"
+Users are streamed with a server-side cursor, hashed on a process pool
+(hashing is CPU-bound) and written back in batches. After each committed
+batch the last User_ID is saved to a checkpoint file, so an interrupted
+run resumes where it stopped:
 
-engine = create_engine(f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}")
+    python fix_passwords.py                  # start or resume
+    python fix_passwords.py --restart        # ignore the checkpoint
+    python fix_passwords.py --workers 4 --batch 500
 
-print("🔍 Checking users for plaintext passwords...\n")
+Hashes made with older parameters cannot be upgraded here (that needs
+the plaintext); they are counted, and auth.py re-hashes them at the
+user's next login.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import text
+from database import make_engine
+from auth import HASH_METHOD, hash_password, is_hashed, needs_rehash
 
-# Step 1 — Fetch all users
-with engine.begin() as conn:
-    result = conn.execute(text("SELECT User_ID, Password FROM User"))
-    rows = result.fetchall()
+# --- DB CONFIG (db_config.ini / NUTRITION_DB_* env vars) ---
+engine = make_engine()
 
-updated_count = 0
+BATCH_SIZE = 1000
+CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fix_passwords.checkpoint")
 
-for row in rows:
-    user_id = row[0]          # tuple index 0 = User_ID
-    password_value = row[1]   # tuple index 1 = Password
 
-    # Detect if password is already hashed
-    if isinstance(password_value, str) and password_value.startswith(("pbkdf2:", "scrypt:", "argon2")):
-        print(f"✔ User_ID {user_id} already hashed. Skipping.")
-        continue
+# -----------------------------
+# CHECKPOINT
+# -----------------------------
+def load_checkpoint(path=CHECKPOINT_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"last_user_id": 0, "hashed": 0}
 
-    # Otherwise hash the plaintext password
-    hashed = generate_password_hash(password_value)
 
-    with engine.begin() as conn:
-        conn.execute(
-            text("UPDATE User SET Password = :pwd WHERE User_ID = :uid"),
-            {"pwd": hashed, "uid": user_id}
+def save_checkpoint(state, path=CHECKPOINT_FILE):
+    """Write to a temp file and rename, so a crash never leaves half a checkpoint."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# BATCH JOB
+# -----------------------------
+def write_batch(conn, user_ids, plaintexts, hashes):
+    """
+    Update one batch in one transaction. A row is only updated if its
+    password is still the plaintext we hashed (not changed meanwhile).
+    """
+    with conn.begin():
+        result = conn.execute(
+            text("UPDATE User SET Password = :pwd WHERE User_ID = :uid AND Password = :old"),
+            [{"pwd": h, "uid": u, "old": p} for u, p, h in zip(user_ids, plaintexts, hashes)]
+        )
+    return result.rowcount
+
+
+def fix_passwords(workers=None, batch_size=BATCH_SIZE, restart=False):
+    state = {"last_user_id": 0, "hashed": 0} if restart else load_checkpoint()
+    if state["last_user_id"]:
+        print(f"↪ Resuming after User_ID {state['last_user_id']} ({state['hashed']} already hashed)")
+
+    workers = workers or os.cpu_count()
+    scanned = hashed = outdated = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            engine.connect() as reader, engine.connect() as writer:
+        rows = reader.execution_options(stream_results=True, yield_per=batch_size).execute(
+            text("SELECT User_ID, Password FROM User WHERE User_ID > :after ORDER BY User_ID"),
+            {"after": state["last_user_id"]}
         )
 
-    updated_count += 1
-    print(f"🔒 Hashed password for User_ID {user_id}")
+        for batch in rows.partitions(batch_size):
+            scanned += len(batch)
+            todo = [(uid, pwd) for uid, pwd in batch if pwd is not None and not is_hashed(pwd)]
+            outdated += sum(1 for _, pwd in batch if is_hashed(pwd) and needs_rehash(pwd))
+
+            if todo:
+                user_ids, plaintexts = zip(*todo)
+                chunk = max(1, len(todo) // (4 * workers))
+                hashes = list(pool.map(hash_password, plaintexts, chunksize=chunk))
+                hashed += write_batch(writer, user_ids, plaintexts, hashes)
+
+            state["last_user_id"] = batch[-1][0]
+            state["hashed"] += len(todo)
+            save_checkpoint(state)
+
+            elapsed = time.perf_counter() - start
+            print(f"🔒 User_ID ≤ {batch[-1][0]}: {scanned:,} scanned, {hashed:,} hashed "
+                  f"({hashed / elapsed:,.0f} hashes/s, {scanned / elapsed:,.0f} rows/s)")
+
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+    return scanned, hashed, outdated, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash plaintext passwords in the User table")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="hashing processes")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="users per transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint file")
+    args = parser.parse_args()
+
+    print(f"🔍 Checking users for plaintext passwords ({HASH_METHOD}, {args.workers} workers)...\n")
+    scanned, hashed, outdated, secs = fix_passwords(args.workers, args.batch, args.restart)
 
-print("\n✅ Completed!")
-print(f"Total updated users: {updated_count}")
+    print("\n✅ Completed!")
+    print(f"Users scanned: {scanned:,}")
+    print(f"Total updated users: {hashed:,}")
+    print(f"Elapsed: {secs:.1f}s ({hashed / max(secs, 1e-9):,.0f} hashes/s)")
+    if outdated:
+        print(f"ℹ {outdated:,} hash(es) use older parameters; they are upgraded at the user's next login.")
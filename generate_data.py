@@ -0,0 +1,347 @@
+# generate_data.py
+"""
+Populate NutritionDB with synthetic data at production-like scale.
+
+    python generate_data.py --scale 0.01          # ~1k users, 100k diet logs
+    python generate_data.py --scale 1 --reset     # full size, wipe tables first
+
+Row counts at --scale 1 are given by BASE_COUNTS and can be overridden
+individually (e.g. --diet-logs 2000000).
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+from database import make_engine
+
+engine = make_engine()
+
+# -----------------------------
+# SIZES AT SCALE 1
+# -----------------------------
+BASE_COUNTS = {
+    "users": 100_000,
+    "ingredients": 5_000,
+    "recipes": 50_000,
+    "diet_logs": 10_000_000,
+    "weight_history": 1_000_000,
+    "feedback": 2_000_000,
+    "meal_plans": 60_000,
+}
+
+BATCH_SIZE = 5_000
+
+# Tables cleared by --reset, children first
+RESET_ORDER = [
+    "User_Daily_Nutrition", "Daily_Nutrition_Stale", "Recipe_Rating_Summary",
+    "Search_Index_Changes", "Recipe_Nutrition_Summary", "MealPlan_Recipes", "Feedback", "User_Diet_Log",
+    "Recipe_Ingredient", "Nutrition", "Ingredient", "Meal_Plan", "Recipe_Log",
+    "Recipe", "User_Weight_History", "User",
+]
+
+# -----------------------------
+# DISTRIBUTION PARAMETERS
+# -----------------------------
+GENDERS = ["Male", "Female", "Other"]
+GENDER_P = [0.48, 0.48, 0.04]
+ACTIVITY = ["Sedentary", "Light", "Moderate", "Active", "Very Active"]
+ACTIVITY_P = [0.25, 0.30, 0.25, 0.15, 0.05]
+DIETS = [None, "Vegetarian", "Vegan", "Non-Vegetarian", "Keto", "Pescatarian"]
+DIETS_P = [0.35, 0.2, 0.08, 0.27, 0.05, 0.05]
+CUISINES = ["Indian", "Western", "Asian", "Italian", "Mexican", "Mediterranean",
+            "Continental", "Middle Eastern", "French", "Thai"]
+DIFFICULTY = ["Easy", "Medium", "Hard"]
+DIFFICULTY_P = [0.5, 0.35, 0.15]
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner", "Snack"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Category -> (unit, per-100 means for calories, carbs, protein, fat, fiber)
+CATEGORIES = {
+    "Vegetable": ("grams", (35, 7, 2, 0.4, 2.5)),
+    "Fruit":     ("grams", (55, 13, 0.7, 0.3, 2.2)),
+    "Grain":     ("grams", (350, 72, 10, 2.5, 7)),
+    "Protein":   ("grams", (180, 1, 24, 8, 0)),
+    "Dairy":     ("ml",    (70, 5, 3.5, 3.5, 0)),
+    "Fat":       ("ml",    (850, 0, 0, 95, 0)),
+    "Nuts":      ("grams", (580, 20, 20, 50, 10)),
+    "Spice":     ("grams", (300, 55, 12, 10, 25)),
+    "Legume":    ("grams", (330, 60, 22, 1.5, 16)),
+}
+
+WORDS = ("spicy grilled roasted baked creamy classic quick healthy hearty fresh "
+         "garlic lemon herb smoky sweet tangy crispy stuffed curried glazed").split()
+NOUNS = ("curry salad bowl soup stew wrap pasta stir-fry casserole skillet "
+         "tacos risotto kebab noodles sandwich omelette porridge pilaf").split()
+
+
+# -----------------------------
+# HELPERS
+# -----------------------------
+def insert_rows(conn, table, columns, rows):
+    """Multi-row INSERT in batches through the raw DBAPI cursor."""
+    sql = f"INSERT INTO `{table}` ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    cursor = conn.cursor()
+    for start in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+    conn.commit()
+    cursor.close()
+
+
+def next_id(table, pk):
+    with engine.connect() as c:
+        return int(c.execute(text(f"SELECT IFNULL(MAX({pk}), 0) + 1 FROM `{table}`")).scalar())
+
+
+def zipf_sampler(rng, n, a=1.1):
+    """
+    Return sample(size) -> ids 0..n-1 with a heavy-tailed popularity
+    distribution. The popularity ranking is fixed once per sampler.
+    """
+    p = np.arange(1, n + 1, dtype="float64") ** -a
+    cdf = np.cumsum(p / p.sum())
+    order = rng.permutation(n)
+
+    def sample(size):
+        ranks = np.minimum(np.searchsorted(cdf, rng.random(size)), n - 1)
+        return order[ranks]
+    return sample
+
+
+def chunks(total):
+    """Yield (offset, size) slices so huge tables are generated in bounded memory."""
+    step = BATCH_SIZE * 20
+    for offset in range(0, total, step):
+        yield offset, min(step, total - offset)
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    n = fn(*args)
+    secs = time.perf_counter() - start
+    print(f"  ✔ {label}: {n:,} rows in {secs:.1f}s ({n / secs if secs else 0:,.0f} rows/s)")
+    return n
+
+
+# -----------------------------
+# GENERATORS
+# -----------------------------
+def gen_users(conn, rng, n, first_id, password_hash):
+    today = date.today()
+    for offset, size in chunks(n):
+        ids = np.arange(first_id + offset, first_id + offset + size)
+        gender = rng.choice(GENDERS, size=size, p=GENDER_P)
+        male = gender == "Male"
+        height = np.clip(np.where(male, rng.normal(176, 7, size), rng.normal(163, 7, size)), 140, 210).round()
+        bmi = np.clip(rng.lognormal(np.log(25), 0.15, size), 16, 45)
+        weight = (bmi * (height / 100) ** 2).round(2)
+        age_days = rng.integers(18 * 365, 75 * 365, size)
+        activity = rng.choice(ACTIVITY, size=size, p=ACTIVITY_P)
+        diet = rng.choice(len(DIETS), size=size, p=DIETS_P)
+
+        rows = [
+            (int(i), f"User {i}", f"user{i}@example.com", password_hash, g,
+             today - timedelta(days=int(a)), int(h), float(w), act, DIETS[d],
+             round(float(w) / (float(h) / 100) ** 2, 2), "user")
+            for i, g, a, h, w, act, d in zip(ids, gender, age_days, height, weight, activity, diet)
+        ]
+        insert_rows(conn, "User",
+                    ["User_ID", "Name", "Email", "Password", "Gender", "Date_Of_Birth",
+                     "Height_cm", "Weight_kg", "Activity_Level", "Dietary_Preferences", "BMI", "role"],
+                    rows)
+    return n
+
+
+def gen_ingredients(conn, rng, n, first_id):
+    cats = list(CATEGORIES)
+    cat_idx = rng.integers(0, len(cats), n)
+    ing_rows, nut_rows = [], []
+    for k in range(n):
+        iid = first_id + k
+        cat = cats[cat_idx[k]]
+        unit, means = CATEGORIES[cat]
+        ing_rows.append((iid, f"{cat} item {iid}", unit, cat))
+        vals = [round(float(max(0.0, rng.normal(m, m * 0.25))), 2) for m in means]
+        nut_rows.append((iid, *vals))
+
+    insert_rows(conn, "Ingredient", ["Ingredient_ID", "Ingredient_Name", "Unit_Of_Measure", "Category"], ing_rows)
+    insert_rows(conn, "Nutrition",
+                ["Ingredient_ID", "Calories", "Carbohydrates_g", "Protein_g", "Fat_g", "Fiber_g"],
+                nut_rows)
+    return n
+
+
+def gen_recipes(conn, rng, n, first_id, user_ids, ingredient_ids):
+    pick_ingredients = zipf_sampler(rng, len(ingredient_ids), a=0.8)
+    recipe_rows, link_rows = [], []
+    for k in range(n):
+        rid = first_id + k
+        name = f"{WORDS[rng.integers(len(WORDS))].title()} {NOUNS[rng.integers(len(NOUNS))]} #{rid}"
+        cuisine = CUISINES[rng.integers(len(CUISINES))]
+        recipe_rows.append((
+            rid, name, f"A {cuisine.lower()} {name.lower()} recipe.", cuisine,
+            int(rng.integers(5, 45)), int(rng.integers(0, 90)),
+            DIFFICULTY[rng.choice(3, p=DIFFICULTY_P)],
+            "Prepare ingredients, cook and serve.", int(rng.choice(user_ids)),
+        ))
+        # 3-12 distinct ingredients, popular staples picked more often
+        picks = np.unique(pick_ingredients(int(rng.integers(3, 13))))
+        for p in picks:
+            link_rows.append((rid, int(ingredient_ids[p]), float(round(rng.lognormal(np.log(80), 0.7), 3)), "grams"))
+
+    insert_rows(conn, "Recipe",
+                ["Recipe_ID", "Recipe_Name", "Description", "Cuisine_Type", "Preparation_Time_minutes",
+                 "Cooking_Time_minutes", "Difficulty_Level", "Instructions", "Creator_User_ID"],
+                recipe_rows)
+    insert_rows(conn, "Recipe_Ingredient", ["Recipe_ID", "Ingredient_ID", "Quantity", "Unit"], link_rows)
+    return n
+
+
+def gen_diet_logs(conn, rng, n, user_ids, recipe_ids):
+    today = date.today()
+    pick_user = zipf_sampler(rng, len(user_ids), a=0.6)
+    pick_recipe = zipf_sampler(rng, len(recipe_ids))
+    for _, size in chunks(n):
+        users = user_ids[pick_user(size)]
+        recipes = recipe_ids[pick_recipe(size)]
+        days_ago = rng.integers(0, 730, size)
+        secs = rng.integers(6 * 3600, 23 * 3600, size)
+        portion = np.clip(rng.lognormal(0, 0.35, size), 0.5, 10).round(1)
+        finished = rng.random(size) < 0.8
+        rows = [
+            (int(u), int(r), today - timedelta(days=int(d)), f"{s // 3600:02d}:{s % 3600 // 60:02d}:00",
+             float(p), None, bool(f))
+            for u, r, d, s, p, f in zip(users, recipes, days_ago, secs, portion, finished)
+        ]
+        insert_rows(conn, "User_Diet_Log",
+                    ["User_ID", "Recipe_ID", "Date", "Time", "Portion_Size", "Notes", "is_finished"], rows)
+    return n
+
+
+def gen_weight_history(conn, rng, n, user_ids):
+    now = datetime.now()
+    pick_user = zipf_sampler(rng, len(user_ids), a=0.5)
+    for _, size in chunks(n):
+        users = user_ids[pick_user(size)]
+        base = rng.normal(72, 12, size).clip(40, 180)
+        delta = rng.normal(0, 0.6, size)
+        ts = [now - timedelta(seconds=int(s)) for s in rng.integers(0, 730 * 86400, size)]
+        rows = [(int(u), round(float(b), 2), round(float(b + d), 2), t)
+                for u, b, d, t in zip(users, base, delta, ts)]
+        insert_rows(conn, "User_Weight_History", ["User_ID", "Old_Weight", "New_Weight", "Updated_At"], rows)
+    return n
+
+
+def gen_feedback(conn, rng, n, user_ids, recipe_ids):
+    pick_recipe = zipf_sampler(rng, len(recipe_ids))
+    for _, size in chunks(n):
+        users = user_ids[rng.integers(0, len(user_ids), size)]
+        recipes = recipe_ids[pick_recipe(size)]
+        # Ratings skew positive, like most review sites
+        ratings = rng.choice([1, 2, 3, 4, 5], size=size, p=[0.05, 0.07, 0.18, 0.35, 0.35])
+        rows = [(int(u), int(r), int(x), None) for u, r, x in zip(users, recipes, ratings)]
+        insert_rows(conn, "Feedback", ["User_ID", "Recipe_ID", "Rating", "Comments"], rows)
+    return n
+
+
+def gen_meal_plans(conn, rng, n, first_id, user_ids, recipe_ids):
+    today = date.today()
+    owners = rng.choice(user_ids, size=n, replace=n > len(user_ids))
+    plan_rows, item_rows = [], []
+    for k, u in enumerate(owners):
+        mp = first_id + k
+        start = today - timedelta(days=int(rng.integers(0, 365)))
+        plan_rows.append((mp, int(u), "My Meal Plan", start, start + timedelta(days=7), "Synthetic"))
+        for _ in range(int(rng.integers(3, 29))):
+            item_rows.append((mp, int(recipe_ids[rng.integers(len(recipe_ids))]),
+                              MEAL_TYPES[rng.integers(4)], DAYS[rng.integers(7)]))
+
+    insert_rows(conn, "Meal_Plan", ["MealPlan_ID", "User_ID", "Plan_Name", "Start_Date", "End_Date", "Notes"],
+                plan_rows)
+    insert_rows(conn, "MealPlan_Recipes", ["MealPlan_ID", "Recipe_ID", "Meal_Type", "Day_Of_Week"], item_rows)
+    return n
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NutritionDB data")
+    parser.add_argument("--scale", type=float, default=0.01, help="multiplier for BASE_COUNTS")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete all existing rows first")
+    for name in BASE_COUNTS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None)
+    args = parser.parse_args()
+
+    counts = {
+        k: getattr(args, k) if getattr(args, k) is not None else max(1, int(v * args.scale))
+        for k, v in BASE_COUNTS.items()
+    }
+    print("📦 Generating:", ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+
+    rng = np.random.default_rng(args.seed)
+
+    if args.reset:
+        with engine.begin() as c:
+            c.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+            for t in RESET_ORDER:
+                c.execute(text(f"TRUNCATE TABLE `{t}`"))
+            c.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+        print("🧹 Existing rows removed.")
+
+    first_user = next_id("User", "User_ID")
+    first_ing = next_id("Ingredient", "Ingredient_ID")
+    first_recipe = next_id("Recipe", "Recipe_ID")
+    first_plan = next_id("Meal_Plan", "MealPlan_ID")
+
+    user_ids = np.arange(first_user, first_user + counts["users"])
+    ingredient_ids = np.arange(first_ing, first_ing + counts["ingredients"])
+    recipe_ids = np.arange(first_recipe, first_recipe + counts["recipes"])
+
+    # One hash shared by every synthetic account (hashing 100k passwords
+    # would dominate the run); the password is "password"
+    password_hash = generate_password_hash("password")
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SET unique_checks = 0")
+        # Diet log / Feedback triggers would update a rollup row per insert;
+        # both summaries are rebuilt once below
+        cur.execute("SET @skip_daily_rollup = 1")
+        cur.execute("SET @skip_rating_summary = 1")
+        cur.close()
+
+        timed("User", gen_users, conn, rng, counts["users"], first_user, password_hash)
+        timed("Ingredient + Nutrition", gen_ingredients, conn, rng, counts["ingredients"], first_ing)
+        timed("Recipe + Recipe_Ingredient", gen_recipes, conn, rng, counts["recipes"], first_recipe,
+              user_ids, ingredient_ids)
+        timed("User_Diet_Log", gen_diet_logs, conn, rng, counts["diet_logs"], user_ids, recipe_ids)
+        timed("User_Weight_History", gen_weight_history, conn, rng, counts["weight_history"], user_ids)
+        timed("Feedback", gen_feedback, conn, rng, counts["feedback"], user_ids, recipe_ids)
+        timed("Meal_Plan + MealPlan_Recipes", gen_meal_plans, conn, rng, counts["meal_plans"], first_plan,
+              user_ids, recipe_ids)
+
+        cur = conn.cursor()
+        cur.execute("SET unique_checks = 1")
+        cur.execute("SET @skip_daily_rollup = NULL")
+        cur.execute("SET @skip_rating_summary = NULL")
+        cur.close()
+    finally:
+        conn.close()
+
+    # Triggers keep the summary current, but a rebuild is cheaper to trust
+    with engine.begin() as c:
+        c.execute(text("CALL RebuildRecipeNutritionSummary()"))
+    with engine.begin() as c:
+        c.execute(text("CALL RebuildUserDailyNutrition()"))
+    with engine.begin() as c:
+        c.execute(text("CALL RebuildRecipeRatingSummary()"))
+
+    print("\n✅ Synthetic data generated.")
+
+
+if __name__ == "__main__":
+    main()
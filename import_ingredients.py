@@ -0,0 +1,195 @@
+# import_ingredients.py
+"""
+Bulk-load ingredients and their nutrition values from a CSV file.
+
+    python import_ingredients.py foods.csv --batch-size 5000
+
+Expected columns (case-insensitive): Ingredient_Name, Unit_Of_Measure,
+Category, and optionally Notes, Calories, Carbohydrates_g, Protein_g,
+Fat_g, Fiber_g, Vitamins, Minerals. Nutrition values are per 100 units.
+Rows are upserted on Ingredient_Name; blank cells keep the stored value.
+"""
+import argparse
+import csv
+import io
+import time
+from sqlalchemy import text
+from shared import engine, invalidate
+from daily_nutrition import refresh_stale
+
+BATCH_SIZE = 5_000
+
+REQUIRED = ["Ingredient_Name", "Unit_Of_Measure", "Category"]
+OPTIONAL_TEXT = ["Notes", "Vitamins", "Minerals"]
+NUMERIC = ["Calories", "Carbohydrates_g", "Protein_g", "Fat_g", "Fiber_g"]
+
+# Column limits from the schema
+MAX_LEN = {"Ingredient_Name": 150, "Unit_Of_Measure": 50, "Category": 50,
+           "Notes": 255, "Vitamins": 255, "Minerals": 255}
+MAX_NUMERIC = 9999.99   # DECIMAL(6,2)
+
+
+# -----------------------------
+# PARSE + VALIDATE
+# -----------------------------
+def parse_rows(lines):
+    """
+    Parse and validate CSV lines (an iterable of str).
+    Returns (rows, rejected); rows are deduplicated on Ingredient_Name
+    (case-insensitive, last occurrence wins) and rejected holds
+    (line_number, reason) pairs.
+    """
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return [], [(1, "empty file")]
+
+    # Map the file's headers onto schema column names case-insensitively
+    header = {h.strip().lower(): h for h in reader.fieldnames}
+    missing = [c for c in REQUIRED if c.lower() not in header]
+    if missing:
+        return [], [(1, f"missing column(s): {', '.join(missing)}")]
+
+    columns = [c for c in REQUIRED + OPTIONAL_TEXT + NUMERIC if c.lower() in header]
+    has_nutrition = any(c in columns for c in NUMERIC)
+
+    rows, rejected = {}, []
+    for line_no, raw in enumerate(reader, start=2):
+        row, error = {}, None
+        for col in columns:
+            value = (raw.get(header[col.lower()]) or "").strip()
+            if col in NUMERIC:
+                try:
+                    value = float(value) if value else None
+                except ValueError:
+                    error = f"{col} is not a number: {value!r}"
+                    break
+                if value is not None and not 0 <= value <= MAX_NUMERIC:
+                    error = f"{col} out of range: {value}"
+                    break
+            else:
+                if col in REQUIRED and not value:
+                    error = f"{col} is empty"
+                    break
+                if len(value) > MAX_LEN[col]:
+                    error = f"{col} longer than {MAX_LEN[col]} characters"
+                    break
+                value = value or None
+            row[col] = value
+
+        if error:
+            rejected.append((line_no, error))
+            continue
+
+        row["_has_nutrition"] = has_nutrition
+        rows[row["Ingredient_Name"].lower()] = row
+
+    return list(rows.values()), rejected
+
+
+# -----------------------------
+# UPSERT
+# -----------------------------
+def upsert_batch(conn, batch):
+    """Upsert one batch of Ingredient rows and their Nutrition rows (one transaction)."""
+    ing_cols = [c for c in REQUIRED + ["Notes"]]
+    conn.execute(text(f"""
+        INSERT INTO Ingredient ({', '.join(ing_cols)})
+        VALUES ({', '.join(':' + c for c in ing_cols)})
+        ON DUPLICATE KEY UPDATE
+            Unit_Of_Measure = VALUES(Unit_Of_Measure),
+            Category = VALUES(Category),
+            Notes = COALESCE(VALUES(Notes), Notes)
+    """), [{c: r.get(c) for c in ing_cols} for r in batch])
+
+    nut_rows = [r for r in batch if r["_has_nutrition"]]
+    if not nut_rows:
+        return
+
+    # Resolve IDs for the whole batch with one query
+    names = [r["Ingredient_Name"] for r in nut_rows]
+    placeholders = ", ".join(f":n{i}" for i in range(len(names)))
+    ids = dict(conn.execute(
+        text(f"SELECT Ingredient_Name, Ingredient_ID FROM Ingredient WHERE Ingredient_Name IN ({placeholders})"),
+        {f"n{i}": n for i, n in enumerate(names)}
+    ).fetchall())
+    ids = {k.lower(): v for k, v in ids.items()}
+
+    # Blank or missing cells are NULL and leave the stored value alone
+    nut_cols = NUMERIC + ["Vitamins", "Minerals"]
+    conn.execute(text(f"""
+        INSERT INTO Nutrition (Ingredient_ID, {', '.join(nut_cols)})
+        VALUES (:Ingredient_ID, {', '.join(':' + c for c in nut_cols)})
+        ON DUPLICATE KEY UPDATE
+            {', '.join(f'{c} = COALESCE(VALUES({c}), {c})' for c in nut_cols)}
+    """), [
+        dict({c: r.get(c) for c in nut_cols}, Ingredient_ID=ids[r["Ingredient_Name"].lower()])
+        for r in nut_rows
+    ])
+
+
+def import_rows(rows, batch_size=BATCH_SIZE, progress=None):
+    """
+    Upsert validated rows in batches, each in its own transaction.
+    progress(done, total) is called after every batch.
+    Returns stats with rows/second throughput.
+    """
+    start = time.perf_counter()
+    done = 0
+    try:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            with engine.begin() as conn:
+                upsert_batch(conn, batch)
+            done += len(batch)
+            if progress:
+                progress(done, len(rows))
+    finally:
+        # Batches before a failure are committed; caches and rollups must see them
+        invalidate(["Ingredient", "Nutrition"])
+
+        # Updated nutrition values marked recipes stale; roll their diet log days up again
+        refresh_stale()
+
+    secs = time.perf_counter() - start
+    return {"imported": done, "seconds": round(secs, 2),
+            "rows_per_sec": round(done / secs, 1) if secs else float(done)}
+
+
+def import_csv(lines, batch_size=BATCH_SIZE, progress=None):
+    """Parse, validate and upsert; returns (stats, rejected)."""
+    rows, rejected = parse_rows(lines)
+    stats = import_rows(rows, batch_size, progress)
+    stats["rejected"] = len(rejected)
+    return stats, rejected
+
+
+def decode_upload(data):
+    """Bytes from an upload widget -> text lines for parse_rows()."""
+    return io.StringIO(data.decode("utf-8-sig"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import ingredients + nutrition from CSV")
+    parser.add_argument("csv_file")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--rejects", help="write rejected line numbers and reasons to this CSV")
+    args = parser.parse_args()
+
+    print(f"📥 Importing {args.csv_file}...\n")
+    with open(args.csv_file, encoding="utf-8-sig", newline="") as f:
+        stats, rejected = import_csv(
+            f, args.batch_size,
+            progress=lambda done, total: print(f"  {done:,}/{total:,} rows", end="\r")
+        )
+
+    print(f"\n✅ Imported {stats['imported']:,} rows in {stats['seconds']}s "
+          f"({stats['rows_per_sec']:,} rows/s)")
+    if rejected:
+        print(f"⚠ Rejected {len(rejected):,} rows")
+        for line_no, reason in rejected[:20]:
+            print(f"  line {line_no}: {reason}")
+        if args.rejects:
+            with open(args.rejects, "w", encoding="utf-8", newline="") as out:
+                w = csv.writer(out)
+                w.writerow(["line", "reason"])
+                w.writerows(rejected)
@@ -1,18 +1,53 @@
 # init_admin.py
+"""
+Create users.
+
+    python init_admin.py                              # one admin, interactive
+    python init_admin.py --bulk users.csv             # many users from CSV / JSONL
+    python init_admin.py --bulk users.jsonl --dry-run
+
+Bulk columns (case-insensitive): Name, Email, Password and optionally
+Gender, Date_Of_Birth, Height_cm, Weight_kg, Activity_Level,
+Dietary_Preferences, Allergies, role (default 'user'). Emails that
+already exist are skipped, not updated.
+"""
+import argparse
+import csv
 import getpass
-from sqlalchemy import create_engine, text
-from werkzeug.security import generate_password_hash
-from urllib.parse import quote_plus
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from sqlalchemy import bindparam, exc, text
+from database import make_engine
+from auth import hash_password
 
 # -----------------------------
-# DATABASE CONFIG
+# DATABASE CONFIG (db_config.ini / NUTRITION_DB_* env vars)
 # -----------------------------
-DB_USER = "root"
-DB_PASS = quote_plus("oppoa12@bharath")
-DB_HOST = "localhost"
-DB_NAME = "NutritionDB"
+engine = make_engine()
+
+BATCH_SIZE = 1000
+
+REQUIRED = ["Name", "Email", "Password"]
+OPTIONAL = ["Gender", "Date_Of_Birth", "Height_cm", "Weight_kg", "Activity_Level",
+            "Dietary_Preferences", "Allergies", "role"]
+
+# Column limits from the schema
+MAX_LEN = {"Name": 100, "Email": 255, "Dietary_Preferences": 100, "Allergies": 255}
+ENUMS = {
+    "Gender": ["Male", "Female", "Other"],
+    "Activity_Level": ["Sedentary", "Light", "Moderate", "Active", "Very Active"],
+    "role": ["user", "admin"],
+}
+# Schema defaults (an explicit NULL in the INSERT would bypass them)
+DEFAULTS = {"Gender": "Other", "Activity_Level": "Moderate", "role": "user"}
+RANGES = {"Height_cm": (1, 65535), "Weight_kg": (0.01, 999.99)}   # SMALLINT UNSIGNED, DECIMAL(5,2)
+MAX_BMI = 999.99    # DECIMAL(5,2)
+
+INSERT_COLUMNS = REQUIRED + OPTIONAL + ["BMI"]
 
-engine = create_engine(f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}")
 
 # -----------------------------
 # CREATE ADMIN USER
@@ -30,7 +65,7 @@ def create_admin():
         print("❌ Passwords do not match!")
         return
 
-    hashed = generate_password_hash(password)
+    hashed = hash_password(password)
 
     try:
         with engine.begin() as conn:
@@ -59,5 +94,230 @@ def create_admin():
         print(f"❌ Failed to create admin: {e}")
 
 
+# -----------------------------
+# BULK: PARSE + VALIDATE
+# -----------------------------
+def read_records(path):
+    """Yield (line_number, {column: value}) from a .csv or .jsonl file."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_no, {"_error": f"invalid JSON: {e.msg}"}
+        else:
+            for line_no, raw in enumerate(csv.DictReader(f), start=2):
+                yield line_no, raw
+
+
+def validate(raw):
+    """One record -> (row, None) or (None, reason). Column names are case-insensitive."""
+    if "_error" in raw:
+        return None, raw["_error"]
+    values = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+
+    row = {}
+    for col in REQUIRED + OPTIONAL:
+        value = values.get(col.lower())
+        value = "" if value is None else str(value).strip()
+
+        if not value:
+            if col in REQUIRED:
+                return None, f"{col} is empty"
+            row[col] = DEFAULTS.get(col)
+            continue
+
+        if col in ENUMS:
+            match = {v.lower(): v for v in ENUMS[col]}.get(value.lower())
+            if match is None:
+                return None, f"{col} must be one of {', '.join(ENUMS[col])}"
+            value = match
+        elif col in RANGES:
+            try:
+                value = float(value)
+            except ValueError:
+                return None, f"{col} is not a number: {value!r}"
+            # Round to what the column stores first, so e.g. 0.004 kg is not stored as 0
+            value = int(round(value)) if col == "Height_cm" else round(value, 2)
+            low, high = RANGES[col]
+            if not low <= value <= high:
+                return None, f"{col} out of range: {value}"
+        elif col == "Date_Of_Birth":
+            try:
+                value = date.fromisoformat(value)
+            except ValueError:
+                return None, f"Date_Of_Birth is not YYYY-MM-DD: {value!r}"
+        elif col in MAX_LEN and len(value) > MAX_LEN[col]:
+            return None, f"{col} longer than {MAX_LEN[col]} characters"
+        row[col] = value
+
+    if "@" not in row["Email"]:
+        return None, f"invalid email: {row['Email']!r}"
+
+    # trg_update_bmi only fires on UPDATE, so new rows get BMI here
+    if row["Height_cm"] and row["Weight_kg"]:
+        row["BMI"] = round(row["Weight_kg"] / (row["Height_cm"] / 100) ** 2, 2)
+        if row["BMI"] > MAX_BMI:
+            return None, f"BMI out of range: {row['BMI']} (check Height_cm / Weight_kg)"
+    else:
+        row["BMI"] = None
+    return row, None
+
+
+def parse_users(records):
+    """
+    Validate records; returns (rows, rejected). The first row per email
+    wins. Each row keeps its line number in "_line" for later rejects.
+    """
+    rows, seen, rejected = [], set(), []
+    for line_no, raw in records:
+        row, error = validate(raw)
+        if error is None and row["Email"].lower() in seen:
+            error = "duplicate email in file"
+        if error:
+            rejected.append((line_no, error))
+            continue
+        seen.add(row["Email"].lower())
+        row["_line"] = line_no
+        rows.append(row)
+    return rows, rejected
+
+
+# -----------------------------
+# BULK: INSERT
+# -----------------------------
+_EXISTING = text("SELECT Email FROM `User` WHERE Email IN :emails").bindparams(
+    bindparam("emails", expanding=True))
+
+_INSERT = text(f"""
+    INSERT INTO `User` ({', '.join(INSERT_COLUMNS)})
+    VALUES ({', '.join(':' + c for c in INSERT_COLUMNS)})
+""")
+
+
+def existing_emails(conn, emails):
+    """Lowercased emails already in User (one lookup on the unique Email index)."""
+    if not emails:
+        return set()
+    return {e.lower() for (e,) in conn.execute(_EXISTING, {"emails": list(emails)})}
+
+
+def _params(row):
+    return {c: row[c] for c in INSERT_COLUMNS}
+
+
+def insert_batch(batch):
+    """
+    Insert the batch rows whose email is new in one multi-row INSERT and
+    one transaction. If another writer takes an email between the check
+    and the insert, the batch is rolled back and checked again; if the
+    database still refuses it, the rows go in one at a time.
+    Returns (created, skipped, failed) with failed as [(line, reason)].
+    """
+    for attempt in range(3):
+        try:
+            with engine.begin() as conn:
+                taken = existing_emails(conn, [r["Email"] for r in batch])
+                new = [r for r in batch if r["Email"].lower() not in taken]
+                if new:
+                    conn.execute(_INSERT, [_params(r) for r in new])
+            return len(new), len(batch) - len(new), []
+        except exc.IntegrityError:
+            continue
+        except (exc.OperationalError, exc.InterfaceError):
+            raise   # the database, not the rows
+        except exc.DBAPIError:
+            break   # e.g. DataError: one bad row sinks the whole INSERT
+    return _insert_rows(batch)
+
+
+def _insert_rows(batch):
+    """One row per transaction, so one bad row does not sink the batch."""
+    created = skipped = 0
+    failed = []
+    for row in batch:
+        try:
+            with engine.begin() as conn:
+                if existing_emails(conn, [row["Email"]]):
+                    skipped += 1
+                    continue
+                conn.execute(_INSERT, _params(row))
+            created += 1
+        except (exc.OperationalError, exc.InterfaceError):
+            raise
+        except exc.DBAPIError as e:
+            failed.append((row["_line"], f"insert failed: {str(e.orig or e).splitlines()[0]}"))
+    return created, skipped, failed
+
+
+def provision(path, dry_run=False, batch_size=BATCH_SIZE, workers=None, progress=None):
+    """Bulk-create users from `path`; returns (stats, rejected)."""
+    start = time.perf_counter()
+    rows, rejected = parse_users(read_records(path))
+    created = skipped = 0
+
+    if dry_run:
+        with engine.connect() as conn:
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                taken = existing_emails(conn, [r["Email"] for r in batch])
+                skipped += sum(1 for r in batch if r["Email"].lower() in taken)
+        created = len(rows) - skipped
+    else:
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                # Hashing dominates the run time; spread it over all cores
+                chunk = max(1, len(batch) // (4 * workers))
+                for row, hashed in zip(batch, pool.map(hash_password, [r["Password"] for r in batch],
+                                                       chunksize=chunk)):
+                    row["Password"] = hashed
+                c, s, failed = insert_batch(batch)
+                created += c
+                skipped += s
+                rejected += failed
+                if progress:
+                    progress(i + len(batch), len(rows))
+
+    rejected.sort()
+    secs = time.perf_counter() - start
+    return {"created": created, "skipped_existing": skipped, "rejected": len(rejected),
+            "seconds": round(secs, 2),
+            "rows_per_sec": round((created + skipped) / secs, 1) if secs else 0.0}, rejected
+
+
 if __name__ == "__main__":
-    create_admin()
+    parser = argparse.ArgumentParser(description="Create an admin (interactive) or bulk-create users")
+    parser.add_argument("--bulk", metavar="FILE", help="CSV or JSONL file of users")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check duplicates only")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="hashing processes")
+    parser.add_argument("--rejects", help="write rejected line numbers and reasons to this CSV")
+    args = parser.parse_args()
+
+    if not args.bulk:
+        create_admin()
+        raise SystemExit(0)
+
+    print(f"📥 {'Checking' if args.dry_run else 'Provisioning'} users from {args.bulk}...\n")
+    stats, rejected = provision(
+        args.bulk, args.dry_run, args.batch_size, args.workers,
+        progress=lambda done, total: print(f"  {done:,}/{total:,} rows", end="\r")
+    )
+
+    verb = "Would create" if args.dry_run else "Created"
+    print(f"\n✅ {verb} {stats['created']:,} users in {stats['seconds']}s "
+          f"({stats['rows_per_sec']:,} rows/s)")
+    print(f"↷ Skipped {stats['skipped_existing']:,} existing email(s)")
+    if rejected:
+        print(f"⚠ Rejected {len(rejected):,} rows")
+        for line_no, reason in rejected[:20]:
+            print(f"  line {line_no}: {reason}")
+        if args.rejects:
+            with open(args.rejects, "w", encoding="utf-8", newline="") as out:
+                w = csv.writer(out)
+                w.writerow(["line", "reason"])
+                w.writerows(rejected)
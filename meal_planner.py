@@ -0,0 +1,291 @@
+# meal_planner.py
+"""
+Weekly meal plan generator.
+
+Daily calorie target from Mifflin-St Jeor BMR x activity factor, split
+into macro targets and per-meal shares. Candidates are the precomputed
+Recipe_Nutrition_Summary vectors (one cached read), filtered for the
+user's dietary preference and allergies. A greedy pass fills the 28
+day/meal slots without repeats, then a time-bounded local search swaps
+recipes to bring each day's totals closer to the targets.
+"""
+import re
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from shared import engine, fetch, invalidate
+from nutrition import NUTRIENTS
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEALS = ["Breakfast", "Lunch", "Dinner", "Snack"]
+
+# Share of the daily targets per meal
+MEAL_SHARE = {"Breakfast": 0.25, "Lunch": 0.35, "Dinner": 0.30, "Snack": 0.10}
+
+ACTIVITY_FACTOR = {"Sedentary": 1.2, "Light": 1.375, "Moderate": 1.55,
+                   "Active": 1.725, "Very Active": 1.9}
+
+# Share of calories from carbs / protein / fat (keto swaps carbs for fat)
+MACRO_SPLIT = {"default": (0.50, 0.20, 0.30), "Keto": (0.05, 0.25, 0.70)}
+FIBER_PER_1000_KCAL = 14
+
+# Error weights per nutrient (same order as NUTRIENTS)
+WEIGHTS = np.array([3.0, 1.0, 2.0, 1.0, 0.5])
+
+# Candidates kept per meal type for the search
+POOL_SIZE = 300
+
+# Wall-clock budget for the local search
+TIME_BUDGET = 0.3
+
+# Ingredient words / categories a diet excludes. Words match whole words
+# of the ingredient name (plurals included), so "ham" does not hit
+# "graham" or "champagne" and "egg" does not hit "eggplant".
+_MEAT = ["chicken", "beef", "pork", "lamb", "mutton", "turkey", "bacon", "ham", "sausage", "duck", "veal"]
+_FISH = ["fish", "salmon", "tuna", "cod", "shrimp", "prawn", "crab", "lobster", "sardine", "anchovy"]
+_DAIRY = ["milk", "cheese", "butter", "yogurt", "yoghurt", "cream", "paneer", "ghee", "whey"]
+DIET_EXCLUDES = {
+    "Vegetarian": (_MEAT + _FISH, []),
+    "Pescatarian": (_MEAT, []),
+    "Vegan": (_MEAT + _FISH + _DAIRY + ["egg", "honey"], ["Dairy"]),
+}
+
+# Plant-based names built on a diet word; skipped for diets, not for allergies
+PLANT_BASED = ["peanut butter", "almond butter", "cashew butter", "nut butter", "cocoa butter",
+               "apple butter", "coconut milk", "almond milk", "soy milk", "oat milk", "rice milk",
+               "cashew milk", "coconut cream", "cream of tartar", "coconut yogurt", "soy yogurt"]
+
+
+# -----------------------------
+# TARGETS
+# -----------------------------
+def _get(user, key, default=None):
+    value = user.get(key)
+    return default if value is None or pd.isna(value) or value == "" else value
+
+
+def _age(dob):
+    if dob is None:
+        return 30
+    dob = pd.Timestamp(dob).date()
+    today = date.today()
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def daily_targets(user):
+    """User row (dict / Series) -> daily target per nutrient, in NUTRIENTS order."""
+    weight = float(_get(user, "Weight_kg", 70))
+    height = float(_get(user, "Height_cm", 170))
+    age = _age(_get(user, "Date_Of_Birth"))
+
+    # Mifflin-St Jeor; "Other" uses the midpoint of the two offsets
+    offset = {"Male": 5, "Female": -161}.get(_get(user, "Gender"), -78)
+    bmr = 10 * weight + 6.25 * height - 5 * age + offset
+    kcal = bmr * ACTIVITY_FACTOR.get(_get(user, "Activity_Level"), 1.55)
+
+    carb, protein, fat = MACRO_SPLIT.get(_get(user, "Dietary_Preferences"), MACRO_SPLIT["default"])
+    return np.array([
+        kcal,
+        kcal * carb / 4,
+        kcal * protein / 4,
+        kcal * fat / 9,
+        kcal / 1000 * FIBER_PER_1000_KCAL,
+    ])
+
+
+# -----------------------------
+# CANDIDATES
+# -----------------------------
+def load_candidates():
+    """Every recipe with a nutrient vector (cached by the shared query cache)."""
+    return fetch(f"""
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, {', '.join('s.' + c for c in NUTRIENTS)}
+        FROM Recipe r
+        JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        WHERE s.Calories > 0
+        ORDER BY r.Recipe_ID
+    """)
+
+
+def _words(name):
+    """Lower-cased words of a name with plural endings dropped ("Anchovies" -> "anchovy")."""
+    words = []
+    for w in re.findall(r"[a-z]+", str(name).lower()):
+        if w.endswith("ies") and len(w) > 4:
+            w = w[:-3] + "y"
+        elif w.endswith("oes"):
+            w = w[:-2]
+        elif w.endswith("s") and not w.endswith("ss") and len(w) > 3:
+            w = w[:-1]
+        words.append(w)
+    return words
+
+
+def _contains(words, phrase):
+    """True if `phrase` (a list of words) appears in `words` as a run."""
+    n = len(phrase)
+    return n > 0 and any(words[i:i + n] == phrase for i in range(len(words) - n + 1))
+
+
+def _strip(words, phrases):
+    """`words` with every run matching one of `phrases` removed."""
+    out, i = [], 0
+    while i < len(words):
+        hit = next((p for p in phrases if words[i:i + len(p)] == p), None)
+        if hit:
+            i += len(hit)
+        else:
+            out.append(words[i])
+            i += 1
+    return out
+
+
+def excluded_recipes(diet=None, allergies=None):
+    """Recipe IDs containing an ingredient the diet or the allergy list rules out."""
+    words, categories = DIET_EXCLUDES.get(diet, ([], []))
+    allergies = [a.strip() for a in (allergies or "").split(",") if a.strip()]
+    if not words and not categories and not allergies:
+        return set()
+
+    diet_terms = [_words(w) for w in words]
+    allergy_terms = [_words(a) for a in allergies]
+    plant_based = [_words(p) for p in PLANT_BASED]
+    # Allergies may also name a whole category (e.g. "Nuts")
+    categories = {c.lower() for c in categories} | {a.lower() for a in allergies}
+
+    ingredients = fetch("SELECT Ingredient_ID, Ingredient_Name, Category FROM Ingredient")
+    ids = []
+    for ingredient_id, name, category in ingredients.itertuples(index=False):
+        name_words = _words(name)
+        diet_words = _strip(name_words, plant_based)
+        if (str(category).lower() in categories
+                or any(_contains(diet_words, t) for t in diet_terms)
+                or any(_contains(name_words, t) for t in allergy_terms)):
+            ids.append(int(ingredient_id))
+    if not ids:
+        return set()
+
+    df = pd.read_sql(text("""
+        SELECT DISTINCT Recipe_ID FROM Recipe_Ingredient WHERE Ingredient_ID IN :ids
+    """).bindparams(bindparam("ids", expanding=True)), engine, params={"ids": ids})
+    return set(df["Recipe_ID"].tolist())
+
+
+# -----------------------------
+# OPTIMIZER
+# -----------------------------
+def _slot_error(values, target):
+    """Weighted squared relative error of nutrient rows against one target vector."""
+    rel = (values - target) / np.maximum(target, 1e-6)
+    return (rel ** 2) @ WEIGHTS
+
+
+def optimize(matrix, targets, time_budget=TIME_BUDGET, seed=None):
+    """
+    Pick one distinct row of `matrix` (recipes x nutrients) for each of the
+    7 x 4 slots. Returns a (7, 4) array of row indices.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(matrix)
+    slots = len(DAYS) * len(MEALS)
+    if n < slots:
+        raise ValueError(f"Only {n} recipes match; need at least {slots} for a week without repeats")
+
+    # Pool of best-fitting candidates per meal type (vectorized over all recipes)
+    meal_targets = np.array([targets * MEAL_SHARE[m] for m in MEALS])
+    pools = []
+    for m in range(len(MEALS)):
+        err = _slot_error(matrix, meal_targets[m])
+        k = min(POOL_SIZE, n)
+        pool = np.argpartition(err, k - 1)[:k]
+        pools.append(pool[np.argsort(err[pool])])
+
+    # Greedy fill: per slot, best unused pool candidate (ties broken randomly)
+    used = np.zeros(n, dtype=bool)
+    plan = np.empty((len(DAYS), len(MEALS)), dtype=np.int64)
+    for d in range(len(DAYS)):
+        for m in rng.permutation(len(MEALS)):
+            free = pools[m][~used[pools[m]]]
+            if len(free) == 0:
+                free = np.flatnonzero(~used)
+            pick = free[min(int(rng.integers(0, 3)), len(free) - 1)]
+            plan[d, m] = pick
+            used[pick] = True
+
+    # Local search on whole-day totals until no slot improves or time runs out
+    deadline = time.perf_counter() + time_budget
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for d in rng.permutation(len(DAYS)):
+            for m in rng.permutation(len(MEALS)):
+                if time.perf_counter() >= deadline:
+                    break
+                day_total = matrix[plan[d]].sum(axis=0)
+                current = _slot_error(day_total[None, :], targets)[0]
+
+                cand = pools[m][~used[pools[m]]]
+                if len(cand) == 0:
+                    continue
+                trial = day_total - matrix[plan[d, m]] + matrix[cand]
+                errs = _slot_error(trial, targets)
+                best = int(np.argmin(errs))
+                if errs[best] < current - 1e-9:
+                    used[plan[d, m]] = False
+                    plan[d, m] = cand[best]
+                    used[cand[best]] = True
+                    improved = True
+    return plan
+
+
+# -----------------------------
+# GENERATE + SAVE
+# -----------------------------
+def generate_plan(user, time_budget=TIME_BUDGET, seed=None):
+    """
+    Build a week for `user` (a User row). Returns (plan DataFrame with one
+    row per slot, daily totals DataFrame, daily targets Series).
+    """
+    targets = daily_targets(user)
+    candidates = load_candidates()
+
+    diet = _get(user, "Dietary_Preferences")
+    excluded = excluded_recipes(diet, _get(user, "Allergies"))
+    if excluded:
+        candidates = candidates[~candidates["Recipe_ID"].isin(excluded)]
+
+    matrix = candidates[NUTRIENTS].to_numpy(dtype="float64")
+    if diet == "Keto":
+        keep = matrix[:, 1] * 4 <= 0.10 * matrix[:, 0]
+        candidates, matrix = candidates[keep], matrix[keep]
+
+    plan = optimize(matrix, targets, time_budget, seed)
+
+    rows = []
+    for d, day in enumerate(DAYS):
+        for m, meal in enumerate(MEALS):
+            rec = candidates.iloc[plan[d, m]]
+            rows.append({"Day_Of_Week": day, "Meal_Type": meal, "Recipe_ID": int(rec["Recipe_ID"]),
+                         "Recipe_Name": rec["Recipe_Name"],
+                         **{c: round(float(rec[c]), 1) for c in NUTRIENTS}})
+    plan_df = pd.DataFrame(rows)
+
+    totals = plan_df.groupby("Day_Of_Week", sort=False)[NUTRIENTS].sum().round(1)
+    return plan_df, totals, pd.Series(np.round(targets, 1), index=NUTRIENTS)
+
+
+def save_plan(mealplan_id, plan_df):
+    """Replace the plan's items with the generated week in one transaction."""
+    items = [{"mp": int(mealplan_id), "rid": int(r.Recipe_ID), "mt": r.Meal_Type,
+              "d": r.Day_Of_Week, "so": i}
+             for i, r in enumerate(plan_df.itertuples())]
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM MealPlan_Recipes WHERE MealPlan_ID = :mp"), {"mp": int(mealplan_id)})
+        # executemany: PyMySQL sends this as a single multi-row INSERT
+        conn.execute(text("""
+            INSERT INTO MealPlan_Recipes (MealPlan_ID, Recipe_ID, Meal_Type, Day_Of_Week, Sort_Order)
+            VALUES (:mp, :rid, :mt, :d, :so)
+        """), items)
+    invalidate(["MealPlan_Recipes"])
@@ -0,0 +1,158 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+import pandas as pd
+
+# -------- CONFIG --------
+# Latency samples kept per (section, kind, query) for percentile estimates
+SAMPLE_WINDOW = 2000
+
+# Distinct (section, kind, query) keys kept; the least recently used go first.
+# Queries with inlined values would otherwise grow the table without bound.
+MAX_KEYS = int(os.environ.get("QUERY_METRICS_MAX_KEYS", 5000))
+
+# When set, metrics are also written to this JSON file at process exit
+DUMP_PATH = os.environ.get("QUERY_METRICS_FILE")
+
+_section = contextvars.ContextVar("query_section", default="-")
+
+# (section, kind, query) -> stats dict, least recently used first
+_stats = OrderedDict()
+_evicted = 0
+_lock = threading.Lock()
+
+
+# -------- SECTION TAGGING --------
+def set_section(name):
+    """Tag queries issued from now on (in this script run) with a portal section."""
+    _section.set(name)
+
+
+def current_section():
+    return _section.get()
+
+
+# -------- RECORDING --------
+def _normalize(query):
+    return " ".join(str(query).split())
+
+
+def _size_of(kind, result):
+    """(rows, bytes) for a query result."""
+    if isinstance(result, pd.DataFrame):
+        return len(result), int(result.memory_usage(deep=True).sum())
+    if kind == "run_query" and isinstance(result, int):
+        # run_query returns the affected row count; other ints are values
+        return result, 0
+    if result is None:
+        return 0, 0
+    return 1, len(str(result))
+
+
+def record(kind, query, seconds, rows=0, nbytes=0, error=False):
+    global _evicted
+    key = (current_section(), kind, _normalize(query))
+    with _lock:
+        s = _stats.get(key)
+        if s is None:
+            s = _stats[key] = {
+                "calls": 0, "errors": 0, "rows": 0, "bytes": 0,
+                "total_s": 0.0, "max_s": 0.0, "samples": deque(maxlen=SAMPLE_WINDOW),
+            }
+            while len(_stats) > MAX_KEYS:
+                _stats.popitem(last=False)
+                _evicted += 1
+        else:
+            _stats.move_to_end(key)
+        s["calls"] += 1
+        s["errors"] += int(error)
+        s["rows"] += rows
+        s["bytes"] += nbytes
+        s["total_s"] += seconds
+        s["max_s"] = max(s["max_s"], seconds)
+        s["samples"].append(seconds)
+
+
+def instrumented(kind, describe=lambda *a, **kw: a[0] if a else ""):
+    """
+    Decorator recording latency, rows and bytes of a data-access call.
+    `describe` turns the call arguments into the query label.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                record(kind, describe(*args, **kwargs), time.perf_counter() - start, error=True)
+                raise
+            rows, nbytes = _size_of(kind, result)
+            record(kind, describe(*args, **kwargs), time.perf_counter() - start, rows, nbytes)
+            return result
+        return inner
+    return wrap
+
+
+# -------- REPORTING --------
+def _percentile(sorted_samples, p):
+    if not sorted_samples:
+        return 0.0
+    idx = min(len(sorted_samples) - 1, int(round(p / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[idx]
+
+
+def snapshot():
+    """One row per (section, kind, query) with call counts and p50/p95/p99 in ms."""
+    with _lock:
+        items = [(k, dict(v, samples=sorted(v["samples"]))) for k, v in _stats.items()]
+
+    rows = []
+    for (section, kind, query), s in items:
+        rows.append({
+            "section": section,
+            "kind": kind,
+            "query": query,
+            "calls": s["calls"],
+            "errors": s["errors"],
+            "p50_ms": round(_percentile(s["samples"], 50) * 1000, 2),
+            "p95_ms": round(_percentile(s["samples"], 95) * 1000, 2),
+            "p99_ms": round(_percentile(s["samples"], 99) * 1000, 2),
+            "max_ms": round(s["max_s"] * 1000, 2),
+            "avg_ms": round(s["total_s"] / s["calls"] * 1000, 2),
+            "rows": s["rows"],
+            "bytes": s["bytes"],
+        })
+    rows.sort(key=lambda r: r["p95_ms"], reverse=True)
+    return rows
+
+
+def evicted():
+    """Keys dropped because more than MAX_KEYS distinct queries were seen."""
+    return _evicted
+
+
+def to_json():
+    return json.dumps({"generated_at": time.time(), "evicted_keys": _evicted, "queries": snapshot()}, indent=2)
+
+
+def dump_json(path):
+    """Write the current metrics to a JSON file for offline analysis."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(to_json())
+
+
+def reset():
+    global _evicted
+    with _lock:
+        _stats.clear()
+        _evicted = 0
+
+
+if DUMP_PATH:
+    atexit.register(lambda: dump_json(DUMP_PATH))
@@ -0,0 +1,298 @@
+# migrate.py
+"""
+Apply versioned schema migrations from migrations/ in order.
+
+    python migrate.py              # apply pending migrations, then check plans
+    python migrate.py --status     # list applied / pending versions
+    python migrate.py --explain    # only run the query plan check
+
+Migration files are named NNNN_description.sql and may use DELIMITER
+blocks like dbms_miniproject_Final.sql. Applied versions are recorded in
+Schema_Migrations. After every migration each portal query (see
+portal_queries.py) is EXPLAINed and any full table scan is reported.
+"""
+import argparse
+import hashlib
+import os
+import re
+from sqlalchemy import text
+from database import load_db_config, make_engine
+from portal_queries import QUERIES, FULL_SCANS
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# A database loaded from dbms_miniproject_Final.sql already has this version
+BASELINE_VERSION = 1
+
+# 0001 also holds the recipe nutrition summary, which older copies of the
+# script lack. Adopting such a database creates the missing objects, fills
+# the summary and replaces the routines that now read it.
+SUMMARY_TABLE = "Recipe_Nutrition_Summary"
+SUMMARY_BACKFILL = "CALL RebuildRecipeNutritionSummary()"
+SUMMARY_READERS = {"GetMealPlanSummary": "PROCEDURE"}
+
+_CREATE_RE = re.compile(r"^\s*CREATE\s+(TABLE|PROCEDURE|FUNCTION|TRIGGER)\s+`?(\w+)`?", re.IGNORECASE)
+
+engine = make_engine()
+
+
+# -----------------------------
+# MIGRATION FILES
+# -----------------------------
+def discover(directory=MIGRATIONS_DIR):
+    """[(version, name, path, checksum)] sorted by version."""
+    found = []
+    for fname in sorted(os.listdir(directory)):
+        m = FILE_PATTERN.match(fname)
+        if not m:
+            continue
+        path = os.path.join(directory, fname)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found.append((int(m.group(1)), m.group(2), path, checksum))
+
+    versions = [v for v, *_ in found]
+    if len(versions) != len(set(versions)):
+        raise SystemExit("❌ Two migration files share a version number.")
+    return found
+
+
+def split_statements(sql):
+    """
+    Split a script into single statements, honouring DELIMITER lines the
+    way the mysql client does. Comment-only chunks are dropped and the
+    trailing ';' of routine bodies (END;) is removed.
+    """
+    statements, buf, delimiter = [], [], ";"
+
+    def flush():
+        stmt = "\n".join(buf).strip()
+        buf.clear()
+        body = "\n".join(l for l in stmt.splitlines() if not l.strip().startswith("--")).strip()
+        if body:
+            statements.append(stmt.rstrip(";").rstrip())
+
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith("DELIMITER "):
+            flush()
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if stripped.endswith(delimiter) and not stripped.startswith("--"):
+            buf.append(line.rstrip()[:-len(delimiter)])
+            flush()
+        else:
+            buf.append(line)
+    flush()
+    return statements
+
+
+# -----------------------------
+# VERSION TABLE
+# -----------------------------
+def ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS Schema_Migrations (
+          Version INT PRIMARY KEY,
+          Name VARCHAR(150) NOT NULL,
+          Checksum CHAR(64) NOT NULL,
+          Applied_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """))
+
+
+def applied_versions(conn):
+    rows = conn.execute(text("SELECT Version, Checksum FROM Schema_Migrations")).fetchall()
+    return {v: c for v, c in rows}
+
+
+def record(conn, version, name, checksum):
+    conn.execute(text(
+        "INSERT INTO Schema_Migrations (Version, Name, Checksum) VALUES (:v, :n, :c)"
+    ), {"v": version, "n": name, "c": checksum})
+
+
+def existing_objects(conn):
+    """{(kind, lowercased name)} of the tables, routines and triggers in this database."""
+    found = {("TABLE", n.lower()) for (n,) in conn.execute(text(
+        "SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()"))}
+    found |= {(t.upper(), n.lower()) for t, n in conn.execute(text(
+        "SELECT ROUTINE_TYPE, ROUTINE_NAME FROM information_schema.ROUTINES WHERE ROUTINE_SCHEMA = DATABASE()"))}
+    found |= {("TRIGGER", n.lower()) for (n,) in conn.execute(text(
+        "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()"))}
+    return found
+
+
+def _created(stmt):
+    """(kind, name) of a CREATE statement, ignoring leading comment lines; None otherwise."""
+    code = "\n".join(l for l in stmt.splitlines() if not l.strip().startswith("--"))
+    m = _CREATE_RE.match(code)
+    return (m.group(1).upper(), m.group(2)) if m else None
+
+
+def adopt_baseline(conn, migrations):
+    """
+    Mark the baseline as applied on databases built from the SQL script,
+    first creating whatever baseline objects that copy of the script lacked.
+    """
+    baseline = next((m for m in migrations if m[0] == BASELINE_VERSION), None)
+    existing = existing_objects(conn)
+    if baseline is None or ("TABLE", "user") not in existing:
+        return False
+    version, name, path, checksum = baseline
+
+    with open(path, encoding="utf-8") as f:
+        statements = {created: stmt for stmt in split_statements(f.read()) if (created := _created(stmt))}
+    missing = [(kind, obj) for kind, obj in statements if (kind, obj.lower()) not in existing]
+
+    summary_added = ("TABLE", SUMMARY_TABLE) in missing
+    if summary_added:
+        # The script's versions of these do not use the summary yet
+        for obj, kind in SUMMARY_READERS.items():
+            if (kind, obj.lower()) in existing:
+                conn.exec_driver_sql(f"DROP {kind} {obj}")
+                missing.append((kind, obj))
+
+    # In file order: tables before the routines and triggers that use them
+    for kind, obj in statements:
+        if (kind, obj) in missing:
+            print(f"  + {kind.lower()} {obj}")
+            conn.exec_driver_sql(statements[(kind, obj)])
+    if summary_added:
+        conn.exec_driver_sql(SUMMARY_BACKFILL)
+
+    record(conn, version, name, checksum)
+    return True
+
+
+# -----------------------------
+# PLAN CHECK
+# -----------------------------
+def plan_params():
+    """Real key values so EXPLAIN sees a representative lookup (1 on an empty DB)."""
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT (SELECT MIN(User_ID) FROM User),
+                   (SELECT Email FROM User ORDER BY User_ID LIMIT 1),
+                   (SELECT MIN(MealPlan_ID) FROM Meal_Plan),
+                   (SELECT MIN(Recipe_ID) FROM Recipe)
+        """)).fetchone()
+    u, email, mp, rid = row
+    return {"u": u or 1, "email": email or "", "mp": mp or 1, "rid": rid or 1}
+
+
+def check_plans(names=None):
+    """
+    EXPLAIN every portal query; returns {query: [tables read with a full scan]}
+    for queries that are expected to use an index.
+    """
+    params = plan_params()
+    problems = {}
+    with engine.connect() as conn:
+        for name in names or QUERIES:
+            _, sql = QUERIES[name]
+            result = conn.execute(text("EXPLAIN " + sql.strip()), params)
+            cols = list(result.keys())
+            scans = [r[cols.index("table")] for r in result if r[cols.index("type")] == "ALL"]
+            if scans and name not in FULL_SCANS:
+                problems[name] = scans
+    return problems
+
+
+def report_plans(strict):
+    print("\n🔍 Checking portal query plans...")
+    problems = check_plans()
+    if not problems:
+        print("✔ Every portal query uses an index.")
+        return True
+    for name, tables in problems.items():
+        print(f"  ⚠ {name}: full scan of {', '.join(tables)}")
+    if strict:
+        raise SystemExit(1)
+    return False
+
+
+# -----------------------------
+# RUN
+# -----------------------------
+def migrate(target=None, check=True, strict=False):
+    migrations = discover()
+
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+        applied = applied_versions(conn)
+        if not applied and adopt_baseline(conn, migrations):
+            print(f"📌 Existing schema found, marked version {BASELINE_VERSION:04d} as applied.")
+            applied = applied_versions(conn)
+
+    for version, name, path, checksum in migrations:
+        if version in applied and applied[version] != checksum:
+            print(f"⚠ {version:04d}_{name} changed after it was applied; it will not be re-run.")
+
+    pending = [m for m in migrations if m[0] not in applied and (target is None or m[0] <= target)]
+    if not pending:
+        print("✔ Schema is up to date.")
+
+    for version, name, path, checksum in pending:
+        print(f"🔧 Applying {version:04d}_{name}...")
+        with open(path, encoding="utf-8") as f:
+            statements = split_statements(f.read())
+
+        # MySQL commits DDL implicitly, so a failed migration is not rolled
+        # back; it stays pending and has to be fixed and re-run by hand.
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.exec_driver_sql(stmt)
+            record(conn, version, name, checksum)
+        print(f"✅ {version:04d}_{name} applied ({len(statements)} statements)")
+
+        if check:
+            report_plans(strict)
+
+
+def status():
+    migrations = discover()
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+        applied = applied_versions(conn)
+    for version, name, _, checksum in migrations:
+        if version not in applied:
+            state = "pending"
+        elif applied[version] != checksum:
+            state = "applied (file changed)"
+        else:
+            state = "applied"
+        print(f"  {version:04d}_{name:<30} {state}")
+
+
+def create_database():
+    """CREATE DATABASE for a fresh server, using the configured name."""
+    config = load_db_config()
+    server = make_engine(dict(config, name=""))
+    with server.begin() as conn:
+        conn.exec_driver_sql(f"CREATE DATABASE IF NOT EXISTS `{config['name']}`")
+    server.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    parser.add_argument("--explain", action="store_true", help="only check query plans")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    parser.add_argument("--create-db", action="store_true", help="create the database first")
+    parser.add_argument("--no-check", action="store_true", help="skip the EXPLAIN check")
+    parser.add_argument("--strict", action="store_true",
+                        help="exit non-zero when a portal query does a full scan")
+    args = parser.parse_args()
+
+    if args.create_db:
+        create_database()
+
+    if args.status:
+        status()
+    elif args.explain:
+        if not report_plans(args.strict):
+            raise SystemExit(1)
+    else:
+        migrate(args.target, check=not args.no_check, strict=args.strict)
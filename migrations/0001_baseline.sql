@@ -0,0 +1,470 @@
+-- =========================================================
+-- 0001 BASELINE
+-- Schema, routines and triggers as shipped in dbms_miniproject_Final.sql.
+-- Databases created from that script are marked as already at this
+-- version by migrate.py instead of re-running it.
+-- =========================================================
+
+-- =========================================================
+-- USER TABLE
+-- =========================================================
+CREATE TABLE User (
+  User_ID INT AUTO_INCREMENT PRIMARY KEY,
+  Name VARCHAR(100) NOT NULL,
+  Email VARCHAR(255) NOT NULL UNIQUE,
+  Password VARCHAR(255) NOT NULL,
+  Gender ENUM('Male','Female','Other') DEFAULT 'Other',
+  Date_Of_Birth DATE,
+  Height_cm SMALLINT UNSIGNED CHECK (Height_cm > 0),
+  Weight_kg DECIMAL(5,2) CHECK (Weight_kg > 0),
+  Activity_Level ENUM('Sedentary','Light','Moderate','Active','Very Active') DEFAULT 'Moderate',
+  Dietary_Preferences VARCHAR(100),
+  Allergies VARCHAR(255),
+  BMI DECIMAL(5,2) DEFAULT NULL,
+  role ENUM('user','admin') NOT NULL DEFAULT 'user',
+  Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- RECIPE TABLE
+-- =========================================================
+CREATE TABLE Recipe (
+  Recipe_ID INT AUTO_INCREMENT PRIMARY KEY,
+  Recipe_Name VARCHAR(200) NOT NULL,
+  Description TEXT,
+  Cuisine_Type VARCHAR(100),
+  Preparation_Time_minutes SMALLINT UNSIGNED DEFAULT 0,
+  Cooking_Time_minutes SMALLINT UNSIGNED DEFAULT 0,
+  Serving_Size DECIMAL(4,2) NOT NULL DEFAULT 1,
+  Difficulty_Level ENUM('Easy','Medium','Hard') DEFAULT 'Easy',
+  Instructions TEXT,
+  Creator_User_ID INT,
+  Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  CONSTRAINT fk_recipe_creator
+    FOREIGN KEY (Creator_User_ID) REFERENCES User(User_ID)
+    ON DELETE SET NULL ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- INGREDIENT TABLE
+-- =========================================================
+CREATE TABLE Ingredient (
+  Ingredient_ID INT AUTO_INCREMENT PRIMARY KEY,
+  Ingredient_Name VARCHAR(150) NOT NULL UNIQUE,
+  Unit_Of_Measure VARCHAR(50) NOT NULL,
+  Category VARCHAR(50) NOT NULL,
+  Notes VARCHAR(255),
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- NUTRITION TABLE
+-- =========================================================
+CREATE TABLE Nutrition (
+  Nutrition_ID INT AUTO_INCREMENT PRIMARY KEY,
+  Ingredient_ID INT NOT NULL UNIQUE,
+  Calories DECIMAL(6,2) DEFAULT 0,
+  Carbohydrates_g DECIMAL(6,2) DEFAULT 0,
+  Protein_g DECIMAL(6,2) DEFAULT 0,
+  Fat_g DECIMAL(6,2) DEFAULT 0,
+  Fiber_g DECIMAL(6,2) DEFAULT 0,
+  Vitamins VARCHAR(255),
+  Minerals VARCHAR(255),
+  Other_Nutrients TEXT,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  CONSTRAINT fk_nutrition_ingredient
+    FOREIGN KEY (Ingredient_ID) REFERENCES Ingredient(Ingredient_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- RECIPE INGREDIENT TABLE
+-- =========================================================
+CREATE TABLE Recipe_Ingredient (
+  RecipeIngredient_ID INT AUTO_INCREMENT PRIMARY KEY,
+  Recipe_ID INT NOT NULL,
+  Ingredient_ID INT NOT NULL,
+  Quantity DECIMAL(8,3) NOT NULL CHECK (Quantity > 0),
+  Unit VARCHAR(50) NOT NULL,
+
+  CONSTRAINT fk_ri_recipe
+    FOREIGN KEY (Recipe_ID)
+    REFERENCES Recipe(Recipe_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+
+  CONSTRAINT fk_ri_ingredient
+    FOREIGN KEY (Ingredient_ID)
+    REFERENCES Ingredient(Ingredient_ID)
+    ON DELETE RESTRICT ON UPDATE CASCADE,
+
+  UNIQUE (Recipe_ID, Ingredient_ID)
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- USER DIET LOG
+-- =========================================================
+CREATE TABLE User_Diet_Log (
+  Log_ID INT AUTO_INCREMENT PRIMARY KEY,
+  User_ID INT,
+  Recipe_ID INT,
+  Date DATE NOT NULL,
+  Time TIME,
+  Portion_Size DECIMAL(5,2) DEFAULT 1,
+  Notes TEXT,
+  is_finished BOOLEAN DEFAULT FALSE,
+  Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (User_ID) REFERENCES User(User_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+
+  FOREIGN KEY (Recipe_ID) REFERENCES Recipe(Recipe_ID)
+    ON DELETE SET NULL ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- MEAL PLAN
+-- =========================================================
+CREATE TABLE Meal_Plan (
+  MealPlan_ID INT AUTO_INCREMENT PRIMARY KEY,
+  User_ID INT,
+  Plan_Name VARCHAR(150) NOT NULL,
+  Start_Date DATE,
+  End_Date DATE,
+  Notes TEXT,
+  Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (User_ID) REFERENCES User(User_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- MEAL PLAN RECIPES (FINAL)
+-- =========================================================
+CREATE TABLE MealPlan_Recipes (
+  MPR_ID INT AUTO_INCREMENT PRIMARY KEY,
+  MealPlan_ID INT NOT NULL,
+  Recipe_ID INT NOT NULL,
+  Meal_Type ENUM('Breakfast','Lunch','Dinner','Snack'),
+  Day_Of_Week VARCHAR(16),
+  Sort_Order INT DEFAULT 0,
+  Added_On DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (MealPlan_ID) REFERENCES Meal_Plan(MealPlan_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+
+  FOREIGN KEY (Recipe_ID) REFERENCES Recipe(Recipe_ID)
+    ON DELETE RESTRICT ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- FEEDBACK TABLE
+-- =========================================================
+CREATE TABLE Feedback (
+  Feedback_ID INT AUTO_INCREMENT PRIMARY KEY,
+  User_ID INT NOT NULL,
+  Recipe_ID INT NOT NULL,
+  Rating TINYINT UNSIGNED NOT NULL CHECK (Rating BETWEEN 1 AND 5),
+  Comments TEXT,
+  Date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (User_ID) REFERENCES User(User_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+
+  FOREIGN KEY (Recipe_ID) REFERENCES Recipe(Recipe_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- LOG TABLES
+-- =========================================================
+CREATE TABLE Recipe_Log (
+  Log_ID INT AUTO_INCREMENT PRIMARY KEY,
+  Recipe_ID INT,
+  Recipe_Name VARCHAR(200),
+  Created_By INT,
+  Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+CREATE TABLE User_Weight_History (
+  History_ID INT AUTO_INCREMENT PRIMARY KEY,
+  User_ID INT,
+  Old_Weight DECIMAL(5,2),
+  New_Weight DECIMAL(5,2),
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (User_ID) REFERENCES User(User_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- RECIPE NUTRITION SUMMARY (materialized, maintained by triggers)
+-- =========================================================
+CREATE TABLE Recipe_Nutrition_Summary (
+  Recipe_ID INT PRIMARY KEY,
+  Calories DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Carbohydrates_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Protein_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Fat_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Fiber_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (Recipe_ID) REFERENCES Recipe(Recipe_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- =========================================================
+-- RECIPE NUTRITION SUMMARY HELPERS
+-- =========================================================
+DELIMITER //
+CREATE PROCEDURE ApplyRecipeNutritionDelta(
+  IN p_recipeId INT,
+  IN p_ingredientId INT,
+  IN p_quantity DECIMAL(9,3)
+)
+BEGIN
+  INSERT INTO Recipe_Nutrition_Summary
+    (Recipe_ID, Calories, Carbohydrates_g, Protein_g, Fat_g, Fiber_g)
+  SELECT
+    p_recipeId,
+    p_quantity * IFNULL(n.Calories, 0) / 100,
+    p_quantity * IFNULL(n.Carbohydrates_g, 0) / 100,
+    p_quantity * IFNULL(n.Protein_g, 0) / 100,
+    p_quantity * IFNULL(n.Fat_g, 0) / 100,
+    p_quantity * IFNULL(n.Fiber_g, 0) / 100
+  FROM Nutrition n
+  WHERE n.Ingredient_ID = p_ingredientId
+  ON DUPLICATE KEY UPDATE
+    Calories        = Recipe_Nutrition_Summary.Calories        + VALUES(Calories),
+    Carbohydrates_g = Recipe_Nutrition_Summary.Carbohydrates_g + VALUES(Carbohydrates_g),
+    Protein_g       = Recipe_Nutrition_Summary.Protein_g       + VALUES(Protein_g),
+    Fat_g           = Recipe_Nutrition_Summary.Fat_g           + VALUES(Fat_g),
+    Fiber_g         = Recipe_Nutrition_Summary.Fiber_g         + VALUES(Fiber_g);
+END;
+//
+
+CREATE PROCEDURE RebuildRecipeNutritionSummary()
+BEGIN
+  DELETE FROM Recipe_Nutrition_Summary;
+
+  INSERT INTO Recipe_Nutrition_Summary
+    (Recipe_ID, Calories, Carbohydrates_g, Protein_g, Fat_g, Fiber_g)
+  SELECT
+    r.Recipe_ID,
+    IFNULL(SUM(ri.Quantity * n.Calories / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Carbohydrates_g / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Protein_g / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Fat_g / 100), 0),
+    IFNULL(SUM(ri.Quantity * n.Fiber_g / 100), 0)
+  FROM Recipe r
+  LEFT JOIN Recipe_Ingredient ri ON ri.Recipe_ID = r.Recipe_ID
+  LEFT JOIN Nutrition n ON n.Ingredient_ID = ri.Ingredient_ID
+  GROUP BY r.Recipe_ID;
+END;
+//
+DELIMITER ;
+
+-- =========================================================
+-- TRIGGERS
+-- =========================================================
+DELIMITER //
+CREATE TRIGGER trg_after_recipe_insert
+AFTER INSERT ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT INTO Recipe_Log (Recipe_ID, Recipe_Name, Created_By)
+  VALUES (NEW.Recipe_ID, NEW.Recipe_Name, NEW.Creator_User_ID);
+END;
+//
+
+CREATE TRIGGER trg_update_bmi
+BEFORE UPDATE ON User
+FOR EACH ROW
+BEGIN
+  IF NEW.Height_cm IS NOT NULL AND NEW.Weight_kg IS NOT NULL THEN
+    SET NEW.BMI = ROUND(NEW.Weight_kg / POW(NEW.Height_cm / 100, 2), 2);
+  END IF;
+END;
+//
+
+-- ---------------------------------------------------------
+-- Recipe_Nutrition_Summary maintenance
+-- (cascaded FK deletes do not fire triggers; the summary row
+--  itself cascades away with its Recipe)
+-- ---------------------------------------------------------
+CREATE TRIGGER trg_recipe_summary_insert
+AFTER INSERT ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT IGNORE INTO Recipe_Nutrition_Summary (Recipe_ID) VALUES (NEW.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_ri_summary_insert
+AFTER INSERT ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  CALL ApplyRecipeNutritionDelta(NEW.Recipe_ID, NEW.Ingredient_ID, NEW.Quantity);
+END;
+//
+
+CREATE TRIGGER trg_ri_summary_update
+AFTER UPDATE ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  CALL ApplyRecipeNutritionDelta(OLD.Recipe_ID, OLD.Ingredient_ID, -OLD.Quantity);
+  CALL ApplyRecipeNutritionDelta(NEW.Recipe_ID, NEW.Ingredient_ID, NEW.Quantity);
+END;
+//
+
+CREATE TRIGGER trg_ri_summary_delete
+AFTER DELETE ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  CALL ApplyRecipeNutritionDelta(OLD.Recipe_ID, OLD.Ingredient_ID, -OLD.Quantity);
+END;
+//
+
+CREATE TRIGGER trg_nutrition_summary_insert
+AFTER INSERT ON Nutrition
+FOR EACH ROW
+BEGIN
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        + ri.Quantity * IFNULL(NEW.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g + ri.Quantity * IFNULL(NEW.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       + ri.Quantity * IFNULL(NEW.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           + ri.Quantity * IFNULL(NEW.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         + ri.Quantity * IFNULL(NEW.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = NEW.Ingredient_ID;
+END;
+//
+
+CREATE TRIGGER trg_nutrition_summary_update
+AFTER UPDATE ON Nutrition
+FOR EACH ROW
+BEGIN
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        - ri.Quantity * IFNULL(OLD.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g - ri.Quantity * IFNULL(OLD.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       - ri.Quantity * IFNULL(OLD.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           - ri.Quantity * IFNULL(OLD.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         - ri.Quantity * IFNULL(OLD.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = OLD.Ingredient_ID;
+
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        + ri.Quantity * IFNULL(NEW.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g + ri.Quantity * IFNULL(NEW.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       + ri.Quantity * IFNULL(NEW.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           + ri.Quantity * IFNULL(NEW.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         + ri.Quantity * IFNULL(NEW.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = NEW.Ingredient_ID;
+END;
+//
+
+CREATE TRIGGER trg_nutrition_summary_delete
+AFTER DELETE ON Nutrition
+FOR EACH ROW
+BEGIN
+  UPDATE Recipe_Nutrition_Summary s
+  JOIN Recipe_Ingredient ri ON ri.Recipe_ID = s.Recipe_ID
+  SET s.Calories        = s.Calories        - ri.Quantity * IFNULL(OLD.Calories, 0) / 100,
+      s.Carbohydrates_g = s.Carbohydrates_g - ri.Quantity * IFNULL(OLD.Carbohydrates_g, 0) / 100,
+      s.Protein_g       = s.Protein_g       - ri.Quantity * IFNULL(OLD.Protein_g, 0) / 100,
+      s.Fat_g           = s.Fat_g           - ri.Quantity * IFNULL(OLD.Fat_g, 0) / 100,
+      s.Fiber_g         = s.Fiber_g         - ri.Quantity * IFNULL(OLD.Fiber_g, 0) / 100
+  WHERE ri.Ingredient_ID = OLD.Ingredient_ID;
+END;
+//
+DELIMITER ;
+
+-- =========================================================
+-- FUNCTIONS
+-- =========================================================
+DELIMITER //
+CREATE FUNCTION CalculateBMI(height_cm DECIMAL(6,2), weight_kg DECIMAL(6,2))
+RETURNS DECIMAL(5,2)
+DETERMINISTIC
+BEGIN
+  IF height_cm <= 0 THEN RETURN NULL; END IF;
+  RETURN ROUND(weight_kg / POW(height_cm/100,2), 2);
+END;
+//
+
+CREATE FUNCTION GetRecipeCalories(recipeId INT)
+RETURNS DECIMAL(10,2)
+DETERMINISTIC
+BEGIN
+  DECLARE total DECIMAL(10,2);
+
+  SELECT SUM((n.Calories / 100) * ri.Quantity)
+  INTO total
+  FROM Recipe_Ingredient ri
+  JOIN Nutrition n ON n.Ingredient_ID = ri.Ingredient_ID
+  WHERE ri.Recipe_ID = recipeId;
+
+  RETURN IFNULL(total,0);
+END;
+//
+DELIMITER ;
+
+-- =========================================================
+-- STORED PROCEDURES
+-- =========================================================
+DELIMITER //
+CREATE PROCEDURE GetMealPlanSummary(IN userId INT)
+BEGIN
+  SELECT 
+    mp.Plan_Name,
+    mpr.Day_Of_Week,
+    mpr.Meal_Type,
+    r.Recipe_Name,
+    ROUND(IFNULL(s.Calories, 0), 2) AS Calories
+  FROM Meal_Plan mp
+  JOIN MealPlan_Recipes mpr ON mp.MealPlan_ID = mpr.MealPlan_ID
+  JOIN Recipe r ON r.Recipe_ID = mpr.Recipe_ID
+  LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+  WHERE mp.User_ID = userId
+  ORDER BY mpr.Day_Of_Week, mpr.Meal_Type;
+END;
+//
+
+CREATE PROCEDURE AddFeedback(
+  IN p_userId INT,
+  IN p_recipeId INT,
+  IN p_rating TINYINT,
+  IN p_comments TEXT
+)
+BEGIN
+  INSERT INTO Feedback (User_ID, Recipe_ID, Rating, Comments, Date)
+  VALUES (p_userId, p_recipeId, p_rating, p_comments, NOW());
+END;
+//
+
+CREATE PROCEDURE UpdateUserWeight(
+  IN p_userId INT,
+  IN p_newWeight DECIMAL(5,2)
+)
+BEGIN
+  DECLARE oldWeight DECIMAL(5,2);
+
+  SELECT Weight_kg INTO oldWeight
+  FROM User
+  WHERE User_ID = p_userId;
+
+  UPDATE User SET Weight_kg = p_newWeight
+  WHERE User_ID = p_userId;
+
+  INSERT INTO User_Weight_History(User_ID, Old_Weight, New_Weight)
+  VALUES (p_userId, oldWeight, p_newWeight);
+END;
+//
+DELIMITER ;
@@ -0,0 +1,53 @@
+-- =========================================================
+-- 0002 COVERING INDEXES FOR PORTAL ACCESS PATHS
+-- Built online (InnoDB in-place, no table lock), so the portals keep
+-- reading and writing while an index is created. The single-column
+-- indexes InnoDB made for the foreign keys are dropped automatically
+-- once a composite index with the same leading column exists.
+-- =========================================================
+
+-- Diet log page (User_ID = ? ORDER BY Date DESC, Time DESC) and daily
+-- totals. Notes is TEXT and cannot be indexed, so the page still reads
+-- the row for it; per-day aggregates are served from the index alone.
+ALTER TABLE User_Diet_Log
+  ADD INDEX idx_udl_user_date (User_ID, Date, Time, Recipe_ID, Portion_Size, is_finished),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Weight history chart (User_ID = ? ORDER BY Updated_At); covers SELECT *
+ALTER TABLE User_Weight_History
+  ADD INDEX idx_uwh_user_time (User_ID, Updated_At, Old_Weight, New_Weight),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Meal plan items (MealPlan_ID = ?) with day and meal type for the ordering
+ALTER TABLE MealPlan_Recipes
+  ADD INDEX idx_mpr_plan_day (MealPlan_ID, Day_Of_Week, Recipe_ID, Meal_Type),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Plans of a user (User_ID = ?)
+ALTER TABLE Meal_Plan
+  ADD INDEX idx_mp_user (User_ID, Start_Date),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Feedback per recipe, incl. rating averages without touching rows
+ALTER TABLE Feedback
+  ADD INDEX idx_fb_recipe_rating (Recipe_ID, Rating),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Nutrition triggers and nutrition.py look up recipes by ingredient
+ALTER TABLE Recipe_Ingredient
+  ADD INDEX idx_ri_ingredient (Ingredient_ID, Recipe_ID, Quantity),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Admin listings: sort columns and prefix / equality filters
+ALTER TABLE Recipe
+  ADD INDEX idx_recipe_name (Recipe_Name),
+  ADD INDEX idx_recipe_cuisine (Cuisine_Type),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE Ingredient
+  ADD INDEX idx_ingredient_category (Category),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE User
+  ADD INDEX idx_user_name (Name),
+  ALGORITHM=INPLACE, LOCK=NONE;
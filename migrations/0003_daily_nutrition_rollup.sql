@@ -0,0 +1,140 @@
+-- =========================================================
+-- 0003 PER-USER DAILY NUTRITION ROLLUP
+-- One row per (User_ID, Date) with the nutrition of every diet log
+-- entry that day (recipe totals x Portion_Size) and of the finished ones.
+-- Diet log triggers recompute the affected day from the covering index
+-- idx_udl_user_date; recipe composition changes only mark the recipe
+-- stale, and daily_nutrition.py refreshes the days that use it in batch.
+-- =========================================================
+
+CREATE TABLE User_Daily_Nutrition (
+  User_ID INT NOT NULL,
+  Date DATE NOT NULL,
+  Entries SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  Finished_Entries SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  Calories DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Carbohydrates_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Protein_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Fat_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Fiber_g DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Finished_Calories DECIMAL(14,4) NOT NULL DEFAULT 0,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  PRIMARY KEY (User_ID, Date),
+
+  FOREIGN KEY (User_ID) REFERENCES User(User_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+-- Recipes whose nutrition changed since their diet log days were rolled up
+CREATE TABLE Daily_Nutrition_Stale (
+  Recipe_ID INT PRIMARY KEY,
+  Marked_At TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB;
+
+DELIMITER //
+CREATE PROCEDURE RefreshUserDailyNutrition(
+  IN p_userId INT,
+  IN p_date DATE
+)
+BEGIN
+  IF p_userId IS NOT NULL THEN
+    DELETE FROM User_Daily_Nutrition WHERE User_ID = p_userId AND Date = p_date;
+
+    INSERT INTO User_Daily_Nutrition
+      (User_ID, Date, Entries, Finished_Entries, Calories, Carbohydrates_g,
+       Protein_g, Fat_g, Fiber_g, Finished_Calories)
+    SELECT
+      l.User_ID, l.Date, COUNT(*), SUM(l.is_finished),
+      IFNULL(SUM(l.Portion_Size * s.Calories), 0),
+      IFNULL(SUM(l.Portion_Size * s.Carbohydrates_g), 0),
+      IFNULL(SUM(l.Portion_Size * s.Protein_g), 0),
+      IFNULL(SUM(l.Portion_Size * s.Fat_g), 0),
+      IFNULL(SUM(l.Portion_Size * s.Fiber_g), 0),
+      IFNULL(SUM(IF(l.is_finished, l.Portion_Size * s.Calories, 0)), 0)
+    FROM User_Diet_Log l
+    LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = l.Recipe_ID
+    WHERE l.User_ID = p_userId AND l.Date = p_date
+    GROUP BY l.User_ID, l.Date;
+  END IF;
+END;
+//
+
+CREATE PROCEDURE RebuildUserDailyNutrition()
+BEGIN
+  DELETE FROM User_Daily_Nutrition;
+  DELETE FROM Daily_Nutrition_Stale;
+
+  INSERT INTO User_Daily_Nutrition
+    (User_ID, Date, Entries, Finished_Entries, Calories, Carbohydrates_g,
+     Protein_g, Fat_g, Fiber_g, Finished_Calories)
+  SELECT
+    l.User_ID, l.Date, COUNT(*), SUM(l.is_finished),
+    IFNULL(SUM(l.Portion_Size * s.Calories), 0),
+    IFNULL(SUM(l.Portion_Size * s.Carbohydrates_g), 0),
+    IFNULL(SUM(l.Portion_Size * s.Protein_g), 0),
+    IFNULL(SUM(l.Portion_Size * s.Fat_g), 0),
+    IFNULL(SUM(l.Portion_Size * s.Fiber_g), 0),
+    IFNULL(SUM(IF(l.is_finished, l.Portion_Size * s.Calories, 0)), 0)
+  FROM User_Diet_Log l
+  LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = l.Recipe_ID
+  WHERE l.User_ID IS NOT NULL
+  GROUP BY l.User_ID, l.Date;
+END;
+//
+
+-- ---------------------------------------------------------
+-- Diet log maintenance. Bulk loaders set @skip_daily_rollup = 1 and
+-- call RebuildUserDailyNutrition() afterwards. Cascaded deletes from
+-- User do not fire these, but the rollup rows cascade with the user.
+-- ---------------------------------------------------------
+CREATE TRIGGER trg_udl_rollup_insert
+AFTER INSERT ON User_Diet_Log
+FOR EACH ROW
+BEGIN
+  IF @skip_daily_rollup IS NULL THEN
+    CALL RefreshUserDailyNutrition(NEW.User_ID, NEW.Date);
+  END IF;
+END;
+//
+
+CREATE TRIGGER trg_udl_rollup_update
+AFTER UPDATE ON User_Diet_Log
+FOR EACH ROW
+BEGIN
+  IF @skip_daily_rollup IS NULL THEN
+    CALL RefreshUserDailyNutrition(NEW.User_ID, NEW.Date);
+    IF NOT (OLD.User_ID <=> NEW.User_ID) OR OLD.Date <> NEW.Date THEN
+      CALL RefreshUserDailyNutrition(OLD.User_ID, OLD.Date);
+    END IF;
+  END IF;
+END;
+//
+
+CREATE TRIGGER trg_udl_rollup_delete
+AFTER DELETE ON User_Diet_Log
+FOR EACH ROW
+BEGIN
+  IF @skip_daily_rollup IS NULL THEN
+    CALL RefreshUserDailyNutrition(OLD.User_ID, OLD.Date);
+  END IF;
+END;
+//
+
+-- Fired by the Recipe_Nutrition_Summary maintenance triggers
+CREATE TRIGGER trg_summary_mark_daily_stale
+AFTER UPDATE ON Recipe_Nutrition_Summary
+FOR EACH ROW
+BEGIN
+  IF OLD.Calories <> NEW.Calories OR OLD.Carbohydrates_g <> NEW.Carbohydrates_g
+     OR OLD.Protein_g <> NEW.Protein_g OR OLD.Fat_g <> NEW.Fat_g
+     OR OLD.Fiber_g <> NEW.Fiber_g THEN
+    INSERT INTO Daily_Nutrition_Stale (Recipe_ID) VALUES (NEW.Recipe_ID)
+    ON DUPLICATE KEY UPDATE Marked_At = CURRENT_TIMESTAMP(6);
+  END IF;
+END;
+//
+DELIMITER ;
+
+-- Existing diet logs
+CALL RebuildUserDailyNutrition();
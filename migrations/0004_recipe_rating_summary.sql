@@ -0,0 +1,102 @@
+-- =========================================================
+-- 0004 RECIPE RATING AGGREGATES
+-- Per-recipe rating count and sum maintained by Feedback triggers, with
+-- the mean and a Bayesian-adjusted score as stored generated columns so
+-- Browse Recipes and the leaderboards sort on an index instead of
+-- grouping Feedback.
+--
+-- Bayesian score = (Rating_Sum + C * m) / (Rating_Count + C) with a prior
+-- of C = 5 ratings at m = 3.0 stars: a recipe needs several good ratings
+-- before it outranks one with a long track record.
+-- =========================================================
+
+CREATE TABLE Recipe_Rating_Summary (
+  Recipe_ID INT PRIMARY KEY,
+  Rating_Count INT UNSIGNED NOT NULL DEFAULT 0,
+  Rating_Sum INT UNSIGNED NOT NULL DEFAULT 0,
+  Avg_Rating DECIMAL(4,3) AS (IF(Rating_Count = 0, NULL, Rating_Sum / Rating_Count)) STORED,
+  Bayesian_Score DECIMAL(5,4) AS ((Rating_Sum + 5 * 3.0) / (Rating_Count + 5)) STORED,
+  Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  INDEX idx_rrs_score (Bayesian_Score, Recipe_ID),
+  INDEX idx_rrs_count (Rating_Count, Recipe_ID),
+
+  FOREIGN KEY (Recipe_ID) REFERENCES Recipe(Recipe_ID)
+    ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB;
+
+DELIMITER //
+CREATE PROCEDURE ApplyRecipeRatingDelta(
+  IN p_recipeId INT,
+  IN p_count INT,
+  IN p_rating INT
+)
+BEGIN
+  INSERT INTO Recipe_Rating_Summary (Recipe_ID, Rating_Count, Rating_Sum)
+  VALUES (p_recipeId, GREATEST(p_count, 0), GREATEST(p_rating, 0))
+  ON DUPLICATE KEY UPDATE
+    Rating_Count = Rating_Count + p_count,
+    Rating_Sum   = Rating_Sum + p_rating;
+END;
+//
+
+CREATE PROCEDURE RebuildRecipeRatingSummary()
+BEGIN
+  DELETE FROM Recipe_Rating_Summary;
+
+  INSERT INTO Recipe_Rating_Summary (Recipe_ID, Rating_Count, Rating_Sum)
+  SELECT r.Recipe_ID, COUNT(f.Feedback_ID), IFNULL(SUM(f.Rating), 0)
+  FROM Recipe r
+  LEFT JOIN Feedback f ON f.Recipe_ID = r.Recipe_ID
+  GROUP BY r.Recipe_ID;
+END;
+//
+
+-- ---------------------------------------------------------
+-- Feedback maintenance (covers page_feedback and AddFeedback).
+-- Cascaded deletes do not fire these: deletion.py removes a user's
+-- Feedback explicitly, and a recipe's summary row cascades with it.
+-- Bulk loaders set @skip_rating_summary = 1 and rebuild afterwards.
+-- ---------------------------------------------------------
+CREATE TRIGGER trg_recipe_rating_insert
+AFTER INSERT ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT IGNORE INTO Recipe_Rating_Summary (Recipe_ID) VALUES (NEW.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_feedback_rating_insert
+AFTER INSERT ON Feedback
+FOR EACH ROW
+BEGIN
+  IF @skip_rating_summary IS NULL THEN
+    CALL ApplyRecipeRatingDelta(NEW.Recipe_ID, 1, NEW.Rating);
+  END IF;
+END;
+//
+
+CREATE TRIGGER trg_feedback_rating_update
+AFTER UPDATE ON Feedback
+FOR EACH ROW
+BEGIN
+  IF @skip_rating_summary IS NULL
+     AND (OLD.Recipe_ID <> NEW.Recipe_ID OR OLD.Rating <> NEW.Rating) THEN
+    CALL ApplyRecipeRatingDelta(OLD.Recipe_ID, -1, -OLD.Rating);
+    CALL ApplyRecipeRatingDelta(NEW.Recipe_ID, 1, NEW.Rating);
+  END IF;
+END;
+//
+
+CREATE TRIGGER trg_feedback_rating_delete
+AFTER DELETE ON Feedback
+FOR EACH ROW
+BEGIN
+  IF @skip_rating_summary IS NULL THEN
+    CALL ApplyRecipeRatingDelta(OLD.Recipe_ID, -1, -OLD.Rating);
+  END IF;
+END;
+//
+DELIMITER ;
+
+CALL RebuildRecipeRatingSummary();
@@ -0,0 +1,92 @@
+-- =========================================================
+-- 0005 SEARCH INDEX CHANGE LOG
+-- search.py keeps an in-process inverted index over recipes. Every
+-- change that affects a recipe's searchable text or calories appends
+-- its Recipe_ID here; each app process replays the entries after its
+-- own watermark (Change_ID) instead of rebuilding the index.
+-- Old entries are pruned by search.py when it rebuilds.
+-- =========================================================
+
+CREATE TABLE Search_Index_Changes (
+  Change_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+  Recipe_ID INT NOT NULL,
+  Changed_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  INDEX idx_sic_time (Changed_At)
+) ENGINE=InnoDB;
+
+DELIMITER //
+CREATE TRIGGER trg_recipe_search_insert
+AFTER INSERT ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (NEW.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_recipe_search_update
+AFTER UPDATE ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (NEW.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_recipe_search_delete
+AFTER DELETE ON Recipe
+FOR EACH ROW
+BEGIN
+  INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (OLD.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_ri_search_insert
+AFTER INSERT ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (NEW.Recipe_ID);
+END;
+//
+
+CREATE TRIGGER trg_ri_search_update
+AFTER UPDATE ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (NEW.Recipe_ID);
+  IF OLD.Recipe_ID <> NEW.Recipe_ID THEN
+    INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (OLD.Recipe_ID);
+  END IF;
+END;
+//
+
+CREATE TRIGGER trg_ri_search_delete
+AFTER DELETE ON Recipe_Ingredient
+FOR EACH ROW
+BEGIN
+  INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (OLD.Recipe_ID);
+END;
+//
+
+-- Renaming an ingredient changes the text of every recipe using it
+CREATE TRIGGER trg_ingredient_search_update
+AFTER UPDATE ON Ingredient
+FOR EACH ROW
+BEGIN
+  IF OLD.Ingredient_Name <> NEW.Ingredient_Name THEN
+    INSERT INTO Search_Index_Changes (Recipe_ID)
+    SELECT Recipe_ID FROM Recipe_Ingredient WHERE Ingredient_ID = NEW.Ingredient_ID;
+  END IF;
+END;
+//
+
+-- Calorie filters read the indexed totals
+CREATE TRIGGER trg_summary_search_update
+AFTER UPDATE ON Recipe_Nutrition_Summary
+FOR EACH ROW
+BEGIN
+  IF OLD.Calories <> NEW.Calories THEN
+    INSERT INTO Search_Index_Changes (Recipe_ID) VALUES (NEW.Recipe_ID);
+  END IF;
+END;
+//
+DELIMITER ;
@@ -0,0 +1,18 @@
+-- =========================================================
+-- 0006 REVOKED SESSION TOKENS
+-- Session tokens are signed and checked without the database, so a
+-- logout must be recorded somewhere every app / API process can see.
+-- auth.py adds the token's nonce here on logout and each process
+-- replays the rows after its own watermark (Revoked_ID). Rows are
+-- deleted once the token would have expired anyway.
+-- =========================================================
+
+CREATE TABLE Revoked_Tokens (
+  Revoked_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+  Nonce CHAR(16) NOT NULL,
+  Expires_At INT UNSIGNED NOT NULL,
+  Revoked_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  UNIQUE KEY uq_rt_nonce (Nonce),
+  INDEX idx_rt_expires (Expires_At)
+) ENGINE=InnoDB;
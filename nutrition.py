@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from shared import engine
+
+# -------- NUTRIENT COLUMNS --------
+# Nutrition values are stored per 100 units of the ingredient, same as
+# the GetRecipeCalories() SQL function assumes.
+NUTRIENTS = ["Calories", "Carbohydrates_g", "Protein_g", "Fat_g", "Fiber_g"]
+
+
+# -------- LOAD MATRICES --------
+def load_matrices(recipe_ids=None):
+    """
+    Load Recipe_Ingredient as a sparse (COO) recipe x ingredient quantity
+    matrix and Nutrition as a dense ingredient x nutrient matrix.
+
+    Returns (recipe_index, rows, cols, qty, nutrient_matrix) where
+    rows/cols/qty are the non-zero entries of the quantity matrix.
+    """
+    if recipe_ids is None:
+        ri = pd.read_sql(
+            text("SELECT Recipe_ID, Ingredient_ID, Quantity FROM Recipe_Ingredient"),
+            engine
+        )
+        recipe_index = pd.read_sql(text("SELECT Recipe_ID FROM Recipe"), engine)["Recipe_ID"]
+    else:
+        recipe_ids = sorted({int(r) for r in recipe_ids})
+        recipe_index = pd.Series(recipe_ids, dtype="int64", name="Recipe_ID")
+        if not recipe_ids:
+            ri = pd.DataFrame(columns=["Recipe_ID", "Ingredient_ID", "Quantity"])
+        else:
+            q = text("""
+                SELECT Recipe_ID, Ingredient_ID, Quantity
+                FROM Recipe_Ingredient
+                WHERE Recipe_ID IN :ids
+            """).bindparams(bindparam("ids", expanding=True))
+            ri = pd.read_sql(q, engine, params={"ids": recipe_ids})
+
+    nut = pd.read_sql(
+        text(f"SELECT Ingredient_ID, {', '.join(NUTRIENTS)} FROM Nutrition"),
+        engine
+    )
+
+    # Ingredient axis: every ingredient that has nutrition data or is used
+    ingredient_ids = np.union1d(
+        nut["Ingredient_ID"].to_numpy(dtype="int64"),
+        ri["Ingredient_ID"].to_numpy(dtype="int64")
+    )
+
+    # Dense ingredient x nutrient matrix (ingredients without a Nutrition
+    # row contribute zero, matching the inner JOIN in GetRecipeCalories)
+    nutrient_matrix = np.zeros((len(ingredient_ids), len(NUTRIENTS)))
+    if not nut.empty:
+        pos = np.searchsorted(ingredient_ids, nut["Ingredient_ID"].to_numpy(dtype="int64"))
+        nutrient_matrix[pos] = nut[NUTRIENTS].fillna(0).to_numpy(dtype="float64")
+
+    # Sparse recipe x ingredient quantities (links to recipes outside the
+    # index, e.g. deleted concurrently, are dropped)
+    recipe_index = recipe_index.sort_values().reset_index(drop=True)
+    ri = ri[ri["Recipe_ID"].isin(recipe_index)]
+
+    rows = np.searchsorted(recipe_index.to_numpy(dtype="int64"), ri["Recipe_ID"].to_numpy(dtype="int64"))
+    cols = np.searchsorted(ingredient_ids, ri["Ingredient_ID"].to_numpy(dtype="int64"))
+    qty = ri["Quantity"].to_numpy(dtype="float64")
+
+    return recipe_index, rows, cols, qty, nutrient_matrix
+
+
+# -------- SPARSE x DENSE PRODUCT --------
+def sparse_dense_matmul(rows, cols, qty, dense, n_rows):
+    """Multiply a COO sparse matrix by a dense matrix: (n_rows x k) result."""
+    out = np.zeros((n_rows, dense.shape[1]))
+    np.add.at(out, rows, qty[:, None] * dense[cols])
+    return out
+
+
+# -------- RECIPE NUTRITION --------
+def recipe_nutrition(recipe_ids=None):
+    """
+    Compute calories and macros for every recipe (or only recipe_ids)
+    in a single sparse x dense multiply.
+
+    Returns a DataFrame with Recipe_ID and one column per nutrient.
+    """
+    recipe_index, rows, cols, qty, nutrient_matrix = load_matrices(recipe_ids)
+
+    totals = sparse_dense_matmul(rows, cols, qty, nutrient_matrix / 100, len(recipe_index))
+
+    df = pd.DataFrame(np.round(totals, 2), columns=NUTRIENTS)
+    df.insert(0, "Recipe_ID", recipe_index.to_numpy())
+    return df
+
+
+def recipe_calories(recipe_id):
+    """Python equivalent of the GetRecipeCalories() SQL function."""
+    df = recipe_nutrition([recipe_id])
+    return float(df.iloc[0]["Calories"]) if not df.empty else 0.0
+
+
+# -------- ATTACH TO A RESULT SET --------
+def with_nutrition(df, columns=None):
+    """Left-join recipe nutrition onto a DataFrame that has a Recipe_ID column."""
+    columns = columns or NUTRIENTS
+    nut = recipe_nutrition(df["Recipe_ID"].dropna().unique().tolist())
+
+    out = df.merge(nut[["Recipe_ID"] + columns], on="Recipe_ID", how="left")
+    out[columns] = out[columns].fillna(0)
+    return out
@@ -1,95 +1,113 @@
+import time
 import streamlit as st
 import pandas as pd
-from sqlalchemy import text
-from shared import engine, run_query, load_data, fetch
+from shared import (engine, replicas, cache_stats, invalidate, run_query, fetch,
+                    call_procedure, call_function)
+from database import load_db_config, pool_stats
+from auth import authenticate, hash_password, revoke_token, validate_token
+import metrics
+from export import FORMATS, PREVIEW_ROWS, estimated_rows, export_table, offer_download, preview
+from import_ingredients import decode_upload, import_csv
+from deletion import DELETERS, delete_ingredients, delete_recipes, delete_users, ids_matching, parse_id_list
+from pagination import TABLES as PAGEABLE, keyset_page, lookup_row
+from daily_nutrition import rebuild_all, refresh_stale, stale_count
+from ratings import cuisines, leaderboard, rebuild_ratings
+import search
+import recommend
+import reference_data
+import diet_ingest
 
 
 # ============================================================
-# DATABASE UTIL FUNCTIONS
+# PAGINATED TABLE VIEW (KEYSET)
 # ============================================================
 
-def call_procedure(proc_name, params=None):
-    with engine.begin() as conn:
-        if params:
-            placeholders = ", ".join([f":{p}" for p in params.keys()])
-            q = text(f"CALL {proc_name}({placeholders})")
-            result = conn.execute(q, params)
-        else:
-            q = text(f"CALL {proc_name}()")
-            result = conn.execute(q)
-
-        try:
-            df = pd.DataFrame(result.fetchall(), columns=result.keys())
-            return df
-        except:
-            return pd.DataFrame()
-
-
-def call_function(func_name, params=None):
-    with engine.begin() as conn:
-        if params:
-            placeholders = ", ".join([f":{p}" for p in params.keys()])
-            q = text(f"SELECT {func_name}({placeholders}) AS result")
-            r = conn.execute(q, params)
-        else:
-            q = text(f"SELECT {func_name}() AS result")
-            r = conn.execute(q)
-
-        row = r.fetchone()
-        return row[0] if row else None
-
-
-# ============================================================
-# SAFE USER DELETE (FULL CASCADE)
-# ============================================================
-
-def delete_user_completely(user_id):
-
-    run_query("DELETE FROM User_Weight_History WHERE User_ID = :id", {"id": user_id})
-    run_query("DELETE FROM User_Diet_Log WHERE User_ID = :id", {"id": user_id})
-    run_query("DELETE FROM Feedback WHERE User_ID = :id", {"id": user_id})
-
-    run_query("""
-        DELETE FROM MealPlan_Recipes
-        WHERE MealPlan_ID IN (SELECT MealPlan_ID FROM Meal_Plan WHERE User_ID = :id)
-    """, {"id": user_id})
-
-    run_query("DELETE FROM Meal_Plan WHERE User_ID = :id", {"id": user_id})
-
-    run_query("DELETE FROM Recipe_Log WHERE Created_By = :id", {"id": user_id})
-    run_query("DELETE FROM Recipe WHERE Creator_User_ID = :id", {"id": user_id})
-
-    run_query("DELETE FROM User WHERE User_ID = :id", {"id": user_id})
-
-def delete_recipe_completely(recipe_id):
-    # Remove from meal plans
-    run_query("DELETE FROM MealPlan_Recipes WHERE Recipe_ID = :id", {"id": recipe_id})
-
-    # Remove from diet logs
-    run_query("DELETE FROM User_Diet_Log WHERE Recipe_ID = :id", {"id": recipe_id})
+def paged_view(table, key):
+    """Sortable, filterable table view that seeks by primary key page by page."""
+    spec = PAGEABLE[table]
+    state = f"{key}_cursors"
+
+    c1, c2, c3, c4 = st.columns([2, 1, 2, 2])
+    sort = c1.selectbox("Sort by", spec["sort"], key=f"{key}_sort")
+    descending = c2.selectbox("Order", ["Asc", "Desc"], key=f"{key}_order") == "Desc"
+    fcol = c3.selectbox("Filter column", ["(none)"] + list(spec["filters"]), key=f"{key}_fcol")
+    fval = c4.text_input(
+        "Starts with" if spec["filters"].get(fcol) == "prefix" else "Equals",
+        key=f"{key}_fval", disabled=fcol == "(none)"
+    )
+    page_size = st.select_slider("Rows per page", [25, 50, 100, 250], value=50, key=f"{key}_size")
 
-    # Remove feedback
-    run_query("DELETE FROM Feedback WHERE Recipe_ID = :id", {"id": recipe_id})
+    filters = {fcol: fval} if fcol != "(none)" and fval else {}
 
-    # Remove ingredient links
-    run_query("DELETE FROM Recipe_Ingredient WHERE Recipe_ID = :id", {"id": recipe_id})
+    # Cursor stack: entry i is the cursor page i starts after. Reset when
+    # the view definition changes.
+    view = (sort, descending, fcol, fval, page_size)
+    if st.session_state.get(f"{key}_view") != view:
+        st.session_state[f"{key}_view"] = view
+        st.session_state[state] = [None]
 
-    # Remove recipe logs
-    run_query("DELETE FROM Recipe_Log WHERE Recipe_ID = :id", {"id": recipe_id})
+    cursors = st.session_state[state]
+    df, next_cursor = keyset_page(table, sort, descending, cursors[-1], filters, page_size)
 
-    # Remove the recipe itself
-    run_query("DELETE FROM Recipe WHERE Recipe_ID = :id", {"id": recipe_id})
+    st.dataframe(df)
 
-def delete_ingredient_completely(ingredient_id):
+    n1, n2, n3 = st.columns([1, 1, 4])
+    if n1.button("⬅ Prev", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if n2.button("Next ➡", key=f"{key}_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    n3.caption(f"Page {len(cursors)}")
+
+    return df
+
+
+def pick_row(table, key, label):
+    """Server-side row lookup by ID; returns the ID if the row exists."""
+    row_id = st.number_input(label, min_value=1, step=1, key=f"{key}_id")
+    row = lookup_row(table, row_id)
+    if row.empty:
+        st.caption(f"No {table} row with ID {row_id}.")
+        return None
+    st.dataframe(row)
+    return int(row_id)
+
+
+def bulk_delete(table, key):
+    """Delete many rows at once, chosen by an ID list or a filter (one transaction)."""
+    spec = PAGEABLE[table]
+    with st.expander(f"🧹 Bulk Delete {table}s"):
+        mode = st.radio("Select rows by", ["ID list", "Filter"], horizontal=True, key=f"{key}_mode")
+
+        if mode == "ID list":
+            raw = st.text_input("IDs (e.g. 4, 7, 100-250)", key=f"{key}_ids")
+            try:
+                ids = parse_id_list(raw)
+            except ValueError as e:
+                st.error(f"Could not parse the ID list: {e}")
+                return
+        else:
+            c1, c2 = st.columns(2)
+            col = c1.selectbox("Column", list(spec["filters"]), key=f"{key}_fcol")
+            val = c2.text_input(
+                "Starts with" if spec["filters"][col] == "prefix" else "Equals", key=f"{key}_fval"
+            )
+            ids = ids_matching(table, {col: val}) if val else []
 
-    # Remove ingredient links inside recipes
-    run_query("DELETE FROM Recipe_Ingredient WHERE Ingredient_ID = :id", {"id": ingredient_id})
+        st.caption(f"{len(ids):,} {table} row(s) selected.")
+        confirm = st.checkbox("I understand this permanently deletes the selected rows and their linked data",
+                              key=f"{key}_confirm")
 
-    # Remove nutrition info tied to ingredient
-    run_query("DELETE FROM Nutrition WHERE Ingredient_ID = :id", {"id": ingredient_id})
+        if st.button(f"Delete {len(ids):,} rows", key=f"{key}_button", disabled=not (ids and confirm)):
+            try:
+                n = DELETERS[table](ids)
+                st.success(f"Deleted {n:,} {table} row(s) with all linked records.")
+                st.rerun()
+            except Exception as e:
+                st.error("❌ Bulk delete failed; nothing was deleted.")
+                st.code(str(e))
 
-    # Finally delete ingredient
-    run_query("DELETE FROM Ingredient WHERE Ingredient_ID = :id", {"id": ingredient_id})
 
 # ============================================================
 # STREAMLIT ADMIN PORTAL
@@ -106,23 +124,30 @@ st.title("🛠 Nutrition Management – Admin Portal")
 if "admin_logged_in" not in st.session_state:
     st.session_state.admin_logged_in = False
 
+if "admin_token" not in st.session_state:
+    st.session_state.admin_token = None
+
+# Expired tokens end the session (checked against the in-process cache)
+if st.session_state.admin_logged_in:
+    admin_user = validate_token(st.session_state.admin_token)
+    if not admin_user or admin_user["role"] != "admin":
+        st.session_state.admin_logged_in = False
+        st.session_state.admin_token = None
+
 
 if not st.session_state.admin_logged_in:
+    metrics.set_section("Admin: Login")
     st.subheader("🔐 Admin Login")
 
     login_email = st.text_input("Admin Email", key="admin_login_email")
     login_password = st.text_input("Password", type="password", key="admin_login_password")
 
     if st.button("Login", key="admin_login_button"):
-        df = load_data("User")
-        admin = df[
-            (df["Email"] == login_email) &
-            (df["Password"] == login_password) &
-            (df["role"] == "admin")
-        ]
-
-        if not admin.empty:
+        token, admin = authenticate(login_email, login_password, role="admin")
+
+        if token:
             st.session_state.admin_logged_in = True
+            st.session_state.admin_token = token
             st.success("Admin Login Successful!")
             st.rerun()
         else:
@@ -136,7 +161,9 @@ if not st.session_state.admin_logged_in:
 # ============================================================
 
 if st.sidebar.button("🚪 Logout", key="admin_logout_button"):
+    revoke_token(st.session_state.admin_token)
     st.session_state.admin_logged_in = False
+    st.session_state.admin_token = None
     st.rerun()
 
 st.sidebar.header("Admin Menu")
@@ -151,6 +178,7 @@ sections = [
 ]
 
 section = st.sidebar.selectbox("Select Section", sections, key="admin_section_selector")
+metrics.set_section(f"Admin: {section}")
 
 
 # ============================================================
@@ -160,27 +188,24 @@ section = st.sidebar.selectbox("Select Section", sections, key="admin_section_se
 if section == "Users":
     st.header("👤 Manage Users")
 
-    df = load_data("User")
-    st.dataframe(df)
+    paged_view("User", "users_view")
 
     st.subheader("🗑 Delete User (Full Cascade Delete)")
 
-    if not df.empty:
-        delete_uid = st.selectbox(
-            "Select User ID to Delete",
-            df["User_ID"].tolist(),
-            key="delete_user_selector"
-        )
+    delete_uid = pick_row("User", "delete_user", "User ID to Delete")
 
+    if delete_uid is not None:
         if st.button("Delete User", key="delete_user_button"):
             try:
-                delete_user_completely(delete_uid)
+                delete_users([delete_uid])
                 st.success(f"User {delete_uid} deleted successfully with all linked records!")
                 st.rerun()
             except Exception as e:
                 st.error("❌ Error deleting user.")
                 st.code(str(e))
 
+    bulk_delete("User", "bulk_users")
+
     with st.expander("➕ Add User"):
         new_name = st.text_input("Name", key="add_user_name")
         new_email = st.text_input("Email", key="add_user_email")
@@ -190,7 +215,7 @@ if section == "Users":
         if st.button("Add User", key="add_user_button"):
             run_query(
                 "INSERT INTO User (Name, Email, Password, role) VALUES (:n, :e, :p, :r)",
-                {"n": new_name, "e": new_email, "p": new_pass, "r": new_role}
+                {"n": new_name, "e": new_email, "p": hash_password(new_pass), "r": new_role}
             )
             st.success("User added.")
             st.rerun()
@@ -204,42 +229,21 @@ if section == "Users":
 elif section == "Recipes":
     st.header("🍳 Manage Recipes")
 
-    df = load_data("Recipe")
-    st.dataframe(df)
-
-    # --------------------------
-    # SAFE DELETE FUNCTION
-    # --------------------------
-    def delete_recipe_completely(recipe_id):
-        # Remove from meal plans
-        run_query("DELETE FROM MealPlan_Recipes WHERE Recipe_ID = :id", {"id": recipe_id})
-
-        # Remove from diet logs
-        run_query("DELETE FROM User_Diet_Log WHERE Recipe_ID = :id", {"id": recipe_id})
-
-        # Remove feedback
-        run_query("DELETE FROM Feedback WHERE Recipe_ID = :id", {"id": recipe_id})
-
-        # Remove ingredient links
-        run_query("DELETE FROM Recipe_Ingredient WHERE Recipe_ID = :id", {"id": recipe_id})
-
-        # Remove recipe logs
-        run_query("DELETE FROM Recipe_Log WHERE Recipe_ID = :id", {"id": recipe_id})
-
-        # Remove the recipe itself
-        run_query("DELETE FROM Recipe WHERE Recipe_ID = :id", {"id": recipe_id})
+    paged_view("Recipe", "recipes_view")
 
     # --------------------------
     # DELETE RECIPE SECTION
     # --------------------------
     st.subheader("🗑 Delete Recipe")
-    if not df.empty:
-        rid = st.selectbox("Recipe ID", df["Recipe_ID"], key="delete_recipe_id")
+    rid = pick_row("Recipe", "delete_recipe", "Recipe ID")
+    if rid is not None:
         if st.button("Delete Recipe", key="delete_recipe_button"):
-            delete_recipe_completely(rid)
+            delete_recipes([rid])
             st.success("Recipe deleted successfully (full cascade)!")
             st.rerun()
 
+    bulk_delete("Recipe", "bulk_recipes")
+
     # --------------------------
     # ADD RECIPE SECTION
     # --------------------------
@@ -272,17 +276,19 @@ elif section == "Recipes":
 elif section == "Ingredients":
     st.header("🧂 Manage Ingredients")
 
-    df = load_data("Ingredient")
-    st.dataframe(df)
+    paged_view("Ingredient", "ingredients_view")
 
     st.subheader("🗑 Delete Ingredient")
-    if not df.empty:
-        del_ing = st.selectbox("Select Ingredient ID", df["Ingredient_ID"].tolist(), key="delete_ingredient_selector")
+    del_ing = reference_data.select("ingredient", "Ingredient", key="delete_ingredient")
+    if del_ing is not None:
+        st.dataframe(lookup_row("Ingredient", del_ing))
         if st.button("Delete Ingredient", key="delete_ingredient_button"):
-            delete_ingredient_completely(del_ing)
+            delete_ingredients([del_ing])
             st.success("Ingredient deleted successfully!")
             st.rerun()
 
+    bulk_delete("Ingredient", "bulk_ingredients")
+
     with st.expander("➕ Add Ingredient"):
         ing_name = st.text_input("Ingredient Name", key="add_ing_name")
         unit = st.text_input("Unit", key="add_ing_unit")
@@ -296,6 +302,33 @@ elif section == "Ingredients":
             st.success("Ingredient added.")
             st.rerun()
 
+    with st.expander("📥 Bulk Import Ingredients + Nutrition (CSV)"):
+        st.caption(
+            "Columns: Ingredient_Name, Unit_Of_Measure, Category, and optionally Notes, "
+            "Calories, Carbohydrates_g, Protein_g, Fat_g, Fiber_g, Vitamins, Minerals "
+            "(per 100 units). Existing ingredients are updated by name."
+        )
+        upload = st.file_uploader("CSV file", type=["csv"], key="bulk_ing_file")
+        batch_size = st.number_input("Batch size", 100, 50000, 5000, step=500, key="bulk_ing_batch")
+
+        if upload is not None and st.button("Import", key="bulk_ing_button"):
+            bar = st.progress(0.0, text="Importing...")
+            try:
+                stats, rejected = import_csv(
+                    decode_upload(upload.getvalue()), int(batch_size),
+                    progress=lambda done, total: bar.progress(done / total, text=f"{done:,}/{total:,} rows")
+                )
+                st.success(
+                    f"Imported {stats['imported']:,} rows in {stats['seconds']}s "
+                    f"({stats['rows_per_sec']:,} rows/s)."
+                )
+                if rejected:
+                    st.warning(f"{len(rejected):,} rows rejected.")
+                    st.dataframe(pd.DataFrame(rejected, columns=["Line", "Reason"]))
+            except Exception as e:
+                st.error("❌ Import failed; the batch in progress was rolled back.")
+                st.code(str(e))
+
 
 # ============================================================
 # MEAL PLANS PAGE
@@ -304,8 +337,7 @@ elif section == "Ingredients":
 elif section == "Meal Plans":
     st.header("🥗 Manage Meal Plans")
 
-    df = load_data("Meal_Plan")
-    st.dataframe(df)
+    paged_view("Meal_Plan", "mealplans_view")
 
     with st.expander("➕ Add Meal Plan"):
         uid = st.number_input("User ID", 1, key="new_mp_uid")
@@ -327,8 +359,15 @@ elif section == "Meal Plans":
 
 elif section == "Feedback":
     st.header("⭐ User Feedback")
-    df = load_data("Feedback")
-    st.dataframe(df)
+    paged_view("Feedback", "feedback_view")
+
+    st.subheader("🏆 Leaderboard")
+    cuisine = st.selectbox("Cuisine", ["All"] + cuisines(), key="admin_leaderboard_cuisine")
+    st.dataframe(leaderboard(None if cuisine == "All" else cuisine))
+
+    if st.button("Rebuild Rating Summary", key="rebuild_ratings"):
+        rebuild_ratings()
+        st.success("Recipe_Rating_Summary rebuilt from Feedback.")
 
 
 
@@ -351,6 +390,13 @@ elif section == "Database Tools":
             "Show Triggers",
             "Show Procedures",
             "Show Functions",
+            "Query Cache Stats",
+            "Connection Pool",
+            "Performance",
+            "Daily Nutrition Rollups",
+            "Search Index",
+            "Recommendation Index",
+            "Diet Log Ingestion",
             "Run Raw SQL",
         ],
         key="admin_tool_selector"
@@ -367,7 +413,21 @@ elif section == "Database Tools":
         table_list = [t[0] for t in tables.values.tolist()]
         t = st.selectbox("Select Table", table_list)
         if st.button("Load Table"):
-            st.dataframe(fetch(f"SELECT * FROM {t}"))
+            st.caption(f"Showing the first {PREVIEW_ROWS} rows. Use Export for the full table.")
+            st.dataframe(preview(t))
+
+        # Full table goes to a file in bounded chunks, never to the screen
+        fmt = st.selectbox("Export format", list(FORMATS), key="admin_export_fmt")
+        if st.button("Export", key="admin_export"):
+            bar = st.progress(0.0, text="Exporting...")
+            expected = max(estimated_rows(t), 1)
+
+            path, total = export_table(
+                t, fmt,
+                progress=lambda n: bar.progress(min(n / expected, 1.0), text=f"{n:,} rows written")
+            )
+            bar.progress(1.0, text=f"{total:,} rows written")
+            offer_download(path, f"{t}{FORMATS[fmt]}")
 
     # ========== PROCEDURES ==========
     elif tool == "Run Procedure":
@@ -451,6 +511,169 @@ elif section == "Database Tools":
     elif tool == "Show Functions":
         st.dataframe(fetch("SHOW FUNCTION STATUS WHERE Db = DATABASE()"))
 
+    # ========== QUERY CACHE ==========
+    elif tool == "Query Cache Stats":
+        st.subheader("🗃 Query Result Cache")
+
+        stats = cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups * 100 if lookups else 0.0
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Hits", stats["hits"])
+        c2.metric("Misses", stats["misses"])
+        c3.metric("Hit Rate", f"{hit_rate:.1f}%")
+        c4.metric("Entries", stats["entries"])
+        st.json(stats)
+
+        st.caption("Shared recipe / ingredient pick-lists (rebuilt when their data version changes)")
+        st.json(reference_data.stats())
+
+        if st.button("Clear Cache"):
+            invalidate()
+            st.success("Cache cleared.")
+
+    # ========== CONNECTION POOL ==========
+    elif tool == "Connection Pool":
+        st.subheader("🔌 Connection Pool")
+
+        stats = pool_stats(engine)
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("In Use", stats.get("in_use", 0))
+        c2.metric("Avg Wait (ms)", stats.get("avg_wait_ms", 0.0))
+        c3.metric("Overflow Events", stats.get("overflow_events", 0))
+        c4.metric("Timeouts", stats.get("timeouts", 0))
+        st.json(stats)
+
+        st.subheader("📚 Read Replicas")
+        replica_status = replicas.status()
+        if replica_status:
+            st.dataframe(pd.DataFrame(replica_status))
+            for r in replicas.replicas:
+                with st.expander(f"Pool: {r['name']}"):
+                    st.json(pool_stats(r["engine"]))
+        else:
+            st.info("No replicas configured; all reads go to the primary.")
+
+        st.caption("Configuration")
+        config = load_db_config()
+        config["password"] = "********"
+        st.json(config)
+
+    # ========== PERFORMANCE ==========
+    elif tool == "Performance":
+        st.subheader("⏱ Query Latency")
+
+        perf = pd.DataFrame(metrics.snapshot())
+        if perf.empty:
+            st.info("No queries recorded yet.")
+        else:
+            sections_seen = ["All"] + sorted(perf["section"].unique().tolist())
+            sel = st.selectbox("Portal Section", sections_seen, key="perf_section")
+            if sel != "All":
+                perf = perf[perf["section"] == sel]
+            st.dataframe(perf)
+        if metrics.evicted():
+            st.caption(f"{metrics.evicted():,} least recently used queries dropped "
+                       f"(over {metrics.MAX_KEYS:,} distinct queries).")
+
+        st.download_button(
+            "Download JSON",
+            metrics.to_json(),
+            file_name="query_metrics.json",
+            mime="application/json",
+        )
+
+        if st.button("Reset Metrics"):
+            metrics.reset()
+            st.rerun()
+
+    # ========== DAILY NUTRITION ROLLUPS ==========
+    elif tool == "Daily Nutrition Rollups":
+        st.subheader("📊 User_Daily_Nutrition")
+        st.caption(
+            "Diet log changes update the rollup immediately. Recipes whose nutrition "
+            "changed are queued and their diet log days are recomputed here in batch."
+        )
+        st.metric("Stale Recipes", stale_count())
+
+        if st.button("Refresh Stale Days", key="rollup_refresh"):
+            n = refresh_stale()
+            st.success(f"Refreshed diet log days of {n:,} recipe(s).")
+
+        if st.button("Rebuild All", key="rollup_rebuild"):
+            rebuild_all()
+            st.success("Daily rollup rebuilt.")
+
+    # ========== SEARCH INDEX ==========
+    elif tool == "Search Index":
+        st.subheader("🔍 Recipe Search Index")
+        st.caption(
+            "Built in memory per app process; recipe and ingredient changes are "
+            "applied incrementally from Search_Index_Changes."
+        )
+        index = search.get_index()
+        index.sync()
+        st.json(index.stats())
+
+        q = st.text_input("Test Query", key="admin_search_query")
+        if q:
+            start = time.perf_counter()
+            res = search.search(q)
+            st.caption(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+            st.dataframe(res)
+
+        if st.button("Rebuild Index", key="search_rebuild"):
+            secs = index.build()
+            st.success(f"Index rebuilt in {secs:.1f}s.")
+
+    elif tool == "Recommendation Index":
+        st.subheader("✨ Recipe Recommendation Index")
+        st.caption(
+            "Ingredient + nutrient vectors with an IVF neighbour index, built in memory "
+            "per app process and updated from Search_Index_Changes."
+        )
+        index = recommend.get_index()
+        index.sync()
+        st.json(index.stats())
+
+        rid = st.number_input("Recipe ID", min_value=1, key="admin_similar_rid")
+        if st.button("Find Similar", key="admin_similar"):
+            start = time.perf_counter()
+            res = recommend.similar(int(rid))
+            st.caption(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+            st.dataframe(res)
+
+        if st.button("Rebuild Index", key="recommend_rebuild"):
+            secs = index.build()
+            st.success(f"Index rebuilt in {secs:.1f}s.")
+
+    elif tool == "Diet Log Ingestion":
+        st.subheader("📥 Diet Log Write-Behind Queue")
+        st.caption(
+            f"Entries are batched into multi-row INSERTs ({diet_ingest.BATCH_SIZE} rows or "
+            f"{diet_ingest.FLUSH_SECONDS}s). Stats are for this app process."
+        )
+        writer = diet_ingest.get_writer()
+        stats = writer.stats()
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Queued", f"{stats['queued']:,} / {stats['max_queue']:,}")
+        c2.metric("Rows/s", stats["rows_per_sec"])
+        c3.metric("Flush p95 (ms)", stats["flush_ms_p95"])
+        c4.metric("Spilled", stats["spilled"])
+        st.json(stats)
+
+        if writer.rejects:
+            st.caption("Recently rejected rows")
+            st.dataframe(pd.DataFrame([dict(row, Reason=reason) for row, reason in writer.rejects]))
+
+        if st.button("Flush Now", key="diet_ingest_flush"):
+            if writer.flush(timeout=10):
+                st.success("Queue flushed.")
+            else:
+                st.warning("Still flushing; check again shortly.")
+
     # ========== RAW SQL ==========
     elif tool == "Run Raw SQL":
         q = st.text_area("Query")
@@ -1,39 +1,21 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import text
-from shared import engine, load_data, run_query, fetch
+from shared import engine, load_data, run_query, fetch, call_procedure, call_function, invalidate
+from async_db import fetch_all
+from auth import authenticate, hash_password, revoke_token, validate_token
+from metrics import set_section
+from export import FORMATS, PREVIEW_ROWS, estimated_rows, export_table, offer_download, preview
+from daily_nutrition import daily_totals, weekly_totals
+from ratings import SORTS, browse_page, cuisines, leaderboard
+import search
+from meal_planner import generate_plan, save_plan
+import recommend
+import reference_data
+import diet_ingest
+from weight_history import BUCKETS, MAX_POINTS, chart_series, history_page
 
 
 
-def call_procedure(proc_name, params=None):
-    with engine.begin() as conn:
-        if params:
-            placeholders = ", ".join([f":{p}" for p in params.keys()])
-            q = text(f"CALL {proc_name}({placeholders})")
-            result = conn.execute(q, params)
-        else:
-            q = text(f"CALL {proc_name}()")
-            result = conn.execute(q)
-
-        try:
-            df = pd.DataFrame(result.fetchall(), columns=result.keys())
-            return df
-        except:
-            return pd.DataFrame()
-
-
-def call_function(func_name, params=None):
-    with engine.begin() as conn:
-        if params:
-            placeholders = ", ".join([f":{p}" for p in params.keys()])
-            q = text(f"SELECT {func_name}({placeholders}) AS result")
-            r = conn.execute(q, params)
-        else:
-            q = text(f"SELECT {func_name}() AS result")
-            r = conn.execute(q)
-
-        row = r.fetchone()
-        return row[0] if row else None
 
 
 def page_database_tools_user():
@@ -200,10 +182,20 @@ if "user_logged_in" not in st.session_state:
 if "user_id" not in st.session_state:
     st.session_state.user_id = None
 
+if "auth_token" not in st.session_state:
+    st.session_state.auth_token = None
+
+# Expired tokens end the session (checked against the in-process cache)
+if st.session_state.user_logged_in and not validate_token(st.session_state.auth_token):
+    st.session_state.user_logged_in = False
+    st.session_state.user_id = None
+    st.session_state.auth_token = None
+
 # ------------------------------------
 # LOGIN / REGISTER (if not logged in)
 # ------------------------------------
 if not st.session_state.user_logged_in:
+    set_section("Login")
     tab1, tab2 = st.tabs(["🔐 Login", "📝 Register"])
 
     # ---------------------- LOGIN TAB ----------------------
@@ -214,15 +206,12 @@ if not st.session_state.user_logged_in:
         login_password = st.text_input("Password", type="password", key="login_password")
 
         if st.button("Login", key="login_button"):
-            df = load_data("User")
-            user = df[
-                (df["Email"] == login_email) &
-                (df["Password"] == login_password)
-            ]
+            token, user = authenticate(login_email, login_password)
 
-            if not user.empty:
+            if token:
                 st.session_state.user_logged_in = True
-                st.session_state.user_id = int(user.iloc[0]["User_ID"])
+                st.session_state.user_id = int(user["User_ID"])
+                st.session_state.auth_token = token
                 st.success("Login successful!")
                 st.rerun()
             else:
@@ -241,7 +230,7 @@ if not st.session_state.user_logged_in:
                 run_query("""
                     INSERT INTO User (Name, Email, Password)
                     VALUES (:n, :e, :p)
-                """, {"n": reg_name, "e": reg_email, "p": reg_pass})
+                """, {"n": reg_name, "e": reg_email, "p": hash_password(reg_pass)})
 
                 st.success("Account created! Please log in.")
             else:
@@ -253,8 +242,10 @@ if not st.session_state.user_logged_in:
 # LOGOUT BUTTON
 # ------------------------------------
 if st.sidebar.button("🚪 Logout", key="logout_button"):
+    revoke_token(st.session_state.auth_token)
     st.session_state.user_logged_in = False
     st.session_state.user_id = None
+    st.session_state.auth_token = None
     st.rerun()
 
 # ------------------------------------
@@ -344,11 +335,33 @@ def page_my_mealplan():
 
     user_id = st.session_state.user_id
 
-    # Load user's meal plan
-    mealplans = fetch("""
-        SELECT * FROM Meal_Plan
-        WHERE User_ID = :u
-    """, {"u": user_id})
+    # Plan and its recipes are independent reads; run them together
+    # (the items query finds the plan itself)
+    data = fetch_all({
+        "plans": ("""
+            SELECT * FROM Meal_Plan
+            WHERE User_ID = :u
+            ORDER BY MealPlan_ID
+        """, {"u": user_id}),
+        "items": ("""
+            SELECT
+                mpr.MPR_ID,
+                mpr.Recipe_ID,
+                mpr.Meal_Type,
+                mpr.Day_Of_Week,
+                r.Recipe_Name,
+                r.Cuisine_Type,
+                ROUND(IFNULL(s.Calories, 0), 2) AS Calories
+            FROM MealPlan_Recipes mpr
+            JOIN Recipe r ON r.Recipe_ID = mpr.Recipe_ID
+            LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+            WHERE mpr.MealPlan_ID = (SELECT MIN(MealPlan_ID) FROM Meal_Plan WHERE User_ID = :u)
+            ORDER BY 
+                FIELD(mpr.Day_Of_Week, 'Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'),
+                mpr.MPR_ID
+        """, {"u": user_id}),
+    })
+    mealplans = data["plans"]
 
     # --------------------------------------------------------------
     # IF USER HAS NO MEAL PLAN → SHOW CREATE BUTTON
@@ -378,26 +391,57 @@ def page_my_mealplan():
     # --------------------------------------------------------------
     # SHOW RECIPES IN THE PLAN
     # --------------------------------------------------------------
-    items = fetch("""
-        SELECT
-            mpr.MPR_ID,
-            mpr.Recipe_ID,
-            mpr.Meal_Type,
-            mpr.Day_Of_Week,
-            r.Recipe_Name,
-            r.Cuisine_Type,
-            GetRecipeCalories(r.Recipe_ID) AS Calories
-        FROM MealPlan_Recipes mpr
-        JOIN Recipe r ON r.Recipe_ID = mpr.Recipe_ID
-        WHERE mpr.MealPlan_ID = :mp
-        ORDER BY 
-            FIELD(mpr.Day_Of_Week, 'Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'),
-            mpr.MPR_ID
-    """, {"mp": mp_id})
+    items = data["items"]
 
     st.subheader("🍽 Meals in Your Plan")
     st.dataframe(items)
 
+    # Recipes close to the plan and the user's ratings / diet log
+    st.subheader("✨ Suggested for This Plan")
+    suggestions = recommend.for_user(user_id, k=10, recipe_ids=items["Recipe_ID"].tolist())
+    if suggestions.empty:
+        st.info("Add recipes, rate them or log meals to get suggestions.")
+    else:
+        st.dataframe(suggestions)
+
+    st.write("---")
+
+    # --------------------------------------------------------------
+    # GENERATE A WEEK FROM CALORIE / MACRO TARGETS
+    # --------------------------------------------------------------
+    st.subheader("⚡ Generate Weekly Plan")
+    st.caption("Targets come from your profile (weight, height, age, activity level, diet, allergies).")
+
+    if st.button("⚡ Generate Plan", key="generate_mealplan_button"):
+        user = fetch("SELECT * FROM User WHERE User_ID = :u", {"u": user_id}).iloc[0]
+        try:
+            st.session_state.generated_plan = generate_plan(user)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+
+    if "generated_plan" in st.session_state:
+        plan_df, totals, targets = st.session_state.generated_plan
+
+        st.write("🎯 **Daily Targets**")
+        st.dataframe(targets.to_frame("Target").T)
+
+        st.dataframe(plan_df)
+
+        st.write("📊 **Daily Totals vs Target (%)**")
+        st.dataframe((totals / targets * 100).round(1))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("💾 Save to My Meal Plan", key="save_generated_plan"):
+                save_plan(mp_id, plan_df)
+                del st.session_state.generated_plan
+                st.success("Meal plan replaced with the generated week!")
+                st.rerun()
+        with col2:
+            if st.button("🗑 Discard", key="discard_generated_plan"):
+                del st.session_state.generated_plan
+                st.rerun()
+
     st.write("---")
 
     # --------------------------------------------------------------
@@ -405,19 +449,11 @@ def page_my_mealplan():
     # --------------------------------------------------------------
     st.subheader("➕ Add Recipe to Meal Plan")
 
-    recipes = fetch("SELECT Recipe_ID, Recipe_Name FROM Recipe")
-
-    if recipes.empty:
+    if not len(reference_data.get("recipe")):
         st.warning("No recipes available to add.")
         return
 
-    recipe_options = {
-        f"{row['Recipe_Name']} (ID {row['Recipe_ID']})": row["Recipe_ID"]
-        for _, row in recipes.iterrows()
-    }
-
-    selected = st.selectbox("Select Recipe", list(recipe_options.keys()), key="add_recipe_select")
-    sel_recipe_id = recipe_options[selected]
+    sel_recipe_id = reference_data.select("recipe", "Select Recipe", key="add_recipe_select")
 
     meal_type = st.selectbox(
         "Meal Type",
@@ -431,7 +467,7 @@ def page_my_mealplan():
         key="add_recipe_day"
     )
 
-    if st.button("Add to Meal Plan", key="add_recipe_btn"):
+    if st.button("Add to Meal Plan", key="add_recipe_btn", disabled=sel_recipe_id is None):
         run_query("""
             INSERT INTO MealPlan_Recipes (MealPlan_ID, Recipe_ID, Meal_Type, Day_Of_Week)
             VALUES (:mp, :rid, :mt, :d)
@@ -454,13 +490,81 @@ def page_my_mealplan():
 def page_browse_recipes():
     st.header("🍳 Browse Recipes")
 
-    df = fetch("""
-        SELECT r.*, GetRecipeCalories(r.Recipe_ID) AS Calories
-        FROM Recipe r
-    """)
+    # ---------------------------------------------------
+    # SEARCH (in-process inverted index, see search.py)
+    # ---------------------------------------------------
+    query = st.text_input("🔍 Search recipes, cuisines, ingredients", key="recipe_search")
+    c1, c2 = st.columns(2)
+    min_cal = c1.number_input("Min Calories", 0, 10000, 0, 50, key="search_min_cal")
+    max_cal = c2.number_input("Max Calories", 0, 10000, 10000, 50, key="search_max_cal")
+
+    if query.strip():
+        words = query.split()
+        suggestions = search.suggest(words[-1])
+        if suggestions and not query.endswith(" "):
+            st.caption("Suggestions: " + ", ".join(
+                " ".join(words[:-1] + [s]) for s in suggestions[:5]))
+
+    if query.strip() or min_cal > 0 or max_cal < 10000:
+        results = search.search(
+            query,
+            limit=50,
+            min_calories=min_cal if min_cal > 0 else None,
+            max_calories=max_cal if max_cal < 10000 else None,
+        )
+        st.subheader(f"Results ({len(results)})")
+        if results.empty:
+            st.info("No recipes match.")
+        else:
+            st.dataframe(results)
+        st.write("---")
 
+    sort = st.selectbox("Sort By", list(SORTS), key="browse_sort")
+
+    # Keyset pages; totals and ratings come from the trigger-maintained summary tables
+    if st.session_state.get("browse_view") != sort:
+        st.session_state.browse_view = sort
+        st.session_state.browse_cursors = [None]
+    cursors = st.session_state.browse_cursors
+
+    df, next_cursor = browse_page(sort, cursors[-1])
     st.dataframe(df)
 
+    b1, b2, b3 = st.columns([1, 1, 4])
+    if b1.button("⬅ Prev", key="browse_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if b2.button("Next ➡", key="browse_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    b3.caption(f"Page {len(cursors)}")
+
+    # ---------------------------------------------------
+    # RECOMMENDATIONS (in-process vector index, see recommend.py)
+    # ---------------------------------------------------
+    st.write("---")
+    st.subheader("✨ Recommended for You")
+    picks = recommend.for_user(st.session_state.user_id)
+    if picks.empty:
+        st.info("Rate recipes or log meals to get recommendations.")
+    else:
+        st.dataframe(picks)
+
+    st.subheader("🔁 More Like This")
+    similar_id = reference_data.select("recipe", "Recipe", key="similar_recipe_select")
+    if similar_id is not None:
+        st.dataframe(recommend.similar(similar_id))
+
+    st.write("---")
+    st.subheader("🏆 Top Rated")
+
+    cuisine = st.selectbox("Cuisine", ["All"] + cuisines(), key="leaderboard_cuisine")
+    top = leaderboard(None if cuisine == "All" else cuisine)
+    if top.empty:
+        st.info("No rated recipes yet.")
+    else:
+        st.dataframe(top)
+
 # ===============================================================
 #                   4. WEIGHT HISTORY
 # ===============================================================
@@ -470,31 +574,40 @@ def page_weight_history():
     user_id = st.session_state.user_id
 
     # ---------------------------------------------------
-    # LOAD WEIGHT HISTORY
+    # WEIGHT PROGRESS GRAPH (bucketed in SQL, capped with LTTB)
     # ---------------------------------------------------
-    history = fetch("""
-        SELECT *
-        FROM User_Weight_History
-        WHERE User_ID = :u
-        ORDER BY Updated_At ASC
-    """, {"u": user_id})
+    st.subheader("📈 Weight Progress Graph")
 
-    st.subheader("📘 History Records")
-    st.dataframe(history)
+    bucket = st.radio("Average per", list(BUCKETS), horizontal=True, key="weight_bucket")
+    graph_df, periods = chart_series(user_id, bucket)
+
+    if periods:
+        st.line_chart(graph_df)
+        if periods > MAX_POINTS:
+            st.caption(f"Showing {len(graph_df)} of {periods} points (shape-preserving downsample).")
+    else:
+        st.info("No weight history yet. Update weight to see graph.")
 
     # ---------------------------------------------------
-    # WEIGHT PROGRESS GRAPH
+    # HISTORY RECORDS (keyset pages, newest first)
     # ---------------------------------------------------
-    st.subheader("📈 Weight Progress Graph")
+    st.subheader("📘 History Records")
 
-    if not history.empty:
-        # Create dataframe for plotting
-        graph_df = history[["Updated_At", "New_Weight"]].copy()
-        graph_df.rename(columns={"New_Weight": "Weight (kg)"}, inplace=True)
+    if "weight_cursors" not in st.session_state:
+        st.session_state.weight_cursors = [None]
+    cursors = st.session_state.weight_cursors
 
-        st.line_chart(graph_df.set_index("Updated_At"))
-    else:
-        st.info("No weight history yet. Update weight to see graph.")
+    history, next_cursor = history_page(user_id, cursors[-1])
+    st.dataframe(history)
+
+    n1, n2, n3 = st.columns([1, 1, 4])
+    if n1.button("⬅ Newer", key="weight_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if n2.button("Older ➡", key="weight_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    n3.caption(f"Page {len(cursors)}")
 
     st.write("---")
 
@@ -527,6 +640,7 @@ def page_weight_history():
             "nw": new_weight
         })
 
+        st.session_state.weight_cursors = [None]
         st.success("Weight updated! History entry created.")
         st.rerun()
 
@@ -558,37 +672,72 @@ def page_diet_log():
     st.subheader("📘 Log Entries")
     st.dataframe(logs)
 
+    # ---------------------------------------------------
+    # DAILY / WEEKLY INTAKE (read from User_Daily_Nutrition only)
+    # ---------------------------------------------------
+    st.write("---")
+    st.subheader("📊 Intake Over Time")
+
+    today = pd.Timestamp.today().date()
+    date_range = st.date_input(
+        "Date Range",
+        (today - pd.Timedelta(days=29), today),
+        key="intake_range"
+    )
+
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        daily = daily_totals(user_id, date_range[0], date_range[1])
+
+        if daily.empty:
+            st.info("No diet log entries in this range.")
+        else:
+            chart = daily.set_index("Date").astype(float)
+            st.caption("Calories per day (all logged vs finished entries)")
+            st.line_chart(chart[["Calories", "Finished_Calories"]])
+            st.caption("Macros per day (g)")
+            st.bar_chart(chart[["Carbohydrates_g", "Protein_g", "Fat_g", "Fiber_g"]])
+
+            st.caption("Weekly totals")
+            st.dataframe(weekly_totals(daily).round(1))
+
     st.write("---")
     st.subheader("➕ Add Entry")
 
-    recipes = fetch("SELECT Recipe_ID, Recipe_Name FROM Recipe")
-    recipe_options = {
-        f"{row['Recipe_Name']} (ID {row['Recipe_ID']})": row["Recipe_ID"]
-        for _, row in recipes.iterrows()
-    }
-
-    sel = st.selectbox("Recipe", list(recipe_options.keys()))
-    recipe_id = recipe_options[sel]
+    recipe_id = reference_data.select("recipe", "Recipe", key="diet_log_recipe")
 
     portion = st.number_input("Portion Size", 0.5, 10.0, 1.0, 0.5)
     date = st.date_input("Date")
     time = st.time_input("Time")
     notes = st.text_area("Notes")
 
-    if st.button("Add Log"):
-        run_query("""
-            INSERT INTO User_Diet_Log (User_ID, Recipe_ID, Date, Time, Portion_Size, Notes)
-            VALUES (:uid, :rid, :d, :t, :p, :n)
-        """, {
-            "uid": user_id,
-            "rid": recipe_id,
-            "d": date,
-            "t": time,
-            "p": portion,
-            "n": notes
-        })
-        st.success("Log added!")
-        st.rerun()
+    if st.button("Add Log", disabled=recipe_id is None):
+        # Goes through the shared write-behind queue (diet_ingest.py);
+        # flush=True writes it right away instead of waiting for a full batch
+        writer = diet_ingest.get_writer()
+        try:
+            seq = writer.submit({
+                "User_ID": user_id,
+                "Recipe_ID": recipe_id,
+                "Date": date,
+                "Time": time,
+                "Portion_Size": portion,
+                "Notes": notes
+            })
+        except diet_ingest.QueueFull as e:
+            st.error(f"❌ {e}")
+        else:
+            outcome, reason = writer.wait(seq, timeout=5, flush=True) or ("queued", None)
+            if outcome == "written":
+                # Written on the flusher thread; read it back from the primary
+                invalidate(["User_Diet_Log"])
+                st.success("Log added!")
+                st.rerun()
+            elif outcome == "queued":
+                st.info("⏳ Log queued; it will appear shortly.")
+            elif outcome == "spilled":
+                st.warning(f"⚠ Log not saved yet ({reason}).")
+            else:
+                st.error(f"❌ Log not saved: {reason}")
 
     st.write("---")
     st.subheader("✔ Mark as Finished")
@@ -619,14 +768,16 @@ def page_diet_log():
 def page_feedback():
     st.header("⭐ Give Feedback")
 
-    recipes = load_data("Recipe")
-    recipe_options = {
-        f"{row['Recipe_Name']} (ID: {row['Recipe_ID']})": row["Recipe_ID"]
-        for _, row in recipes.iterrows()
-    }
+    recipe_id = reference_data.select("recipe", "Choose Recipe", key="feedback_recipe_selector")
+    if recipe_id is None:
+        return
 
-    selected = st.selectbox("Choose Recipe", list(recipe_options.keys()), key="feedback_recipe_selector")
-    recipe_id = recipe_options[selected]
+    current = fetch("""
+        SELECT Rating_Count, Avg_Rating FROM Recipe_Rating_Summary WHERE Recipe_ID = :r
+    """, {"r": recipe_id})
+    if not current.empty and current.iloc[0]["Rating_Count"]:
+        st.caption(f"Rated {float(current.iloc[0]['Avg_Rating']):.2f} ★ "
+                   f"from {int(current.iloc[0]['Rating_Count'])} rating(s)")
 
     rating = st.slider("Rating", 1, 5, 3, key="feedback_rating")
     comment = st.text_area("Comment", key="feedback_comment")
@@ -677,8 +828,21 @@ def page_database_tools_user():
         tname = st.selectbox("Select Table", table_list, key="db_user_table_name")
 
         if st.button("Load Data", key="db_user_load"):
-            data = fetch(f"SELECT * FROM {tname}")
-            st.dataframe(data)
+            st.caption(f"Showing the first {PREVIEW_ROWS} rows. Use Export for the full table.")
+            st.dataframe(preview(tname))
+
+        # Full table goes to a file in bounded chunks, never to the screen
+        fmt = st.selectbox("Export format", list(FORMATS), key="db_user_export_fmt")
+        if st.button("Export", key="db_user_export"):
+            bar = st.progress(0.0, text="Exporting...")
+            expected = max(estimated_rows(tname), 1)
+
+            path, total = export_table(
+                tname, fmt,
+                progress=lambda n: bar.progress(min(n / expected, 1.0), text=f"{n:,} rows written")
+            )
+            bar.progress(1.0, text=f"{total:,} rows written")
+            offer_download(path, f"{tname}{FORMATS[fmt]}")
 
     # --------------------------------------------------------
     # SHOW TRIGGERS
@@ -722,6 +886,8 @@ def page_database_tools_user():
 # -------------------------------------------------------
 # ROUTE TO SELECTED PAGE
 # -------------------------------------------------------
+set_section(section)
+
 if section == "Profile":
     page_profile()
 
@@ -0,0 +1,143 @@
+from shared import fetch
+
+# -------- PAGEABLE TABLES --------
+# Whitelists keep user input out of the SQL text. Sort columns must be
+# NOT NULL so (sort column, primary key) is a total order for keyset seeks;
+# "prefix" filters use LIKE 'term%' so an index on the column can be used.
+TABLES = {
+    "User": {
+        "pk": "User_ID",
+        "columns": ["User_ID", "Name", "Email", "Gender", "Date_Of_Birth", "Height_cm", "Weight_kg",
+                    "Activity_Level", "Dietary_Preferences", "Allergies", "BMI", "role", "Created_At"],
+        "sort": ["User_ID", "Name", "Email"],
+        "filters": {"Name": "prefix", "Email": "prefix", "role": "eq"},
+    },
+    "Recipe": {
+        "pk": "Recipe_ID",
+        "columns": ["*"],
+        "sort": ["Recipe_ID", "Recipe_Name"],
+        "filters": {"Recipe_Name": "prefix", "Cuisine_Type": "eq", "Creator_User_ID": "eq"},
+    },
+    "Ingredient": {
+        "pk": "Ingredient_ID",
+        "columns": ["*"],
+        "sort": ["Ingredient_ID", "Ingredient_Name", "Category"],
+        "filters": {"Ingredient_Name": "prefix", "Category": "eq"},
+    },
+    "Meal_Plan": {
+        "pk": "MealPlan_ID",
+        "columns": ["*"],
+        "sort": ["MealPlan_ID", "Plan_Name"],
+        "filters": {"User_ID": "eq", "Plan_Name": "prefix"},
+    },
+    "Feedback": {
+        "pk": "Feedback_ID",
+        "columns": ["*"],
+        "sort": ["Feedback_ID", "Rating"],
+        "filters": {"Recipe_ID": "eq", "User_ID": "eq", "Rating": "eq"},
+    },
+    "User_Weight_History": {
+        "pk": "History_ID",
+        "columns": ["History_ID", "Old_Weight", "New_Weight", "Updated_At"],
+        "sort": ["History_ID"],
+        "filters": {"User_ID": "eq"},
+    },
+    "User_Diet_Log": {
+        "pk": "Log_ID",
+        "columns": ["Log_ID", "Recipe_ID", "Date", "Time", "Portion_Size", "Notes", "is_finished"],
+        "sort": ["Log_ID"],
+        "filters": {"User_ID": "eq"},
+    },
+}
+
+
+# -------- FILTERS --------
+def filter_clause(table, filters):
+    """Whitelisted filters -> (list of SQL conditions, bind params). Empty values are skipped."""
+    spec = TABLES[table]
+    where, params = [], {}
+    for i, (col, value) in enumerate((filters or {}).items()):
+        kind = spec["filters"].get(col)
+        if kind is None:
+            raise ValueError(f"Cannot filter {table} by {col}")
+        if value in (None, ""):
+            continue
+        if kind == "prefix":
+            where.append(f"`{col}` LIKE :f{i}")
+            params[f"f{i}"] = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        else:
+            where.append(f"`{col}` = :f{i}")
+            params[f"f{i}"] = value
+    return where, params
+
+
+# -------- KEYSET PAGE --------
+def keyset_page(table, sort=None, descending=False, after=None, filters=None, limit=50):
+    """
+    Fetch one page of `table` ordered by (sort, pk), starting after the
+    `after` cursor (a (sort_value, pk_value) tuple from a previous page).
+
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    Cost depends on the page size only, not on how deep the page is.
+    """
+    spec = TABLES[table]
+    pk = spec["pk"]
+    sort = sort or pk
+    if sort not in spec["sort"]:
+        raise ValueError(f"Cannot sort {table} by {sort}")
+
+    where, params = filter_clause(table, filters)
+    params["lim"] = int(limit) + 1
+
+    order = seek(f"`{sort}`" if sort != pk else None, f"`{pk}`", descending, after, where, params)
+    cols = ", ".join(c if c == "*" else f"`{c}`" for c in spec["columns"])
+
+    df = fetch(f"""
+        SELECT {cols} FROM `{table}`
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order}
+        LIMIT :lim
+    """, params)
+
+    return split_page(df, limit, sort, pk)
+
+
+def seek(sort, pk, descending, after, where, params):
+    """
+    Append the keyset condition for `after` to where/params and return the
+    ORDER BY. `sort` and `pk` are SQL column references (sort=None pages by
+    the primary key alone); an index on (sort, pk) serves both.
+    """
+    op = "<" if descending else ">"
+    if after is not None:
+        if sort is None:
+            where.append(f"{pk} {op} :after_pk")
+        else:
+            where.append(f"({sort} {op} :after_sort OR ({sort} = :after_sort AND {pk} {op} :after_pk))")
+            params["after_sort"] = after[0]
+        params["after_pk"] = after[1]
+
+    direction = "DESC" if descending else "ASC"
+    return f"{pk} {direction}" if sort is None else f"{sort} {direction}, {pk} {direction}"
+
+
+def split_page(df, limit, sort, pk):
+    """limit+1 fetched rows -> (first `limit` rows, cursor after the last one or None)."""
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        return df, (_plain(last[sort]), _plain(last[pk]))
+    return df, None
+
+
+def _plain(value):
+    """numpy/pandas scalars -> Python values usable as bind params."""
+    return value.item() if hasattr(value, "item") else value
+
+
+# -------- SINGLE ROW LOOKUP --------
+def lookup_row(table, pk_value):
+    """Primary-key lookup used to confirm a row before editing or deleting it."""
+    spec = TABLES[table]
+    cols = ", ".join(c if c == "*" else f"`{c}`" for c in spec["columns"])
+    return fetch(f"SELECT {cols} FROM `{table}` WHERE `{spec['pk']}` = :id", {"id": int(pk_value)})
@@ -0,0 +1,158 @@
+# portal_queries.py
+"""
+Catalogue of the queries the user and admin portals issue, shared by
+benchmark.py (latency) and migrate.py (EXPLAIN plan checks).
+"""
+
+# -----------------------------
+# PORTAL QUERIES
+# -----------------------------
+# name -> (portal section, SQL). Parameters :u, :mp, :rid, :email are
+# filled with real row values by the callers; keep these in sync with
+# pages/user.py, pages/admin.py, api.py and pagination.py.
+QUERIES = {
+    "login_lookup": ("Login", """
+        SELECT User_ID, Name, Email, Password, role FROM User WHERE Email = :email
+    """),
+    "profile": ("Profile", "SELECT * FROM User WHERE User_ID = :u"),
+    "mealplan_header": ("My Meal Plan", "SELECT * FROM Meal_Plan WHERE User_ID = :u ORDER BY MealPlan_ID"),
+    "mealplan_items": ("My Meal Plan", """
+        SELECT mpr.MPR_ID, mpr.Recipe_ID, mpr.Meal_Type, mpr.Day_Of_Week,
+               r.Recipe_Name, r.Cuisine_Type, ROUND(IFNULL(s.Calories, 0), 2) AS Calories
+        FROM MealPlan_Recipes mpr
+        JOIN Recipe r ON r.Recipe_ID = mpr.Recipe_ID
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        WHERE mpr.MealPlan_ID = (SELECT MIN(MealPlan_ID) FROM Meal_Plan WHERE User_ID = :u)
+        ORDER BY FIELD(mpr.Day_Of_Week, 'Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'),
+                 mpr.MPR_ID
+    """),
+    "api_diet_log_page": ("API", """
+        SELECT `Log_ID`, `Recipe_ID`, `Date`, `Time`, `Portion_Size`, `Notes`, `is_finished`
+        FROM `User_Diet_Log` WHERE `User_ID` = :u ORDER BY `Log_ID` DESC LIMIT 51
+    """),
+    "api_recipes_page": ("API", """
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, ROUND(IFNULL(s.Calories, 0), 2) AS Calories,
+               IFNULL(rs.Rating_Count, 0) AS Ratings, ROUND(rs.Avg_Rating, 2) AS Avg_Rating
+        FROM Recipe r
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        LEFT JOIN Recipe_Rating_Summary rs ON rs.Recipe_ID = r.Recipe_ID
+        WHERE r.Recipe_ID > :rid ORDER BY r.Recipe_ID LIMIT 51
+    """),
+    "api_recipe_ingredients": ("API", """
+        SELECT i.Ingredient_ID, i.Ingredient_Name, ri.Quantity, ri.Unit
+        FROM Recipe_Ingredient ri
+        JOIN Ingredient i ON i.Ingredient_ID = ri.Ingredient_ID
+        WHERE ri.Recipe_ID = :rid ORDER BY ri.RecipeIngredient_ID
+    """),
+    "recipe_picklist": ("Pick-lists", "SELECT Recipe_ID, Recipe_Name FROM Recipe"),
+    "ingredient_picklist": ("Pick-lists", "SELECT Ingredient_ID, Ingredient_Name FROM Ingredient"),
+    "picklist_probe": ("Pick-lists", "SELECT MAX(Change_ID) FROM Search_Index_Changes"),
+    # First page of ratings.browse_page for each sort
+    "browse_recipes": ("Browse Recipes", """
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, r.Difficulty_Level,
+               r.Preparation_Time_minutes, r.Cooking_Time_minutes, r.Serving_Size,
+               ROUND(IFNULL(s.Calories, 0), 2) AS Calories,
+               ROUND(IFNULL(s.Carbohydrates_g, 0), 2) AS Carbohydrates_g,
+               ROUND(IFNULL(s.Protein_g, 0), 2) AS Protein_g,
+               ROUND(IFNULL(s.Fat_g, 0), 2) AS Fat_g,
+               ROUND(IFNULL(s.Fiber_g, 0), 2) AS Fiber_g,
+               IFNULL(rs.Rating_Count, 0) AS Ratings,
+               ROUND(rs.Avg_Rating, 2) AS Avg_Rating,
+               rs.Bayesian_Score AS Score
+        FROM Recipe r
+        LEFT JOIN Recipe_Rating_Summary rs ON rs.Recipe_ID = r.Recipe_ID
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        ORDER BY r.Recipe_Name ASC, r.Recipe_ID ASC
+        LIMIT 51
+    """),
+    "browse_top_rated": ("Browse Recipes", """
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, r.Difficulty_Level,
+               r.Preparation_Time_minutes, r.Cooking_Time_minutes, r.Serving_Size,
+               ROUND(IFNULL(s.Calories, 0), 2) AS Calories,
+               ROUND(IFNULL(s.Carbohydrates_g, 0), 2) AS Carbohydrates_g,
+               ROUND(IFNULL(s.Protein_g, 0), 2) AS Protein_g,
+               ROUND(IFNULL(s.Fat_g, 0), 2) AS Fat_g,
+               ROUND(IFNULL(s.Fiber_g, 0), 2) AS Fiber_g,
+               IFNULL(rs.Rating_Count, 0) AS Ratings,
+               ROUND(rs.Avg_Rating, 2) AS Avg_Rating,
+               rs.Bayesian_Score AS Score
+        FROM Recipe_Rating_Summary rs
+        JOIN Recipe r ON r.Recipe_ID = rs.Recipe_ID
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        ORDER BY rs.Bayesian_Score DESC, rs.Recipe_ID DESC
+        LIMIT 51
+    """),
+    "browse_most_rated": ("Browse Recipes", """
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, r.Difficulty_Level,
+               r.Preparation_Time_minutes, r.Cooking_Time_minutes, r.Serving_Size,
+               ROUND(IFNULL(s.Calories, 0), 2) AS Calories,
+               ROUND(IFNULL(s.Carbohydrates_g, 0), 2) AS Carbohydrates_g,
+               ROUND(IFNULL(s.Protein_g, 0), 2) AS Protein_g,
+               ROUND(IFNULL(s.Fat_g, 0), 2) AS Fat_g,
+               ROUND(IFNULL(s.Fiber_g, 0), 2) AS Fiber_g,
+               IFNULL(rs.Rating_Count, 0) AS Ratings,
+               ROUND(rs.Avg_Rating, 2) AS Avg_Rating,
+               rs.Bayesian_Score AS Score
+        FROM Recipe_Rating_Summary rs
+        JOIN Recipe r ON r.Recipe_ID = rs.Recipe_ID
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        ORDER BY rs.Rating_Count DESC, rs.Recipe_ID DESC
+        LIMIT 51
+    """),
+    "weight_chart_daily": ("Weight History", """
+        SELECT DATE(Updated_At) AS Period, ROUND(AVG(New_Weight), 2) AS Weight,
+               MIN(New_Weight) AS Min_Weight, MAX(New_Weight) AS Max_Weight, COUNT(*) AS Readings
+        FROM User_Weight_History
+        WHERE User_ID = :u AND New_Weight IS NOT NULL
+        GROUP BY Period ORDER BY Period
+    """),
+    "weight_history_page": ("Weight History", """
+        SELECT History_ID, Old_Weight, New_Weight, Updated_At FROM User_Weight_History
+        WHERE User_ID = :u ORDER BY History_ID DESC LIMIT 51
+    """),
+    "current_weight": ("Weight History", "SELECT Weight_kg FROM User WHERE User_ID = :u"),
+    "diet_log": ("Diet Log", """
+        SELECT l.Log_ID, l.Date, l.Time, r.Recipe_Name, l.Portion_Size, l.Notes, l.is_finished
+        FROM User_Diet_Log l
+        LEFT JOIN Recipe r ON r.Recipe_ID = l.Recipe_ID
+        WHERE l.User_ID = :u
+        ORDER BY l.Date DESC, l.Time DESC
+    """),
+    "daily_intake": ("Diet Log", """
+        SELECT Date, Entries, Finished_Entries, Calories, Carbohydrates_g, Protein_g,
+               Fat_g, Fiber_g, Finished_Calories
+        FROM User_Daily_Nutrition
+        WHERE User_ID = :u AND Date BETWEEN CURDATE() - INTERVAL 29 DAY AND CURDATE()
+        ORDER BY Date
+    """),
+    "leaderboard_overall": ("Browse Recipes", """
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, rs.Rating_Count, rs.Avg_Rating, rs.Bayesian_Score
+        FROM Recipe_Rating_Summary rs
+        JOIN Recipe r ON r.Recipe_ID = rs.Recipe_ID
+        ORDER BY rs.Bayesian_Score DESC, rs.Recipe_ID DESC
+        LIMIT 10
+    """),
+    "recipe_calories_fn": ("Database Tools", "SELECT GetRecipeCalories(:rid) AS result"),
+    # First page of the keyset-paginated admin listings (pagination.keyset_page)
+    "admin_users": ("Admin: Users", "SELECT * FROM User ORDER BY User_ID LIMIT 51"),
+    "admin_users_by_name": ("Admin: Users", """
+        SELECT * FROM User WHERE Name LIKE 'A%' ORDER BY Name, User_ID LIMIT 51
+    """),
+    "admin_recipes": ("Admin: Recipes", "SELECT * FROM Recipe ORDER BY Recipe_ID LIMIT 51"),
+    "admin_recipes_by_name": ("Admin: Recipes", """
+        SELECT * FROM Recipe ORDER BY Recipe_Name, Recipe_ID LIMIT 51
+    """),
+    "admin_ingredients": ("Admin: Ingredients", "SELECT * FROM Ingredient ORDER BY Ingredient_ID LIMIT 51"),
+    "admin_ingredients_by_category": ("Admin: Ingredients", """
+        SELECT * FROM Ingredient ORDER BY Category, Ingredient_ID LIMIT 51
+    """),
+    "admin_meal_plans": ("Admin: Meal Plans", "SELECT * FROM Meal_Plan ORDER BY MealPlan_ID LIMIT 51"),
+    "admin_feedback": ("Admin: Feedback", "SELECT * FROM Feedback ORDER BY Feedback_ID LIMIT 51"),
+    "admin_feedback_by_recipe": ("Admin: Feedback", """
+        SELECT * FROM Feedback WHERE Recipe_ID = :rid ORDER BY Feedback_ID LIMIT 51
+    """),
+}
+
+# Reads that return the whole table by design: benchmark.py can skip them
+# with --skip-full-scans and migrate.py does not flag their plans
+FULL_SCANS = {"recipe_picklist", "ingredient_picklist"}
@@ -0,0 +1,150 @@
+# ratings.py
+"""
+Recipe rating aggregates (Recipe_Rating_Summary) and leaderboards.
+
+    python ratings.py --verify-only
+    python ratings.py --rebuild
+"""
+import argparse
+import pandas as pd
+from sqlalchemy import text
+from shared import engine, fetch, invalidate
+from pagination import seek, split_page
+
+# Bayesian_Score's prior (5 ratings at 3.0) is fixed in the generated
+# column of migrations/0004; change it with a new migration, not here.
+
+LEADERBOARD_SIZE = 10
+BROWSE_PAGE_SIZE = 50
+
+# Browse Recipes sort options -> (result column, indexed sort column, descending).
+# Rating sorts are driven from the summary so idx_rrs_score / idx_rrs_count
+# serve ORDER BY + LIMIT; Name uses idx_recipe_name.
+SORTS = {
+    "Name": ("Recipe_Name", "r.Recipe_Name", False),
+    "Top Rated": ("Score", "rs.Bayesian_Score", True),
+    "Most Rated": ("Ratings", "rs.Rating_Count", True),
+}
+
+
+# -----------------------------
+# LEADERBOARDS
+# -----------------------------
+def leaderboard(cuisine=None, n=LEADERBOARD_SIZE):
+    """
+    Top-n recipes by Bayesian score, overall or for one cuisine. Results
+    go through the shared query cache and are dropped on Feedback writes.
+    """
+    where, params = "", {"n": int(n)}
+    if cuisine:
+        where = "WHERE r.Cuisine_Type = :cuisine"
+        params["cuisine"] = cuisine
+    return fetch(f"""
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type,
+               rs.Rating_Count, ROUND(rs.Avg_Rating, 2) AS Avg_Rating,
+               ROUND(rs.Bayesian_Score, 3) AS Score
+        FROM Recipe_Rating_Summary rs
+        JOIN Recipe r ON r.Recipe_ID = rs.Recipe_ID
+        {where}
+        ORDER BY rs.Bayesian_Score DESC, rs.Recipe_ID DESC
+        LIMIT :n
+    """, params)
+
+
+def cuisines():
+    return fetch("""
+        SELECT DISTINCT Cuisine_Type FROM Recipe
+        WHERE Cuisine_Type IS NOT NULL ORDER BY Cuisine_Type
+    """)["Cuisine_Type"].tolist()
+
+
+# -----------------------------
+# BROWSE
+# -----------------------------
+def browse_page(sort="Name", after=None, limit=BROWSE_PAGE_SIZE):
+    """
+    One keyset page of Browse Recipes with nutrition totals and ratings.
+    Returns (DataFrame, next_cursor) like pagination.keyset_page.
+    """
+    column, sort_col, descending = SORTS[sort]
+    if sort_col.startswith("rs."):
+        source = """Recipe_Rating_Summary rs
+        JOIN Recipe r ON r.Recipe_ID = rs.Recipe_ID"""
+        pk = "rs.Recipe_ID"
+    else:
+        source = """Recipe r
+        LEFT JOIN Recipe_Rating_Summary rs ON rs.Recipe_ID = r.Recipe_ID"""
+        pk = "r.Recipe_ID"
+
+    where, params = [], {"lim": int(limit) + 1}
+    order = seek(sort_col, pk, descending, after, where, params)
+    df = fetch(f"""
+        SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type, r.Difficulty_Level,
+               r.Preparation_Time_minutes, r.Cooking_Time_minutes, r.Serving_Size,
+               ROUND(IFNULL(s.Calories, 0), 2) AS Calories,
+               ROUND(IFNULL(s.Carbohydrates_g, 0), 2) AS Carbohydrates_g,
+               ROUND(IFNULL(s.Protein_g, 0), 2) AS Protein_g,
+               ROUND(IFNULL(s.Fat_g, 0), 2) AS Fat_g,
+               ROUND(IFNULL(s.Fiber_g, 0), 2) AS Fiber_g,
+               IFNULL(rs.Rating_Count, 0) AS Ratings,
+               ROUND(rs.Avg_Rating, 2) AS Avg_Rating,
+               rs.Bayesian_Score AS Score
+        FROM {source}
+        LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order}
+        LIMIT :lim
+    """, params)
+    return split_page(df, limit, column, "Recipe_ID")
+
+
+# -----------------------------
+# REBUILD / VERIFY
+# -----------------------------
+def rebuild_ratings():
+    """Recompute every row of Recipe_Rating_Summary in one transaction."""
+    with engine.begin() as conn:
+        conn.execute(text("CALL RebuildRecipeRatingSummary()"))
+    invalidate(["Recipe_Rating_Summary"])
+
+
+def verify_ratings():
+    """Recipes whose stored count/sum differ from a GROUP BY over Feedback."""
+    expected = pd.read_sql(text("""
+        SELECT r.Recipe_ID, COUNT(f.Feedback_ID) AS Rating_Count, IFNULL(SUM(f.Rating), 0) AS Rating_Sum
+        FROM Recipe r
+        LEFT JOIN Feedback f ON f.Recipe_ID = r.Recipe_ID
+        GROUP BY r.Recipe_ID
+    """), engine)
+    stored = pd.read_sql(text("SELECT Recipe_ID, Rating_Count, Rating_Sum FROM Recipe_Rating_Summary"), engine)
+
+    merged = expected.merge(stored, on="Recipe_ID", how="outer",
+                            suffixes=("_expected", "_stored"), indicator=True)
+    drift = (
+        (merged["_merge"] != "both")
+        | (merged["Rating_Count_expected"] != merged["Rating_Count_stored"])
+        | (merged["Rating_Sum_expected"] != merged["Rating_Sum_stored"])
+    )
+    return merged[drift]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify / rebuild Recipe_Rating_Summary")
+    parser.add_argument("--verify-only", action="store_true", help="report drift and exit")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if no drift is found")
+    args = parser.parse_args()
+
+    print("🔍 Verifying Recipe_Rating_Summary against Feedback...\n")
+    drifted = verify_ratings()
+    if drifted.empty:
+        print("✔ Rating summary matches Feedback.")
+    else:
+        print(f"⚠ {len(drifted)} recipe(s) drifted:")
+        print(drifted.drop(columns=["_merge"]).head(50).to_string(index=False))
+
+    if args.verify_only or (drifted.empty and not args.rebuild):
+        raise SystemExit(0 if drifted.empty else 1)
+
+    print("\n🔧 Rebuilding rating summary...")
+    rebuild_ratings()
+    print("✅ Rebuild complete.")
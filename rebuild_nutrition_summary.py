@@ -0,0 +1,83 @@
+# rebuild_nutrition_summary.py
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from shared import engine
+from nutrition import NUTRIENTS, recipe_nutrition
+from daily_nutrition import rebuild_all
+
+# Summary values are kept unrounded (DECIMAL(14,4)); compare at display precision
+TOLERANCE = 0.01
+
+
+# -----------------------------
+# VERIFY SUMMARY TABLE
+# -----------------------------
+def verify_summary():
+    """
+    Compare Recipe_Nutrition_Summary against a full recomputation.
+
+    Returns a DataFrame of drifted recipes (missing rows, stale rows for
+    deleted recipes, or totals that differ by more than TOLERANCE).
+    """
+    expected = recipe_nutrition()
+    stored = pd.read_sql(
+        text(f"SELECT Recipe_ID, {', '.join(NUTRIENTS)} FROM Recipe_Nutrition_Summary"),
+        engine
+    )
+
+    merged = expected.merge(stored, on="Recipe_ID", how="outer",
+                            suffixes=("_expected", "_stored"), indicator=True)
+
+    drift = merged["_merge"] != "both"
+    for col in NUTRIENTS:
+        diff = (merged[f"{col}_expected"].astype(float) - merged[f"{col}_stored"].astype(float)).abs()
+        drift |= diff.fillna(np.inf) > TOLERANCE
+
+    return merged[drift]
+
+
+# -----------------------------
+# REBUILD SUMMARY TABLE
+# -----------------------------
+def rebuild_summary():
+    """
+    Recompute every row of Recipe_Nutrition_Summary in one transaction.
+    The rebuild bypasses the stale-recipe triggers, so the daily diet log
+    rollups are rebuilt afterwards as well.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CALL RebuildRecipeNutritionSummary()"))
+    rebuild_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and rebuild Recipe_Nutrition_Summary")
+    parser.add_argument("--verify-only", action="store_true",
+                        help="report drift without rebuilding")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild even if no drift is found")
+    args = parser.parse_args()
+
+    print("🔍 Verifying Recipe_Nutrition_Summary against full recomputation...\n")
+    drifted = verify_summary()
+
+    if drifted.empty:
+        print("✔ Summary table matches recomputation.")
+    else:
+        print(f"⚠ {len(drifted)} recipe(s) drifted:")
+        print(drifted.drop(columns=["_merge"]).to_string(index=False))
+
+    if args.verify_only or (drifted.empty and not args.force):
+        raise SystemExit(0 if drifted.empty else 1)
+
+    print("\n🔧 Rebuilding summary table...")
+    rebuild_summary()
+
+    remaining = verify_summary()
+    if remaining.empty:
+        print("✅ Rebuild complete, summary verified.")
+    else:
+        print(f"❌ {len(remaining)} recipe(s) still differ after rebuild!")
+        raise SystemExit(1)
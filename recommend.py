@@ -0,0 +1,436 @@
+# recommend.py
+"""
+Recipe recommendations: "more like this" and "recommended for you".
+
+Each recipe is a unit vector built from
+  * its ingredients: IDF-weighted sum of a random projection per
+    Ingredient_ID (ING_DIM dimensions), and
+  * its nutrient profile: energy share of carbs / protein / fat, log
+    calories and fiber density, standardized over all recipes.
+A user is the weighted sum of the recipes they rated (Feedback, centred
+on NEUTRAL_RATING) and logged recently (User_Diet_Log).
+
+Neighbours come from an in-memory IVF index per process: spherical
+k-means lists, a query scores only the N_PROBE closest lists. Like
+search.py it replays Search_Index_Changes (change_log.py): a changed
+recipe gets a new slot in its nearest list and the old slot is
+tombstoned. Once the changes pass REBUILD_FRACTION of the index, the
+next sync rebuilds it.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from change_log import Cursor
+from shared import engine, fetch
+from nutrition import NUTRIENTS
+
+ING_DIM = 64
+
+# Weight of the ingredient / nutrient parts (squares sum to 1)
+ING_WEIGHT = 0.8
+NUT_WEIGHT = 0.6
+
+# IVF parameters: lists ~ sqrt(recipes), probed per query
+N_PROBE = 24
+MAX_LISTS = 1024
+KMEANS_ITER = 8
+KMEANS_SAMPLE = 20_000
+
+# Seconds between change-log polls; a lookup in between uses the index as is
+SYNC_INTERVAL = float(os.environ.get("RECOMMEND_SYNC_INTERVAL", 1.0))
+
+# Changed recipes (as a fraction of the index) that trigger a rebuild
+REBUILD_FRACTION = 0.1
+
+# User profile: ratings above / below this pull towards / push away
+NEUTRAL_RATING = 3
+HISTORY_DAYS = 90
+FINISHED_WEIGHT = 1.0
+UNFINISHED_WEIGHT = 0.5
+
+SEED = 17
+
+_COLUMNS = ["Recipe_ID", "Recipe_Name", "Cuisine_Type", "Calories", "Similarity"]
+
+
+# -----------------------------
+# SOURCE ROWS
+# -----------------------------
+_RECIPE_SQL = f"""
+    SELECT r.Recipe_ID, r.Recipe_Name, r.Cuisine_Type,
+           {', '.join('IFNULL(s.' + c + ', 0) AS ' + c for c in NUTRIENTS)}
+    FROM Recipe r
+    LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+"""
+
+_INGREDIENT_SQL = "SELECT DISTINCT Recipe_ID, Ingredient_ID FROM Recipe_Ingredient"
+
+
+def _read(conn, recipe_ids=None):
+    """(recipes, recipe-ingredient pairs) for all recipes or for `recipe_ids`."""
+    if recipe_ids is None:
+        recipes = pd.read_sql(text(_RECIPE_SQL + " ORDER BY r.Recipe_ID"), conn)
+        pairs = pd.read_sql(text(_INGREDIENT_SQL), conn)
+    else:
+        params = {"ids": list(recipe_ids)}
+        recipes = pd.read_sql(text(_RECIPE_SQL + " WHERE r.Recipe_ID IN :ids")
+                              .bindparams(bindparam("ids", expanding=True)), conn, params=params)
+        pairs = pd.read_sql(text(_INGREDIENT_SQL + " WHERE Recipe_ID IN :ids")
+                            .bindparams(bindparam("ids", expanding=True)), conn, params=params)
+    return recipes, pairs
+
+
+def _nutrient_features(values):
+    """(n, NUTRIENTS) totals -> (n, 5) energy shares, log calories, fiber density."""
+    kcal, carbs, protein, fat, fiber = values.T
+    energy = np.maximum(carbs * 4 + protein * 4 + fat * 9, 1e-6)
+    return np.column_stack([
+        carbs * 4 / energy,
+        protein * 4 / energy,
+        fat * 9 / energy,
+        np.log1p(np.maximum(kcal, 0)),
+        fiber * 1000 / np.maximum(kcal, 1),
+    ])
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def _spherical_kmeans(vectors, k, rng):
+    """Centroids (k, dim) of unit vectors, fitted on a sample."""
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(KMEANS_ITER):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=k) == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+# -----------------------------
+# INDEX
+# -----------------------------
+class RecommendIndex:
+    """Recipe vectors + IVF lists, with tombstones for changed recipes."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ids = []                 # slot -> Recipe_ID
+        self.pos = {}                 # Recipe_ID -> current slot
+        self.names = []
+        self.cuisines = []
+        self.calories = np.zeros(0, dtype=np.float64)
+        self.vectors = np.zeros((0, ING_DIM + 5), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.proj = {}                # Ingredient_ID -> projection row
+        self.idf = {}                 # Ingredient_ID -> idf
+        self.default_idf = 1.0
+        self.nut_mean = np.zeros(5)
+        self.nut_std = np.ones(5)
+        self.centroids = np.zeros((0, ING_DIM + 5), dtype=np.float32)
+        self.lists = []               # list -> slots (built)
+        self.extra = defaultdict(list)  # list -> slots added since the build
+        self.base_size = 0
+        self.changed = 0
+        self.rng = np.random.default_rng(SEED)
+        self.changes = Cursor()       # position in Search_Index_Changes
+        self.synced_at = 0.0
+        self.built_at = None
+
+    # -------- vectors --------
+    def _projection(self, ingredient_id):
+        row = self.proj.get(ingredient_id)
+        if row is None:
+            row = self.rng.standard_normal(ING_DIM).astype(np.float32) / np.sqrt(ING_DIM)
+            self.proj[ingredient_id] = row
+        return row
+
+    def _embed(self, ingredient_part, nutrients):
+        """Combine the two parts into unit vectors (float32)."""
+        z = (_nutrient_features(nutrients) - self.nut_mean) / self.nut_std
+        vectors = np.hstack([
+            ING_WEIGHT * _normalize(ingredient_part),
+            NUT_WEIGHT * z / np.sqrt(z.shape[1]),
+        ])
+        return _normalize(vectors).astype(np.float32)
+
+    # -------- building --------
+    def build(self):
+        """Full rebuild from the database."""
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            # Changes after this point are replayed by sync(); replaying is idempotent
+            changes = Cursor.start(conn)
+            recipes, pairs = _read(conn)
+        self.load(recipes, pairs, changes)
+        return time.perf_counter() - start
+
+    def load(self, recipes, pairs, changes=None):
+        """Build the index from recipe rows (Recipe_ID order) and recipe-ingredient pairs."""
+        rng = np.random.default_rng(SEED)
+        ids = recipes["Recipe_ID"].to_numpy(dtype=np.int64)
+        n = len(ids)
+
+        pairs = pairs[pairs["Recipe_ID"].isin(ids)]
+        slots = np.searchsorted(ids, pairs["Recipe_ID"].to_numpy(dtype=np.int64))
+        ingredient_ids, inverse, df = np.unique(pairs["Ingredient_ID"].to_numpy(dtype=np.int64),
+                                                return_inverse=True, return_counts=True)
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        proj = (rng.standard_normal((len(ingredient_ids), ING_DIM)) / np.sqrt(ING_DIM)).astype(np.float32)
+
+        # Sum each recipe's weighted projections (grouped by slot)
+        ingredient_part = np.zeros((n, ING_DIM), dtype=np.float32)
+        if len(slots):
+            order = np.argsort(slots, kind="stable")
+            slots, inverse = slots[order], inverse[order]
+            starts = np.flatnonzero(np.r_[True, slots[1:] != slots[:-1]])
+            ingredient_part[slots[starts]] = np.add.reduceat(proj[inverse] * idf[inverse, None], starts)
+
+        nutrients = recipes[NUTRIENTS].to_numpy(dtype=np.float64)
+        features = _nutrient_features(nutrients)
+
+        lists_n = int(np.clip(np.sqrt(n), 1, MAX_LISTS)) if n else 0
+
+        with self._lock:
+            self._reset()
+            self.rng = rng
+            self.proj = dict(zip(ingredient_ids.tolist(), proj))
+            self.idf = dict(zip(ingredient_ids.tolist(), idf.tolist()))
+            self.default_idf = float(np.log(1 + n) + 1)
+            if n:
+                self.nut_mean = features.mean(axis=0)
+                self.nut_std = np.maximum(features.std(axis=0), 1e-6)
+
+            self.ids = ids.tolist()
+            self.pos = {rid: p for p, rid in enumerate(self.ids)}
+            self.names = recipes["Recipe_Name"].tolist()
+            self.cuisines = recipes["Cuisine_Type"].tolist()
+            self.calories = nutrients[:, 0].copy()
+            self.vectors = self._embed(ingredient_part, nutrients)
+            self.alive = np.ones(n, dtype=bool)
+
+            if n:
+                self.centroids = _spherical_kmeans(self.vectors, lists_n, rng)
+                assign = np.concatenate([
+                    np.argmax(self.vectors[i:i + 10_000] @ self.centroids.T, axis=1)
+                    for i in range(0, n, 10_000)
+                ])
+                order = np.argsort(assign, kind="stable").astype(np.int32)
+                bounds = np.r_[0, np.cumsum(np.bincount(assign, minlength=lists_n))]
+                self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(lists_n)]
+
+            self.base_size = n
+            self.changes = changes or Cursor()
+            self.synced_at = time.monotonic()
+            self.built_at = time.time()
+
+    def _grow(self, n):
+        if n <= len(self.alive):
+            return
+        size = max(n, len(self.alive) * 2, 16)
+        vectors = np.zeros((size, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:len(self.vectors)] = self.vectors
+        self.vectors = vectors
+        self.calories = np.resize(self.calories, size)
+        alive = np.zeros(size, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+
+    def _add(self, row, ingredient_ids):
+        """Put one recipe (a row of _RECIPE_SQL) into a new slot of its nearest list."""
+        part = np.zeros((1, ING_DIM), dtype=np.float32)
+        for iid in ingredient_ids:
+            part[0] += self._projection(iid) * self.idf.get(iid, self.default_idf)
+        nutrients = np.array([[float(row[c]) for c in NUTRIENTS]])
+        vector = self._embed(part, nutrients)[0]
+
+        p = len(self.ids)
+        self._grow(p + 1)
+        self.ids.append(int(row["Recipe_ID"]))
+        self.names.append(row["Recipe_Name"])
+        self.cuisines.append(row["Cuisine_Type"])
+        self.pos[int(row["Recipe_ID"])] = p
+        self.vectors[p] = vector
+        self.calories[p] = nutrients[0, 0]
+        self.alive[p] = True
+        self.extra[int(np.argmax(self.centroids @ vector))].append(p)
+
+    # -------- incremental sync --------
+    def sync(self, force=False):
+        """
+        Apply Search_Index_Changes after the watermark; rebuild if enough
+        recipes changed. Only one thread syncs at a time; others keep using
+        the current index (except before the first build, where they wait).
+        """
+        if not force and self.built_at is not None and time.monotonic() - self.synced_at < SYNC_INTERVAL:
+            return
+        if not self._sync_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.built_at is None or not len(self.centroids):
+                self.build()
+            else:
+                self._apply_changes()
+        finally:
+            self._sync_lock.release()
+
+    def _apply_changes(self):
+        with engine.connect() as conn:
+            if self.changes.pruned(conn):
+                self.build()
+                return
+
+            changed, after = self.changes.read(conn)
+            self.synced_at = time.monotonic()
+            if not changed:
+                self.changes = after
+                return
+
+            if self.changed + len(changed) > max(REBUILD_FRACTION * self.base_size, 1000):
+                self.build()
+                return
+
+            recipes, pairs = _read(conn, changed)
+
+        ingredients = pairs.groupby("Recipe_ID")["Ingredient_ID"].apply(list).to_dict()
+        with self._lock:
+            for rid in changed:
+                p = self.pos.pop(rid, None)
+                if p is not None:
+                    self.alive[p] = False
+            for _, row in recipes.iterrows():
+                self._add(row, ingredients.get(row["Recipe_ID"], []))
+            self.changed += len(changed)
+            self.changes = after
+
+    # -------- queries --------
+    def neighbours(self, vector, k=10, exclude=()):
+        """Top-k live slots by cosine similarity to `vector`: (slots, scores)."""
+        probe = min(N_PROBE, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ vector), probe - 1)[:probe]
+        parts = [self.lists[c] for c in lists]
+        parts += [np.array(self.extra[c], dtype=np.int32) for c in lists if c in self.extra]
+        slots = np.concatenate(parts)
+        slots = slots[self.alive[slots]]
+        if len(exclude):
+            slots = slots[~np.isin(slots, exclude)]
+
+        scores = self.vectors[slots] @ vector
+        if len(slots) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            slots, scores = slots[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return slots[order], scores[order]
+
+    def _frame(self, slots, scores):
+        return pd.DataFrame({
+            "Recipe_ID": [self.ids[p] for p in slots],
+            "Recipe_Name": [self.names[p] for p in slots],
+            "Cuisine_Type": [self.cuisines[p] for p in slots],
+            "Calories": np.round(self.calories[slots], 2),
+            "Similarity": np.round(scores, 3),
+        }, columns=_COLUMNS)
+
+    def similar(self, recipe_id, k=10):
+        """Recipes most like `recipe_id`."""
+        self.sync()
+        with self._lock:
+            p = self.pos.get(int(recipe_id))
+            if p is None:
+                return pd.DataFrame(columns=_COLUMNS)
+            slots, scores = self.neighbours(self.vectors[p], k, exclude=np.array([p]))
+            return self._frame(slots, scores)
+
+    def recommend(self, weights, k=10, exclude=()):
+        """
+        Recipes closest to the weighted sum of the recipes in `weights`
+        ({Recipe_ID: weight}), leaving out those and `exclude`.
+        """
+        self.sync()
+        with self._lock:
+            known = [(self.pos[r], w) for r, w in weights.items() if r in self.pos]
+            if not known:
+                return pd.DataFrame(columns=_COLUMNS)
+            slots = np.array([p for p, _ in known])
+            profile = np.array([w for _, w in known], dtype=np.float32) @ self.vectors[slots]
+            if not profile.any():
+                return pd.DataFrame(columns=_COLUMNS)
+
+            skip = [self.pos[r] for r in exclude if r in self.pos]
+            hits, scores = self.neighbours(_normalize(profile), k,
+                                           exclude=np.union1d(slots, skip).astype(np.int32))
+            return self._frame(hits, scores)
+
+    def stats(self):
+        with self._lock:
+            sizes = [len(l) for l in self.lists]
+            return {
+                "recipes": int(self.alive.sum()),
+                "base_recipes": self.base_size,
+                "changed_since_build": self.changed,
+                "lists": len(self.lists),
+                "mean_list_size": round(float(np.mean(sizes)), 1) if sizes else 0,
+                "ingredients": len(self.proj),
+                "watermark": self.changes.watermark,
+                "built_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.built_at))
+                            if self.built_at else None,
+            }
+
+
+# -----------------------------
+# USER PROFILES
+# -----------------------------
+def user_history(user_id):
+    """{Recipe_ID: weight} from the user's ratings and recent diet log."""
+    ratings = fetch("SELECT Recipe_ID, Rating FROM Feedback WHERE User_ID = :u AND Recipe_ID IS NOT NULL",
+                    {"u": user_id})
+    logged = fetch("""
+        SELECT Recipe_ID, SUM(Portion_Size * IF(is_finished, :fw, :uw)) AS Weight
+        FROM User_Diet_Log
+        WHERE User_ID = :u AND Recipe_ID IS NOT NULL AND Date >= CURDATE() - INTERVAL :days DAY
+        GROUP BY Recipe_ID
+    """, {"u": user_id, "fw": FINISHED_WEIGHT, "uw": UNFINISHED_WEIGHT, "days": HISTORY_DAYS})
+
+    weights = defaultdict(float)
+    for rid, rating in zip(ratings["Recipe_ID"], ratings["Rating"]):
+        weights[int(rid)] += float(rating) - NEUTRAL_RATING
+    for rid, w in zip(logged["Recipe_ID"], logged["Weight"]):
+        weights[int(rid)] += float(w)
+    return dict(weights)
+
+
+# One index per process, shared by all sessions
+_index = RecommendIndex()
+
+
+def get_index():
+    return _index
+
+
+def similar(recipe_id, k=10):
+    return _index.similar(recipe_id, k)
+
+
+def for_user(user_id, k=10, recipe_ids=()):
+    """
+    "Recommended for you": the user's history plus `recipe_ids` (e.g. the
+    current meal plan, weight 1 each). Already rated / logged / listed
+    recipes are left out.
+    """
+    weights = user_history(user_id)
+    for rid in recipe_ids:
+        weights[int(rid)] = weights.get(int(rid), 0.0) + 1.0
+    return _index.recommend(weights, k)
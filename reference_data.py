@@ -0,0 +1,175 @@
+# reference_data.py
+"""
+Process-wide pick-lists for recipes and ingredients, shared by all sessions.
+
+Each pick-list is built once per process into compact arrays (IDs sorted
+by name, one lower-cased search string) instead of a {label: id} dict per
+session per rerun. It is rebuilt only when its version moves:
+
+- writes to the table itself from this process bump shared.write_count()
+  (profile saves or procedure calls do not);
+- every REFRESH_SECONDS a cheap probe checks for writes from other
+  processes (recipes: the Search_Index_Changes watermark; ingredients
+  have no change log and are simply rebuilt, they are small).
+
+Pages select through select(), a search box plus a selectbox of at most
+MAX_OPTIONS matches, so the browser never receives 100k options.
+"""
+import os
+import threading
+import time
+import numpy as np
+from sqlalchemy import text
+from shared import engine, write_count
+
+# Options sent to a selectbox at once; the search box narrows the rest
+MAX_OPTIONS = 200
+
+# Seconds between probes for writes made by other processes
+REFRESH_SECONDS = float(os.environ.get("REFERENCE_REFRESH_SECONDS", 30))
+
+# kind -> table, ID column, name column, probe for other processes' writes
+SOURCES = {
+    "recipe": {
+        "table": "Recipe", "id": "Recipe_ID", "name": "Recipe_Name",
+        "probe": "SELECT MAX(Change_ID) FROM Search_Index_Changes",
+    },
+    "ingredient": {
+        "table": "Ingredient", "id": "Ingredient_ID", "name": "Ingredient_Name",
+        "probe": None,
+    },
+}
+
+
+# -----------------------------
+# PICK-LIST
+# -----------------------------
+class PickList:
+    """IDs and "Name (ID n)" labels sorted by name, searchable by substring or ID."""
+
+    def __init__(self, ids, names, version, probe):
+        order = sorted(range(len(ids)), key=lambda i: (names[i].lower(), ids[i]))
+        self.ids = np.asarray([ids[i] for i in order], dtype=np.int64)
+        self.labels = [f"{names[i]} (ID {ids[i]})" for i in order]
+
+        # Row i of the search string starts at self.starts[i]
+        lowered = [label.lower() for label in self.labels]
+        self.haystack = "\n".join(lowered)
+        self.starts = np.cumsum([0] + [len(s) + 1 for s in lowered[:-1]]) if lowered else np.zeros(0, np.int64)
+
+        # ID -> row, through a sorted copy of the IDs
+        self._by_id = np.argsort(self.ids, kind="stable")
+        self._sorted_ids = self.ids[self._by_id]
+
+        self.version = version
+        self.probe = probe
+        self.checked_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, item_id):
+        i = int(np.searchsorted(self._sorted_ids, item_id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == item_id:
+            return int(self._by_id[i])
+        return None
+
+    def label(self, item_id):
+        row = self._row(item_id)
+        return self.labels[row] if row is not None else f"(deleted) ID {item_id}"
+
+    def search(self, query="", limit=MAX_OPTIONS):
+        """IDs whose label contains `query` (case-insensitive), exact ID first; at most `limit`."""
+        query = (query or "").strip().lower()
+        if not query:
+            return [int(i) for i in self.ids[:limit]]
+
+        rows = []
+        if query.isdigit():
+            row = self._row(int(query))
+            if row is not None:
+                rows.append(row)
+
+        pos = self.haystack.find(query)
+        while pos != -1 and len(rows) < limit:
+            row = int(np.searchsorted(self.starts, pos, side="right")) - 1
+            if row not in rows:
+                rows.append(row)
+            # Continue after this row's label
+            nxt = self.starts[row + 1] if row + 1 < len(self.starts) else len(self.haystack)
+            pos = self.haystack.find(query, int(nxt))
+        return [int(self.ids[r]) for r in rows]
+
+    def nbytes(self):
+        return (self.ids.nbytes + self.starts.nbytes + self._by_id.nbytes + self._sorted_ids.nbytes
+                + len(self.haystack) + sum(len(label) for label in self.labels))
+
+
+# -----------------------------
+# STORE
+# -----------------------------
+_lists = {}
+_lock = threading.Lock()
+
+
+def _probe(kind):
+    sql = SOURCES[kind]["probe"]
+    if sql is None:
+        return None
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+
+def _build(kind, version):
+    src = SOURCES[kind]
+    probe = _probe(kind)
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT {src['id']}, {src['name']} FROM {src['table']}")).fetchall()
+    return PickList([int(r[0]) for r in rows], [str(r[1] or "") for r in rows], version, probe)
+
+
+def get(kind):
+    """The current pick-list for `kind` ("recipe" or "ingredient")."""
+    version = write_count(SOURCES[kind]["table"])
+    picks = _lists.get(kind)
+    if picks is not None and picks.version == version:
+        if time.monotonic() - picks.checked_at < REFRESH_SECONDS:
+            return picks
+        probe = _probe(kind)
+        if probe is not None and probe == picks.probe:
+            picks.checked_at = time.monotonic()
+            return picks
+
+    with _lock:
+        # Another session may have rebuilt it while we waited
+        picks = _lists.get(kind)
+        if picks is None or picks.version != version or time.monotonic() - picks.checked_at >= REFRESH_SECONDS:
+            picks = _build(kind, version)
+            _lists[kind] = picks
+    return picks
+
+
+def stats():
+    return {
+        kind: {"items": len(p), "version": p.version, "probe": p.probe,
+               "kb": round(p.nbytes() / 1024, 1)}
+        for kind, p in _lists.items()
+    }
+
+
+# -----------------------------
+# STREAMLIT WIDGET
+# -----------------------------
+def select(kind, label, key, limit=MAX_OPTIONS):
+    """Search box + selectbox over the shared pick-list; returns the chosen ID or None."""
+    import streamlit as st
+
+    picks = get(kind)
+    query = st.text_input(f"🔎 Search {label}", key=f"{key}_search", placeholder="Name or ID")
+    ids = picks.search(query, limit)
+    if not ids:
+        st.caption("No match.")
+        return None
+    if len(ids) == limit:
+        st.caption(f"Showing the first {limit:,} of {len(picks):,}; type to narrow the list.")
+    return st.selectbox(label, ids, format_func=picks.label, key=key)
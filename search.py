@@ -0,0 +1,413 @@
+# search.py
+"""
+In-process inverted index for recipe search.
+
+Indexes Recipe_Name, Description, Instructions, Cuisine_Type and the
+names of linked ingredients, ranks with BM25, expands the last query
+word as a prefix (autocomplete) and filters on recipe calories.
+
+The index is built once per process in a compact base segment (NumPy
+postings per term). Later changes, read from Search_Index_Changes, go
+into a small in-memory delta; changed base documents are tombstoned.
+When the delta grows past REBUILD_FRACTION of the base, the next sync
+rebuilds the base segment.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from change_log import Cursor
+from shared import engine
+
+# Per-field weights for term frequency
+FIELD_WEIGHTS = {
+    "Recipe_Name": 3.0,
+    "Cuisine_Type": 2.0,
+    "Ingredients": 2.0,
+    "Description": 1.0,
+    "Instructions": 0.5,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Vocabulary terms a trailing prefix may expand to
+MAX_PREFIX_TERMS = 50
+
+# Seconds between change-log polls; a search in between uses the index as is
+SYNC_INTERVAL = float(os.environ.get("SEARCH_SYNC_INTERVAL", 1.0))
+
+# Delta size (as a fraction of base documents) that triggers a rebuild
+REBUILD_FRACTION = 0.1
+
+# Change-log rows older than this are pruned on rebuild
+CHANGE_RETENTION_HOURS = 24
+
+BUILD_CHUNK = 10_000
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from in into is it of on or the then to with
+add until over your you minutes min
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value):
+    if not value:
+        return []
+    return [t for t in _TOKEN_RE.findall(str(value).lower()) if t not in STOP_WORDS and len(t) > 1]
+
+
+def weighted_terms(fields):
+    """{field: text} -> Counter of term -> weighted frequency."""
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(fields.get(field)):
+            tf[term] += weight
+    return tf
+
+
+# -----------------------------
+# SOURCE ROWS
+# -----------------------------
+_RECIPE_SQL = """
+    SELECT r.Recipe_ID, r.Recipe_Name, r.Description, r.Instructions, r.Cuisine_Type,
+           s.Calories
+    FROM Recipe r
+    LEFT JOIN Recipe_Nutrition_Summary s ON s.Recipe_ID = r.Recipe_ID
+"""
+
+_INGREDIENT_SQL = """
+    SELECT ri.Recipe_ID, i.Ingredient_Name
+    FROM Recipe_Ingredient ri
+    JOIN Ingredient i ON i.Ingredient_ID = ri.Ingredient_ID
+"""
+
+
+def _iter_documents(conn, lookup, recipe_ids=None):
+    """
+    Yield (recipe_id, name, calories, fields) for all recipes (streamed
+    from `conn`) or for `recipe_ids`. Ingredient names are read per chunk
+    on `lookup`, which must be a different connection when streaming.
+    """
+    if recipe_ids is None:
+        recipes = conn.execution_options(stream_results=True).execute(
+            text(_RECIPE_SQL + " ORDER BY r.Recipe_ID"))
+    else:
+        recipes = conn.execute(
+            text(_RECIPE_SQL + " WHERE r.Recipe_ID IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(recipe_ids)})
+
+    ingredient_stmt = text(_INGREDIENT_SQL + " WHERE ri.Recipe_ID IN :ids").bindparams(
+        bindparam("ids", expanding=True))
+
+    for rows in recipes.partitions(BUILD_CHUNK):
+        names = defaultdict(list)
+        for rid, ing in lookup.execute(ingredient_stmt, {"ids": [r[0] for r in rows]}):
+            names[rid].append(ing)
+
+        for rid, name, desc, instr, cuisine, calories in rows:
+            fields = {"Recipe_Name": name, "Description": desc, "Instructions": instr,
+                      "Cuisine_Type": cuisine, "Ingredients": " ".join(names[rid])}
+            yield rid, name, calories, fields
+
+
+# -----------------------------
+# INDEX
+# -----------------------------
+class SearchIndex:
+    """BM25 inverted index: NumPy base segment + dict delta with tombstones."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ids = []                 # position -> Recipe_ID
+        self.pos = {}                 # Recipe_ID -> position
+        self.names = []               # position -> Recipe_Name
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.calories = np.zeros(0, dtype=np.float64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.base = {}                # term -> (positions int32, tf float32)
+        self.base_size = 0
+        self.base_live = np.zeros(0, dtype=bool)
+        self.delta = defaultdict(dict)  # term -> {position: tf}
+        self.delta_terms = {}         # position -> terms, for removal
+        self.df = Counter()
+        self.vocab = []               # sorted terms for prefix lookup
+        self.total_len = 0.0
+        self.changes = Cursor()       # position in Search_Index_Changes
+        self.synced_at = 0.0
+        self.built_at = None
+
+    # -------- building --------
+    def build(self):
+        """Full rebuild of the base segment from the database."""
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM Search_Index_Changes WHERE Changed_At < NOW() - INTERVAL :h HOUR"
+            ), {"h": CHANGE_RETENTION_HOURS})
+
+        with engine.connect() as conn, engine.connect() as lookup:
+            # Changes after this point are replayed by sync(); replaying is idempotent
+            changes = Cursor.start(conn)
+
+            ids, names, lengths, calories = [], [], [], []
+            postings = defaultdict(lambda: ([], []))
+            for rid, name, cal, fields in _iter_documents(conn, lookup):
+                p = len(ids)
+                tf = weighted_terms(fields)
+                ids.append(rid)
+                names.append(name)
+                lengths.append(sum(tf.values()))
+                calories.append(np.nan if cal is None else float(cal))
+                for term, w in tf.items():
+                    plist, wlist = postings[term]
+                    plist.append(p)
+                    wlist.append(w)
+
+        with self._lock:
+            self._reset()
+            self.ids = ids
+            self.pos = {rid: p for p, rid in enumerate(ids)}
+            self.names = names
+            self.doc_len = np.array(lengths, dtype=np.float32)
+            self.calories = np.array(calories, dtype=np.float64)
+            self.alive = np.ones(len(ids), dtype=bool)
+            self.base = {t: (np.array(p, dtype=np.int32), np.array(w, dtype=np.float32))
+                         for t, (p, w) in postings.items()}
+            self.base_size = len(ids)
+            self.base_live = np.ones(len(ids), dtype=bool)
+            self.df = Counter({t: len(p) for t, (p, _) in self.base.items()})
+            self.vocab = sorted(self.base)
+            self.total_len = float(self.doc_len.sum())
+            self.changes = changes
+            self.synced_at = time.monotonic()
+            self.built_at = time.time()
+        return time.perf_counter() - start
+
+    def _grow(self, n):
+        if n <= len(self.doc_len):
+            return
+        size = max(n, len(self.doc_len) * 2, 16)
+        self.doc_len = np.resize(self.doc_len, size)
+        self.calories = np.resize(self.calories, size)
+        alive = np.zeros(size, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+
+    def _remove(self, p):
+        if not self.alive[p]:
+            return
+        self.alive[p] = False
+        self.total_len -= float(self.doc_len[p])
+        if p < self.base_size and self.base_live[p]:
+            # Base postings are immutable; their df counts (and so IDF and
+            # suggestions) are only corrected by the next rebuild
+            self.base_live[p] = False
+        for term in self.delta_terms.pop(p, ()):
+            self.delta[term].pop(p, None)
+            self.df[term] -= 1
+
+    def _add(self, rid, name, cal, fields):
+        p = self.pos.get(rid)
+        if p is None:
+            p = len(self.ids)
+            self.ids.append(rid)
+            self.names.append(name)
+            self.pos[rid] = p
+            self._grow(p + 1)
+        else:
+            self.names[p] = name
+
+        tf = weighted_terms(fields)
+        for term, w in tf.items():
+            self.delta[term][p] = w
+            i = bisect.bisect_left(self.vocab, term)
+            if i == len(self.vocab) or self.vocab[i] != term:
+                self.vocab.insert(i, term)
+            self.df[term] += 1
+        self.delta_terms[p] = list(tf)
+        self.doc_len[p] = sum(tf.values())
+        self.calories[p] = np.nan if cal is None else float(cal)
+        self.alive[p] = True
+        self.total_len += float(self.doc_len[p])
+
+    # -------- incremental sync --------
+    def sync(self, force=False):
+        """
+        Apply Search_Index_Changes after the watermark; rebuild if the delta
+        got big. Only one thread syncs at a time; others keep searching the
+        current index (except before the first build, where they wait).
+        """
+        if not force and self.built_at is not None and time.monotonic() - self.synced_at < SYNC_INTERVAL:
+            return
+        if not self._sync_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.built_at is None:
+                self.build()
+            else:
+                self._apply_changes()
+        finally:
+            self._sync_lock.release()
+
+    def _apply_changes(self):
+        with engine.connect() as conn:
+            if self.changes.pruned(conn):
+                # Entries we have not seen were pruned by another process's rebuild
+                self.build()
+                return
+
+            changed, after = self.changes.read(conn)
+            self.synced_at = time.monotonic()
+            if not changed:
+                self.changes = after
+                return
+
+            if len(self.delta_terms) + len(changed) > max(REBUILD_FRACTION * self.base_size, 1000):
+                self.build()
+                return
+
+            docs = {rid: (name, cal, fields) for rid, name, cal, fields in _iter_documents(conn, conn, changed)}
+
+        with self._lock:
+            for rid in changed:
+                p = self.pos.get(rid)
+                if p is not None:
+                    self._remove(p)
+                if rid in docs:
+                    self._add(rid, *docs[rid])
+            self.changes = after
+
+    # -------- queries --------
+    def _live_count(self):
+        return int(self.alive.sum())
+
+    def _expand(self, tokens, prefix):
+        """Query tokens -> [(term, boost)]; the last token also matches as a prefix."""
+        terms = [(t, 1.0) for t in tokens]
+        if prefix and tokens:
+            last = tokens[-1]
+            i = bisect.bisect_left(self.vocab, last)
+            matches = []
+            while i < len(self.vocab) and self.vocab[i].startswith(last):
+                if self.vocab[i] != last:
+                    matches.append(self.vocab[i])
+                i += 1
+            matches.sort(key=lambda t: -self.df[t])
+            terms += [(t, 0.8) for t in matches[:MAX_PREFIX_TERMS]]
+        return terms
+
+    def search(self, query, limit=20, min_calories=None, max_calories=None, prefix=True):
+        """
+        Ranked search. Returns a DataFrame (Recipe_ID, Recipe_Name,
+        Calories, Score), best first. An empty query with a calorie range
+        lists recipes in that range.
+        """
+        self.sync()
+        with self._lock:
+            n = len(self.ids)
+            if n == 0:
+                return pd.DataFrame(columns=["Recipe_ID", "Recipe_Name", "Calories", "Score"])
+
+            live = self._live_count()
+            avg_len = self.total_len / live if live else 1.0
+            scores = np.zeros(n, dtype=np.float64)
+            matched = np.zeros(n, dtype=bool)
+            doc_len = self.doc_len[:n]
+            tokens = tokenize(query)
+
+            for term, boost in self._expand(tokens, prefix):
+                df = self.df.get(term, 0)
+                if df <= 0:
+                    continue
+                idf = np.log(1 + (live - df + 0.5) / (df + 0.5)) * boost
+
+                if term in self.base:
+                    p, tf = self.base[term]
+                    keep = self.base_live[p]
+                    p, tf = p[keep], tf[keep]
+                    contrib = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_len[p] / avg_len))
+                    np.add.at(scores, p, contrib)
+                    matched[p] = True
+
+                for p, tf in self.delta.get(term, {}).items():
+                    scores[p] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_len[p] / avg_len))
+                    matched[p] = True
+
+            mask = self.alive[:n].copy()
+            if tokens:
+                mask &= matched
+            calories = self.calories[:n]
+            if min_calories is not None:
+                mask &= calories >= min_calories
+            if max_calories is not None:
+                mask &= calories <= max_calories
+
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > limit:
+                top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                candidates = candidates[top]
+            order = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+            return pd.DataFrame({
+                "Recipe_ID": [self.ids[p] for p in order],
+                "Recipe_Name": [self.names[p] for p in order],
+                "Calories": np.round(calories[order], 2),
+                "Score": np.round(scores[order], 3),
+            })
+
+    def suggest(self, prefix, limit=10):
+        """Autocomplete: vocabulary terms starting with `prefix`, most common first."""
+        self.sync()
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        with self._lock:
+            i = bisect.bisect_left(self.vocab, prefix)
+            terms = []
+            while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+                if self.df[self.vocab[i]] > 0:
+                    terms.append(self.vocab[i])
+                i += 1
+            return sorted(terms, key=lambda t: -self.df[t])[:limit]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": self._live_count(),
+                "base_documents": self.base_size,
+                "delta_documents": len(self.delta_terms),
+                "terms": len(self.vocab),
+                "base_postings": int(sum(len(p) for p, _ in self.base.values())),
+                "watermark": self.changes.watermark,
+                "built_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.built_at))
+                            if self.built_at else None,
+            }
+
+
+# One index per process, shared by all sessions
+_index = SearchIndex()
+
+
+def get_index():
+    return _index
+
+
+def search(query, limit=20, min_calories=None, max_calories=None):
+    return _index.search(query, limit, min_calories, max_calories)
+
+
+def suggest(prefix, limit=10):
+    return _index.suggest(prefix, limit)
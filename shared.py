@@ -1,31 +1,335 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
 import pandas as pd
-from sqlalchemy import create_engine, text
-from urllib.parse import quote_plus
+from sqlalchemy import exc, text
+from database import ReplicaSet, load_db_config, make_engine
+from metrics import instrumented, record
 
-# -------- DATABASE CONFIG --------
-DB_USER = "root"
-DB_PASS = quote_plus("oppoa12@bharath")   # encode @
-DB_HOST = "localhost"
-DB_NAME = "NutritionDB"
+# -------- DATABASE ENGINE --------
+# Connection and pool settings come from db_config.ini / NUTRITION_DB_* env
+# vars (see database.py). `engine` is the primary; fetch()/load_data() read
+# from a healthy replica when any are configured.
+engine = make_engine()
+replicas = ReplicaSet.from_config()
+
+# After a write, the writing Streamlit session (or, outside Streamlit, the
+# process) reads from the primary for this long, so it sees its own writes
+STICKY_SECONDS = float(load_db_config()["sticky_seconds"])
+
+# -------- QUERY CACHE CONFIG --------
+# Read results are memoized per process. Writes made through run_query()
+# invalidate affected entries immediately; writes from other processes
+# are only picked up once the TTL expires.
+CACHE_TTL_SECONDS = float(os.environ.get("QUERY_CACHE_TTL", 60))
+CACHE_MAX_ENTRIES = int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", 256))
+CACHE_MAX_BYTES = int(os.environ.get("QUERY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Tables whose contents change when the key table is written, through
+# triggers or ON DELETE/UPDATE CASCADE / SET NULL foreign keys
+TABLE_DEPENDENTS = {
+    "user": {"recipe", "user_diet_log", "meal_plan", "feedback", "user_weight_history",
+             "user_daily_nutrition"},
+    "recipe": {"recipe_log", "recipe_nutrition_summary", "recipe_ingredient",
+               "user_diet_log", "feedback", "mealplan_recipes", "recipe_rating_summary"},
+    "ingredient": {"nutrition", "recipe_ingredient"},
+    "nutrition": {"recipe_nutrition_summary"},
+    "recipe_ingredient": {"recipe_nutrition_summary"},
+    "meal_plan": {"mealplan_recipes"},
+    "user_diet_log": {"user_daily_nutrition"},
+    "feedback": {"recipe_rating_summary"},
+}
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE)\s+`?(\w+)`?", re.IGNORECASE)
+_READ_RE = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+
+# (sql, params) -> (expires_at, tables, nbytes, DataFrame)
+_cache = OrderedDict()
+_cache_bytes = 0
+_generation = 0     # bumped on every invalidation
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+_last_write = 0.0   # monotonic time of the last write in this process
+_table_versions = {}    # lower-cased table -> writes seen by invalidate()
+_full_invalidations = 0
+_direct_writes = {}     # lower-cased table -> writes naming that table itself
+
+
+# -------- READ ROUTING --------
+def _session_state():
+    """Session state of the running Streamlit script, or None (CLI scripts, threads)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    if get_script_run_ctx() is None:
+        return None
+    import streamlit as st
+    return st.session_state
+
+
+def _note_write():
+    global _last_write
+    _last_write = time.monotonic()
+    state = _session_state()
+    if state is not None:
+        state["_primary_until"] = _last_write + STICKY_SECONDS
+
+
+def _sticky():
+    state = _session_state()
+    if state is not None:
+        return state.get("_primary_until", 0.0) > time.monotonic()
+    return time.monotonic() - _last_write < STICKY_SECONDS
+
+
+def read_engine():
+    """Engine for a read: the primary right after this session wrote, else a healthy replica."""
+    if _sticky():
+        return engine
+    return replicas.pick() or engine
+
+
+def _routed_read(read):
+    """
+    Run read(engine) on a replica, falling back to the primary if the
+    replica is unreachable. Returns (result, from_replica).
+    """
+    target = read_engine()
+    if target is not engine:
+        try:
+            return read(target), True
+        except exc.OperationalError as e:
+            replicas.mark_down(target, e)
+    return read(engine), False
+
+
+# -------- CACHE HELPERS --------
+def tables_in(query):
+    """Lower-cased table names a statement reads or writes."""
+    return {t.lower() for t in _TABLE_RE.findall(query)}
+
+
+def _with_dependents(tables):
+    result, pending = set(), list(tables)
+    while pending:
+        t = pending.pop()
+        if t not in result:
+            result.add(t)
+            pending.extend(TABLE_DEPENDENTS.get(t, ()))
+    return result
+
+
+def _cache_key(query, params):
+    return (" ".join(query.split()), tuple(sorted((params or {}).items(), key=lambda kv: kv[0])))
+
+
+def _drop(key):
+    global _cache_bytes
+    _, _, nbytes, _ = _cache.pop(key)
+    _cache_bytes -= nbytes
+
+
+def invalidate(tables=None):
+    """
+    Drop cached results touching any of `tables` (all entries if None).
+    Every write path calls this, so it also starts read-your-writes
+    stickiness for the session.
+    """
+    global _cache_bytes, _generation, _full_invalidations
+    _note_write()
+    with _cache_lock:
+        _generation += 1
+        if tables is None:
+            _full_invalidations += 1
+            dropped = len(_cache)
+            _cache.clear()
+            _cache_bytes = 0
+        else:
+            named = {t.lower() for t in tables}
+            for t in named:
+                _direct_writes[t] = _direct_writes.get(t, 0) + 1
+            affected = _with_dependents(named)
+            for t in affected:
+                _table_versions[t] = _table_versions.get(t, 0) + 1
+            stale = [k for k, (_, deps, _, _) in _cache.items() if deps & affected]
+            for k in stale:
+                _drop(k)
+            dropped = len(stale)
+        _stats["invalidations"] += dropped
+
+
+def data_version(table):
+    """
+    Counter that grows whenever this process writes `table` (or one it
+    depends on); compare it to skip rebuilding data derived from the table.
+    """
+    with _cache_lock:
+        return _table_versions.get(table.lower(), 0) + _full_invalidations
+
+
+def write_count(table):
+    """
+    Writes this process made to `table` itself: not to tables it depends
+    on, and not procedure calls or other invalidate() without tables.
+    For data that only changes with the table's own rows (pick-lists).
+    """
+    with _cache_lock:
+        return _direct_writes.get(table.lower(), 0)
+
+
+def cache_stats():
+    """Hit/miss counters and current cache size."""
+    with _cache_lock:
+        return dict(_stats, entries=len(_cache), bytes=_cache_bytes)
+
+
+def cache_lookup(query, params):
+    """
+    (key, cached DataFrame or None, generation) for a read about to run.
+    key is None for uncacheable params (e.g. lists for IN clauses).
+    """
+    try:
+        key = _cache_key(query, params)
+        hash(key)
+    except TypeError:
+        return None, None, None
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return key, entry[3].copy(), _generation
+        if entry:
+            _drop(key)
+        _stats["misses"] += 1
+        return key, None, _generation
+
+
+def cache_store(key, query, df, generation, from_replica=False):
+    """Cache a result read after cache_lookup() returned `generation`."""
+    global _cache_bytes
+    if key is None:
+        return
+    nbytes = int(df.memory_usage(deep=True).sum())
+    if nbytes > CACHE_MAX_BYTES:
+        return
+    if from_replica and time.monotonic() - _last_write < STICKY_SECONDS:
+        # The replica may not have caught up with a recent write yet
+        return
+
+    with _cache_lock:
+        if generation != _generation:
+            # A write landed while we were reading; don't cache a stale result
+            return
+        if key in _cache:
+            _drop(key)
+        _cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, tables_in(query), nbytes, df.copy())
+        _cache_bytes += nbytes
+        while len(_cache) > CACHE_MAX_ENTRIES or _cache_bytes > CACHE_MAX_BYTES:
+            _drop(next(iter(_cache)))
+            _stats["evictions"] += 1
+
+
+def _timed_read(kind, query, read):
+    """
+    read() -> (DataFrame, from_replica), recorded in metrics under `kind`.
+    Only reads that reach the database go through here, so cache hits
+    don't count towards query latency, rows or bytes.
+    """
+    start = time.perf_counter()
+    try:
+        df, from_replica = read()
+    except Exception:
+        record(kind, query, time.perf_counter() - start, error=True)
+        raise
+    record(kind, query, time.perf_counter() - start, len(df), int(df.memory_usage(deep=True).sum()))
+    return df, from_replica
+
+
+def _cached_read(kind, query, params, loader):
+    """loader(engine) -> DataFrame; runs on a replica or the primary (see read_engine)."""
+    key, df, generation = cache_lookup(query, params)
+    if df is not None:
+        return df
+    df, from_replica = _timed_read(kind, query, lambda: _routed_read(loader))
+    cache_store(key, query, df, generation, from_replica)
+    return df
 
-# SQLAlchemy engine
-engine = create_engine(
-    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}/{DB_NAME}",
-    pool_pre_ping=True
-)
 
 # -------- SIMPLE QUERY EXECUTOR --------
+@instrumented("run_query")
 def run_query(query, params=None):
-    """Execute INSERT/UPDATE/DELETE safely."""
+    """Execute INSERT/UPDATE/DELETE safely. Returns the affected row count."""
     with engine.begin() as conn:
-        conn.execute(text(query), params or {})
+        rowcount = conn.execute(text(query), params or {}).rowcount
+
+    # Procedures and DDL can touch anything; plain DML only its tables
+    if re.match(r"^\s*(?:INSERT|REPLACE|UPDATE|DELETE)\b", query, re.IGNORECASE):
+        invalidate(tables_in(query))
+    else:
+        invalidate()
+    return rowcount
 
 # -------- LOAD TABLE AS DATAFRAME --------
 def load_data(table):
     """Load an entire table as a pandas DataFrame."""
-    return pd.read_sql(text(f"SELECT * FROM {table}"), engine)
+    query = f"SELECT * FROM {table}"
+    return _cached_read("load_data", query, None, lambda eng: pd.read_sql(text(query), eng))
 
 # -------- RUN SELECT QUERY --------
 def fetch(query, params=None):
     """Fetch read-only SQL results as DataFrame."""
-    return pd.read_sql(text(query), engine, params=params or {})
+    def loader(eng):
+        return pd.read_sql(text(query), eng, params=params or {})
+
+    if not _READ_RE.match(query):
+        # SHOW/EXPLAIN are not cached; anything else may have written
+        df, _ = _timed_read("fetch", query, lambda: (loader(engine), False))
+        if not re.match(r"^\s*(?:SHOW|EXPLAIN|DESCRIBE|DESC)\b", query, re.IGNORECASE):
+            invalidate()
+        return df
+
+    return _cached_read("fetch", query, params, loader)
+
+
+# -------- STORED PROCEDURES / FUNCTIONS --------
+@instrumented("call_procedure")
+def call_procedure(proc_name, params=None):
+    """CALL a stored procedure; returns its result set (or an empty DataFrame)."""
+    with engine.begin() as conn:
+        if params:
+            placeholders = ", ".join([f":{p}" for p in params.keys()])
+            q = text(f"CALL {proc_name}({placeholders})")
+            result = conn.execute(q, params)
+        else:
+            q = text(f"CALL {proc_name}()")
+            result = conn.execute(q)
+
+        try:
+            df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        except:
+            df = pd.DataFrame()
+
+    # Procedures may write any table
+    invalidate()
+    return df
+
+
+@instrumented("call_function")
+def call_function(func_name, params=None):
+    """SELECT a stored function and return its scalar result."""
+    with engine.begin() as conn:
+        if params:
+            placeholders = ", ".join([f":{p}" for p in params.keys()])
+            q = text(f"SELECT {func_name}({placeholders}) AS result")
+            r = conn.execute(q, params)
+        else:
+            q = text(f"SELECT {func_name}() AS result")
+            r = conn.execute(q)
+
+        row = r.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,109 @@
+# weight_history.py
+"""
+Weight history chart data.
+
+Readings are averaged per day / week / month in SQL (covering index
+idx_uwh_user_time), then thinned with Largest-Triangle-Three-Buckets
+so the browser never gets more than MAX_POINTS points, whatever the
+history length. The raw records are paged separately (pagination.py).
+"""
+import numpy as np
+import pandas as pd
+from shared import fetch
+from pagination import keyset_page
+
+# Points sent to st.line_chart
+MAX_POINTS = 500
+
+# Bucket -> SQL expression for the start of the period (weeks start on Monday)
+BUCKETS = {
+    "Daily": "DATE(Updated_At)",
+    "Weekly": "DATE(Updated_At) - INTERVAL WEEKDAY(Updated_At) DAY",
+    "Monthly": "DATE(Updated_At) - INTERVAL (DAYOFMONTH(Updated_At) - 1) DAY",
+    "Raw": None,
+}
+
+PAGE_SIZE = 50
+
+
+# -----------------------------
+# DOWNSAMPLING
+# -----------------------------
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape of (x, y). First and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:nhi].mean(), y[hi:nhi].mean()
+
+        # Twice the triangle area (previous pick, candidate, next bucket average)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+# -----------------------------
+# CHART / TABLE
+# -----------------------------
+def bucketed(user_id, bucket="Daily"):
+    """One row per period (Period, Weight, Min_Weight, Max_Weight, Readings)."""
+    expr = BUCKETS[bucket]
+    if expr is None:
+        return fetch("""
+            SELECT Updated_At AS Period, New_Weight AS Weight
+            FROM User_Weight_History
+            WHERE User_ID = :u AND New_Weight IS NOT NULL
+            ORDER BY Updated_At, History_ID
+        """, {"u": user_id})
+    return fetch(f"""
+        SELECT {expr} AS Period,
+               ROUND(AVG(New_Weight), 2) AS Weight,
+               MIN(New_Weight) AS Min_Weight,
+               MAX(New_Weight) AS Max_Weight,
+               COUNT(*) AS Readings
+        FROM User_Weight_History
+        WHERE User_ID = :u AND New_Weight IS NOT NULL
+        GROUP BY Period
+        ORDER BY Period
+    """, {"u": user_id})
+
+
+def chart_series(user_id, bucket="Daily", max_points=MAX_POINTS):
+    """
+    (DataFrame indexed by Period with a "Weight (kg)" column, capped at
+    max_points, number of periods before downsampling).
+    """
+    df = bucketed(user_id, bucket)
+    total = len(df)
+    if df.empty:
+        return pd.DataFrame(columns=["Weight (kg)"]), 0
+
+    period = pd.to_datetime(df["Period"])
+    weight = df["Weight"].astype(float)
+    keep = lttb(period.astype("int64").to_numpy() / 1e9, weight.to_numpy(), max_points)
+
+    series = pd.DataFrame({"Period": period.iloc[keep].to_numpy(),
+                           "Weight (kg)": weight.iloc[keep].to_numpy()})
+    return series.set_index("Period"), total
+
+
+def history_page(user_id, after=None, limit=PAGE_SIZE):
+    """Newest-first page of raw records; returns (DataFrame, next_cursor)."""
+    return keyset_page("User_Weight_History", descending=True, after=after,
+                       filters={"User_ID": user_id}, limit=limit)